@@ -0,0 +1,49 @@
+"""Benchmark for reading and writing DST files.
+
+    python benchmarks/bench_dst.py [stitches]
+"""
+
+import io
+import random
+import sys
+import timeit
+
+from pystitch import EmbPattern, STITCH, JUMP, COLOR_CHANGE
+from pystitch.readers import DstReader
+from pystitch.writers import DstWriter
+
+
+def get_random_pattern(count: int) -> EmbPattern:
+    rng = random.Random(0)
+    pattern = EmbPattern()
+    for i in range(count):
+        if i % 5000 == 4999:
+            pattern.add_command(COLOR_CHANGE)
+        command = JUMP if i % 50 == 0 else STITCH
+        pattern.add_stitch_relative(command, rng.randint(-120, 120), rng.randint(-120, 120))
+    pattern.end()
+    return pattern
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    pattern = get_random_pattern(count)
+    normalized = pattern.get_normalized_pattern({"max_stitch": 121, "max_jump": 121})
+    stream = io.BytesIO()
+    DstWriter.write(normalized, stream)
+    data = stream.getvalue()
+
+    def write() -> None:
+        DstWriter.write(normalized, io.BytesIO())
+
+    def read() -> None:
+        DstReader.read(io.BytesIO(data), EmbPattern())
+
+    number = 3
+    print("stitches: %d, file: %d bytes" % (len(normalized.stitches), len(data)))
+    print("write: %.4f s" % (timeit.timeit(write, number=number) / number))
+    print("read: %.4f s" % (timeit.timeit(read, number=number) / number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark for the Transcoder, the normalization run before writing.
+
+The scenarios follow test_encoder: plain stitching with color changes, the
+same with needle sets, long moves split by max_stitch/max_jump, and a
+translated and a rotated matrix. Times are given per source stitch.
+
+    python benchmarks/bench_encoder.py [stitches]
+"""
+
+import random
+import sys
+import timeit
+
+from pystitch import EmbPattern, STITCH, JUMP, COLOR_CHANGE, NEEDLE_SET
+
+
+def get_stitch_pattern(count: int, compact: bool = False) -> EmbPattern:
+    rng = random.Random(0)
+    pattern = EmbPattern(compact=compact)
+    for i in range(8):
+        pattern.add_thread(random.Random(i).randint(0, 0xFFFFFF))
+    for i in range(count):
+        if i % 5000 == 4999:
+            pattern.add_command(COLOR_CHANGE)
+        command = JUMP if i % 50 == 0 else STITCH
+        pattern.add_stitch_relative(command, rng.randint(-60, 60), rng.randint(-60, 60))
+    pattern.end()
+    return pattern
+
+
+def get_long_move_pattern(count: int, compact: bool = False) -> EmbPattern:
+    rng = random.Random(1)
+    pattern = EmbPattern(compact=compact)
+    pattern.add_thread("red")
+    for i in range(count):
+        command = JUMP if i % 10 == 0 else STITCH
+        pattern.add_stitch_absolute(command, rng.randint(-1000, 1000), rng.randint(-1000, 1000))
+    pattern.end()
+    return pattern
+
+
+SCENARIOS = [
+    ("color changes", get_stitch_pattern, {}),
+    ("needle sets", get_stitch_pattern, {"thread_change_command": NEEDLE_SET}),
+    ("long move split", get_long_move_pattern, {"max_stitch": 121, "max_jump": 121}),
+    ("translated", get_stitch_pattern, {"translate": (100, -50)}),
+    ("rotated", get_stitch_pattern, {"rotate": 30}),
+]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    number = 3
+    for compact in (False, True):
+        for name, build, settings in SCENARIOS:
+            pattern = build(count, compact)
+            pattern.fix_color_count()
+
+            def normalize() -> None:
+                pattern.get_normalized_pattern(settings)
+
+            seconds = timeit.timeit(normalize, number=number) / number
+            print("%-16s %-8s %7.3f s  %6.2f us/stitch" % (
+                name, "compact" if compact else "list", seconds, seconds * 1e6 / len(pattern.stitches),
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark for compressing and decompressing HUS/VIP streams.
+
+    python benchmarks/bench_hus.py [size]
+
+The data is synthetic, runs of stitch-like command and coordinate bytes.
+"""
+
+import random
+import sys
+import timeit
+
+from pystitch.utils.EmbCompress import compress, expand
+
+
+def get_stitch_bytes(count: int) -> bytes:
+    rng = random.Random(0)
+    values = bytearray()
+    while len(values) < count:
+        value = rng.choice((0x80, 0x80, 0x80, 0x81, rng.randint(0, 255)))
+        values.extend([value] * rng.randint(1, 30))
+    return bytes(values[:count])
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = get_stitch_bytes(size)
+    number = 3
+    print("bytes: %d" % len(data))
+    for level in (0, 1, 3, 6, 9):
+        compressed = compress(data, level)
+        assert expand(compressed, len(data)) == data
+        seconds = timeit.timeit(lambda: compress(data, level), number=1)
+        print("compress level %d: %d bytes, %.4f s" % (level, len(compressed), seconds))
+    compressed = compress(data)
+
+    def decompress() -> None:
+        expand(compressed, len(data))
+
+    print("expand: %.4f s" % (timeit.timeit(decompress, number=number) / number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark for the cold import time of pystitch.
+
+    python benchmarks/bench_import.py [runs]
+
+Each run imports pystitch in a fresh interpreter, then reads and writes a
+DST file so that the reader and writer modules are loaded on demand.
+"""
+
+import os
+import subprocess
+import sys
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+IMPORT = "import time; t = time.perf_counter(); import pystitch; print(time.perf_counter() - t)"
+
+FIRST_USE = (
+    "import io, time; import pystitch; t = time.perf_counter(); "
+    "p = pystitch.EmbPattern(); p.add_stitch_absolute(pystitch.STITCH, 10, 10); "
+    "f = io.BytesIO(); pystitch.write_dst(p, f); f.seek(0); pystitch.read_dst(f); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def run(code: str, runs: int) -> float:
+    env = dict(os.environ, PYTHONPATH=SOURCE)
+    times = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", code], env=env)
+        times.append(float(output))
+    return min(times)
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print("import pystitch: %.4f s" % run(IMPORT, runs))
+    print("first dst read/write: %.4f s" % run(FIRST_USE, runs))
+
+
+if __name__ == "__main__":
+    main()
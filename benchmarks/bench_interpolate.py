@@ -0,0 +1,48 @@
+"""Benchmark for long move interpolation in the Transcoder.
+
+Builds a pattern of satin-like columns joined by long travel jumps and
+normalizes it with the DST limits, which splits every long move into
+121 unit steps.
+
+    python benchmarks/bench_interpolate.py [columns]
+"""
+
+import sys
+import timeit
+
+from pystitch import EmbPattern, STITCH, JUMP
+from pystitch.writers import DstWriter
+
+
+def get_long_jump_pattern(columns: int, compact: bool = False) -> EmbPattern:
+    pattern = EmbPattern(compact=compact)
+    for i in range(columns):
+        x = (i % 10) * 5000
+        y = (i // 10) * 5000
+        pattern.add_stitch_absolute(JUMP, x, y)
+        for j in range(20):
+            pattern.add_stitch_absolute(STITCH, x + (j % 2) * 40, y + j * 4)
+        # long stitch back across the hoop, split by max_stitch.
+        pattern.add_stitch_absolute(STITCH, 50000 - x, 50000 - y)
+    return pattern
+
+
+def main() -> None:
+    columns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    settings = {
+        "max_stitch": DstWriter.MAX_STITCH_DISTANCE,
+        "max_jump": DstWriter.MAX_JUMP_DISTANCE,
+    }
+    number = 5
+    for compact in (False, True):
+        pattern = get_long_jump_pattern(columns, compact)
+        normalized = pattern.get_normalized_pattern(settings)
+        seconds = timeit.timeit(lambda: pattern.get_normalized_pattern(settings), number=number) / number
+        print("compact=%s" % compact)
+        print("  source stitches: %d" % len(pattern.stitches))
+        print("  normalized stitches: %d" % len(normalized.stitches))
+        print("  normalize: %.4f s" % seconds)
+
+
+if __name__ == "__main__":
+    main()
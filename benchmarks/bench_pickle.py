@@ -0,0 +1,51 @@
+"""Benchmark for pickling patterns, as done when sending them to worker processes.
+
+Compares the packed payload EmbPattern pickles to against pickling the
+pattern attributes as they are, for list and compact storage. Gives the
+dump and load times and the payload size.
+
+    python benchmarks/bench_pickle.py [stitches]
+"""
+
+import pickle
+import random
+import sys
+import timeit
+
+from pystitch import EmbPattern, EmbStitchArray, STITCH, JUMP, COLOR_CHANGE
+
+
+def get_pattern(count: int) -> EmbPattern:
+    rng = random.Random(0)
+    pattern = EmbPattern()
+    for i in range(8):
+        pattern.add_thread(random.Random(i).randint(0, 0xFFFFFF))
+    for i in range(count):
+        if i % 5000 == 4999:
+            pattern.add_command(COLOR_CHANGE)
+        command = JUMP if i % 50 == 0 else STITCH
+        pattern.add_stitch_relative(command, float(rng.randint(-60, 60)), float(rng.randint(-60, 60)))
+    pattern.end()
+    return pattern
+
+
+def measure(name: str, value: object, number: int) -> None:
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    dump = timeit.timeit(lambda: pickle.dumps(value, pickle.HIGHEST_PROTOCOL), number=number) / number
+    load = timeit.timeit(lambda: pickle.loads(data), number=number) / number
+    print("%-18s dump %7.1f ms  load %7.1f ms  %9d bytes" % (name, dump * 1e3, load * 1e3, len(data)))
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    number = 5
+    pattern = get_pattern(count)
+    compact = pattern.copy()
+    compact.stitches = EmbStitchArray(pattern.stitches)
+    for name, value in (("list", pattern), ("compact", compact)):
+        measure(name + " attributes", dict(value.__dict__, _cache={}), number)
+        measure(name + " packed", value, number)
+
+
+if __name__ == "__main__":
+    main()
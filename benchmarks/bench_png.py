@@ -0,0 +1,52 @@
+"""Benchmark for rendering PNG images.
+
+    python benchmarks/bench_png.py [stitches]
+"""
+
+import io
+import random
+import sys
+import timeit
+
+from pystitch import EmbPattern
+from pystitch.utils import EmbNumpy
+from pystitch.writers import PngWriter
+
+
+def get_random_pattern(count: int) -> EmbPattern:
+    rng = random.Random(0)
+    pattern = EmbPattern()
+    for color in ("red", "blue", "green", "black"):
+        pattern.add_thread(color)
+    x = y = 0
+    for i in range(count):
+        if i % 25000 == 24999:
+            pattern.color_change()
+        x = min(max(x + rng.randint(-30, 30), -500), 500)
+        y = min(max(y + rng.randint(-30, 30), -500), 500)
+        pattern.stitch_abs(x, y)
+    pattern.end()
+    return pattern
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pattern = get_random_pattern(count)
+    number = 1
+    for settings in ({}, {"fancy": True}):
+        def render() -> None:
+            PngWriter.write(pattern.copy(), io.BytesIO(), dict(settings))
+
+        seconds = timeit.timeit(render, number=number) / number
+        print("stitches: %d, settings: %r: %.4f s" % (count, settings, seconds))
+        if EmbNumpy.numpy() is not None:
+            EmbNumpy.ENABLED = False
+            try:
+                seconds = timeit.timeit(render, number=number) / number
+            finally:
+                EmbNumpy.ENABLED = True
+            print("stitches: %d, settings: %r, without numpy: %.4f s" % (count, settings, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Regression benchmark for the EmbPattern interpolate passes.
+
+interpolate_trims, interpolate_frame_eject and interpolate_duplicate_color_as_stop
+are run on a pattern full of jump runs (some long enough to need a trim, some
+returning to where they started and clipped), jump-stop-jump sequences and
+repeated colors. Each pass is also timed on a quarter of the input; a linear
+pass takes about 4 times as long on the full input, a quadratic one about 16
+times. The script exits with status 1 if any ratio goes above MAX_RATIO.
+
+    python benchmarks/bench_trims.py [stitches]
+"""
+
+import sys
+import time
+
+from pystitch import EmbPattern, STITCH, JUMP, STOP, COLOR_CHANGE
+
+MAX_RATIO = 8.0
+
+
+def get_jump_pattern(count: int, compact: bool = False) -> EmbPattern:
+    pattern = EmbPattern(compact=compact)
+    for i in range(8):
+        pattern.add_thread("red" if i % 4 else "blue")
+    blocks = count // 20
+    for i in range(blocks):
+        if i % 1000 == 999:
+            pattern.add_command(COLOR_CHANGE)
+        for j in range(12):
+            pattern.add_stitch_relative(STITCH, 10, (j % 2) * 20 - 10)
+        if i % 3 == 0:  # Long travel, trimmed.
+            for j in range(6):
+                pattern.add_stitch_relative(JUMP, 100, 50)
+        elif i % 3 == 1:  # Jumps returning to the start, clipped.
+            pattern.add_stitch_relative(JUMP, 50, 50)
+            pattern.add_stitch_relative(JUMP, 50, 50)
+            pattern.add_stitch_relative(JUMP, -50, -50)
+            pattern.add_stitch_relative(JUMP, -50, -50)
+            pattern.add_stitch_relative(STITCH, 0, 0)
+            pattern.add_stitch_relative(STITCH, 0, 0)
+        else:  # Jump, stop, jump: a frame eject.
+            pattern.add_stitch_relative(JUMP, 100, 0)
+            pattern.add_stitch_relative(JUMP, 100, 0)
+            pattern.add_command(STOP)
+            pattern.add_stitch_relative(JUMP, -100, 0)
+            pattern.add_stitch_relative(JUMP, -100, 0)
+            pattern.add_stitch_relative(STITCH, 0, 0)
+            pattern.add_stitch_relative(STITCH, 0, 0)
+    pattern.end()
+    return pattern
+
+
+def time_pass(count: int, compact: bool, name: str, *args) -> float:
+    pattern = get_jump_pattern(count, compact)
+    start = time.perf_counter()
+    getattr(pattern, name)(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    passes = (
+        ("interpolate_trims", (3, 200)),
+        ("interpolate_frame_eject", ()),
+        ("interpolate_duplicate_color_as_stop", ()),
+    )
+    failed = False
+    for compact in (False, True):
+        print("compact=%s, stitches: %d" % (compact, len(get_jump_pattern(count, compact).stitches)))
+        for name, args in passes:
+            small = time_pass(count // 4, compact, name, *args)
+            full = time_pass(count, compact, name, *args)
+            ratio = full / small if small else 0.0
+            flag = ""
+            if ratio > MAX_RATIO:
+                flag = "  <-- superlinear"
+                failed = True
+            print("  %s: %.4f s (x%.1f for 4x input)%s" % (name, full, ratio, flag))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark for the binary writers that build their sections in memory.
+
+Each format is written to an in-memory stream from an already normalized
+pattern, so the times are for the encoding and output only. Times are given
+per stitch.
+
+    python benchmarks/bench_writers.py [stitches]
+"""
+
+import io
+import random
+import sys
+import timeit
+
+from pystitch import EmbPattern, STITCH, JUMP, COLOR_CHANGE
+from pystitch.writers import JefWriter, PecWriter, PesWriter, TbfWriter, U01Writer, Vp3Writer, XxxWriter
+
+WRITERS = [
+    ("pes", PesWriter, {}),
+    ("pes v6", PesWriter, {"version": 6}),
+    ("pec", PecWriter, {}),
+    ("vp3", Vp3Writer, {}),
+    ("jef", JefWriter, {}),
+    ("xxx", XxxWriter, {}),
+    ("tbf", TbfWriter, {}),
+    ("u01", U01Writer, {}),
+]
+
+
+def get_pattern(count: int) -> EmbPattern:
+    rng = random.Random(0)
+    pattern = EmbPattern()
+    for i in range(8):
+        pattern.add_thread(random.Random(i).randint(0, 0xFFFFFF))
+    for i in range(count):
+        if i % 5000 == 4999:
+            pattern.add_command(COLOR_CHANGE)
+        command = JUMP if i % 50 == 0 else STITCH
+        pattern.add_stitch_relative(command, rng.randint(-60, 60), rng.randint(-60, 60))
+    pattern.end()
+    return pattern
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    number = 3
+    source = get_pattern(count)
+    for name, writer, settings in WRITERS:
+        encode_settings = dict(settings)
+        for key in ("max_stitch", "max_jump", "full_jump", "round", "thread_change_command",
+                    "explicit_trim", "sequin_contingency", "writes_speeds"):
+            value = getattr(writer, key.upper() + ("_DISTANCE" if key.startswith("max_") else ""), None)
+            if value is not None:
+                encode_settings.setdefault(key, value)
+        pattern = source.get_normalized_pattern(encode_settings)
+
+        def write() -> None:
+            writer.write(pattern.copy(), io.BytesIO(), dict(settings))
+
+        seconds = timeit.timeit(write, number=number) / number
+        print("%-8s %7.3f s  %6.2f us/stitch" % (name, seconds, seconds * 1e6 / len(pattern.stitches)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,125 +1,189 @@
 """Top-level module for PyStitch embroidery library"""
 
-from typing import Optional, Union, Dict, Any, IO, Generator
-
-# First-party imports (pystitch modules)
-from pystitch.readers import A10oReader
-from pystitch.readers import A100Reader
-
-# pystitch.readers.ArtReader as ArtReader
-from pystitch.readers import BroReader
-from pystitch.readers import ColReader
-from pystitch.readers import CsvReader
-from pystitch.readers import DatReader
-from pystitch.readers import DsbReader
-from pystitch.readers import DstReader
-from pystitch.readers import DszReader
-from pystitch.readers import EdrReader
-from pystitch.readers import EmdReader
-from pystitch.readers import ExpReader
-from pystitch.readers import ExyReader
-from pystitch.readers import FxyReader
-from pystitch.readers import GcodeReader
-from pystitch.readers import GtReader
-from pystitch.readers import HusReader
-from pystitch.readers import InbReader
-from pystitch.readers import InfReader
-from pystitch.readers import IqpReader
-from pystitch.readers import JefReader
-from pystitch.readers import JpxReader
-from pystitch.readers import JsonReader
-from pystitch.readers import KsmReader
-from pystitch.readers import MaxReader
-from pystitch.readers import MitReader
-from pystitch.readers import NewReader
-from pystitch.readers import PcdReader
-from pystitch.readers import PcmReader
-from pystitch.readers import PcqReader
-from pystitch.readers import PcsReader
-from pystitch.readers import PecReader
-from pystitch.readers import PesReader
-from pystitch.readers import PhbReader
-from pystitch.readers import PhcReader
-from pystitch.readers import PltReader
-from pystitch.readers import PmvReader
-from pystitch.readers import QccReader
-from pystitch.readers import SewReader
-from pystitch.readers import ShvReader
-from pystitch.readers import SpxReader
-from pystitch.readers import StcReader
-from pystitch.readers import StxReader
-from pystitch.readers import TapReader
-from pystitch.readers import TbfReader
-from pystitch.readers import U01Reader
-from pystitch.readers import Vp3Reader
-from pystitch.readers import XxxReader
-from pystitch.readers import ZhsReader
-from pystitch.readers import ZxyReader
-
-# Writers
-from pystitch.writers import ColWriter
-from pystitch.writers import CsvWriter
-from pystitch.writers import DstWriter
-from pystitch.writers import EdrWriter
-from pystitch.writers import ExpWriter
-from pystitch.writers import GcodeWriter
-from pystitch.writers import InkstitchGcodeWriter
-from pystitch.writers import InfWriter
-from pystitch.writers import JefWriter
-from pystitch.writers import JsonWriter
-from pystitch.writers import PecWriter
-from pystitch.writers import PesWriter
-from pystitch.writers import PltWriter
-from pystitch.writers import PmvWriter
-from pystitch.writers import PngWriter
-from pystitch.writers import QccWriter
-from pystitch.writers import SvgWriter
-from pystitch.writers import TbfWriter
-from pystitch.writers import TxtWriter
-from pystitch.writers import U01Writer
-from pystitch.writers import Vp3Writer
-from pystitch.writers import XxxWriter
+import importlib
+from typing import Optional, Union, Dict, Any, IO, Generator, List
 
 # Local imports from organized modules
 from .core.EmbConstant import *
+from .core.EmbBlocks import EmbBlock, EmbBlockIndex
+from .core.EmbInfo import EmbInfo
+from .core.EmbStats import PatternStats
 from .core.EmbPattern import EmbPattern
+from .core.EmbStitchArray import EmbStitchArray
 from .core.pystitch import *
 from .utils.EmbFunctions import *
 from .utils.EmbCompress import compress, expand  # type: ignore # noqa: F401
+from .utils import EmbDetect as _EmbDetect
+from .utils.EmbDetect import detect_format
+from .utils.EmbCache import NormalizationCache
 
 # items available in a sub-heirarchy (e.g. pystitch.PecGraphics.get_graphic_as_string)
 from .utils.PecGraphics import get_graphic_as_string  # type: ignore
 
 
-def read(filename: str, settings: Optional[Dict[str, Any]] = None,
-         pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
-    """Reads file, assuming type by extension"""
-    extension = EmbPattern.get_extension_by_filename(filename)  # type: ignore
-    extension = extension.lower()  # type: ignore
-    for file_type in supported_formats():
-        if file_type["extension"] != extension:
-            continue
-        reader = file_type.get("reader", None)  # type: ignore
-        return EmbPattern.read_embroidery(reader, filename, settings, pattern)  # type: ignore
-    return None
+# Reader and writer modules are imported on first use, see __getattr__.
+_READERS = (
+    "A10oReader", "A100Reader", "BroReader", "ColReader", "CsvReader",
+    "DatReader", "DsbReader", "DstReader", "DszReader", "EdrReader",
+    "EmdReader", "ExpReader", "ExyReader", "FxyReader", "GcodeReader",
+    "GtReader", "HusReader", "InbReader", "InfReader", "IqpReader",
+    "JefReader", "JpxReader", "JsonReader", "KsmReader", "MaxReader",
+    "MitReader", "NewReader", "PcdReader", "PcmReader", "PcqReader",
+    "PcsReader", "PecReader", "PesReader", "PhbReader", "PhcReader",
+    "PltReader", "PmvReader", "QccReader", "SewReader", "ShvReader",
+    "SpxReader", "StcReader", "StxReader", "TapReader", "TbfReader",
+    "U01Reader", "Vp3Reader", "XxxReader", "ZhsReader", "ZxyReader",
+)
+
+_WRITERS = (
+    "ColWriter", "CsvWriter", "DstWriter", "EdrWriter", "ExpWriter",
+    "GcodeWriter", "InkstitchGcodeWriter", "InfWriter", "JefWriter",
+    "JsonWriter", "PecWriter", "PesWriter", "PltWriter", "PmvWriter",
+    "PngWriter", "QccWriter", "SvgWriter", "TbfWriter", "TxtWriter",
+    "U01Writer", "Vp3Writer", "XxxWriter",
+)
+
+# Names imported from their module on first use, batch conversion brings in
+# concurrent.futures and multiprocessing.
+_LAZY = {
+    "BatchReport": "pystitch.utils.EmbBatch",
+    "ConversionResult": "pystitch.utils.EmbBatch",
+    "convert_many": "pystitch.utils.EmbBatch",
+    "expand_jobs": "pystitch.utils.EmbBatch",
+}
+
+
+def _load_module(name: str) -> Any:
+    """Imports the reader or writer module, or the lazily imported name"""
+    if name in _READERS:
+        module = importlib.import_module("pystitch.readers." + name)
+    elif name in _WRITERS:
+        module = importlib.import_module("pystitch.writers." + name)
+    elif name in ("readers", "writers"):
+        module = importlib.import_module("pystitch." + name)
+    elif name in _LAZY:
+        module = getattr(importlib.import_module(_LAZY[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = module
+    return module
+
+
+def __getattr__(name: str) -> Any:
+    return _load_module(name)
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_READERS) | set(_WRITERS) | set(_LAZY) | {"readers", "writers"})
 
 
-def write(pattern: 'EmbPattern', filename: str, settings: Optional[Dict[str, Any]] = None) -> None:
-    """Writes file, assuming type by extension"""
+def read(filename: str, settings: Optional[Dict[str, Any]] = None,
+         pattern: Optional['EmbPattern'] = None,
+         header_only: bool = False, lazy: bool = False) -> Optional[Union['EmbPattern', 'EmbInfo']]:
+    """Reads file, assuming type by extension. Unless the "detect" setting is
+    False, the file header is checked first and a file whose content clearly
+    belongs to another format, or has no known extension, is read as that.
+
+    With header_only the EmbInfo summary is returned instead, see peek().
+    With lazy the threads and metadata are read and the stitches are decoded
+    on first use, for the formats that support it."""
+    if header_only:
+        return peek(filename, settings)
+    reader = _file_reader(filename, settings)
+    if reader is None:
+        return None
+    return EmbPattern.read_embroidery(reader, filename, settings, pattern, lazy)  # type: ignore
+
+
+def peek(filename: str, settings: Optional[Dict[str, Any]] = None) -> Optional['EmbInfo']:
+    """Reads the name, threads, counts and extents of a file as an EmbInfo.
+    Formats that keep these in their header are not decoded further, others
+    are read and summarised. The format is found as for read()."""
+    reader = _file_reader(filename, settings)
+    if reader is None:
+        return None
+    return EmbPattern.peek_embroidery(reader, filename, settings)  # type: ignore
+
+
+def _file_reader(filename: str, settings: Optional[Dict[str, Any]]) -> Any:
+    """Gives the reader module for the file, None if there is none."""
     extension = EmbPattern.get_extension_by_filename(filename)  # type: ignore
     extension = extension.lower()  # type: ignore
-    supported_extensions = [file_type["extension"]
-                           for file_type in supported_formats()]  # type: ignore
-
-    if extension not in supported_extensions:  # type: ignore
+    file_type = _FORMATS_BY_EXTENSION.get(extension)  # type: ignore
+    if settings is None or settings.get("detect", True):
+        file_type = _content_format(filename, file_type)
+    if file_type is None:
+        return None
+    reader = file_type.get("reader", None)
+    if reader is not None:
+        reader = _load_module(reader)
+    return reader
+
+
+def _content_format(filename: str, file_type: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Picks the format to read with from the file header, file_type is the
+    format given by the extension. Only a magic string overrides a known
+    extension, header layouts alone are too loose to."""
+    try:
+        header = _EmbDetect.read_probe(filename)
+    except IOError:
+        return file_type
+    extension = file_type["extension"] if file_type is not None else None
+    ranked = _EmbDetect.rank_formats(header, extension)
+    if not ranked or any(name == extension for name, score in ranked):
+        return file_type
+    name, score = ranked[0]
+    if file_type is not None and score < _EmbDetect.MAGIC:
+        return file_type
+    return _FORMATS_BY_EXTENSION[name]
+
+
+def write(pattern: 'EmbPattern', filename: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None) -> None:
+    """Writes file, assuming type by extension. filename may be a writable
+    binary object instead, including forward-only streams such as
+    sys.stdout.buffer, sockets and HTTP responses. Its type is given by the
+    "extension" setting, or else by the extension of its name."""
+    EmbPattern.write_embroidery(_file_writer(filename, settings), pattern, filename, settings)  # type: ignore
+
+
+def write_all(pattern: 'EmbPattern', targets: List[Any],
+              settings: Optional[Dict[str, Any]] = None, workers: Optional[int] = None) -> None:
+    """Writes the pattern to several files, types by extension. Targets are
+    filenames or streams, or (filename, settings) pairs. Targets whose writers
+    normalize with the same encoder settings share one normalization, with
+    workers above 1 the normalizations run in parallel processes."""
+    writer_targets = []
+    for target in targets:
+        if not isinstance(target, (tuple, list)):
+            target = (target,)
+        target_settings = settings
+        if len(target) > 1 and target[1] is not None:
+            target_settings = dict(settings or {}, **target[1])
+        writer_targets.append((_file_writer(target[0], target_settings),) + tuple(target))
+    EmbPattern.write_embroidery_all(writer_targets, pattern, settings, workers)  # type: ignore
+
+
+def _file_writer(filename: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None) -> Any:
+    """Gives the writer module for the file or stream, raises IOError if there
+    is none. The "extension" setting overrides the extension of the name."""
+    extension = None
+    if settings is not None:
+        extension = settings.get("extension")
+    if extension is None:
+        name = filename if isinstance(filename, str) else getattr(filename, "name", None)
+        if not isinstance(name, str):
+            raise IOError("Stream has no file name, give the file type with the 'extension' setting")
+        extension = EmbPattern.get_extension_by_filename(name)  # type: ignore
+    extension = extension.lower().lstrip(".")  # type: ignore
+    file_type = _FORMATS_BY_EXTENSION.get(extension)  # type: ignore
+
+    if file_type is None:
         raise IOError(f"Conversion to file type '{extension}' is not supported")  # type: ignore
 
-    ext_to_file_type_lookup = {file_type["extension"]: file_type
-                              for file_type in supported_formats()}  # type: ignore
-    writer = ext_to_file_type_lookup[extension].get("writer")  # type: ignore
+    writer = file_type.get("writer")
 
     if writer:
-        EmbPattern.write_embroidery(writer, pattern, filename, settings)  # type: ignore
+        return _load_module(writer)
     else:
         raise IOError("No supported writer found.")
 
@@ -131,6 +195,29 @@ def convert(filename_from: str, filename_to: str,
         return
     write(pattern, filename_to, settings)
 
+def _resolve_format(file_type: Dict[str, Any]) -> Dict[str, Any]:
+    """Copies a format table entry with its reader and writer imported"""
+    entry = dict(file_type)
+    for key in ("reader", "writer"):
+        if key in entry:
+            entry[key] = _load_module(entry[key])
+    return entry
+
+def get_format(extension: Optional[str] = None,
+               mimetype: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Returns the supported_formats() entry for the extension or mimetype,
+    or None if there is no such format. Where several formats share a
+    mimetype the first one listed is given."""
+    if extension is not None:
+        file_type = _FORMATS_BY_EXTENSION.get(extension.lower())
+    elif mimetype is not None:
+        file_type = _FORMATS_BY_MIMETYPE.get(mimetype)
+    else:
+        file_type = None
+    if file_type is None:
+        return None
+    return _resolve_format(file_type)
+
 def supported_formats() -> Generator[Dict[str, Any], None, None]:
     """Generates dictionary entries for supported formats. Each entry will
     always have description, extension, mimetype, and category. Reader
@@ -141,13 +228,19 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
 
     Options provides accepted options by the format and their accepted values.
     """
+    for file_type in _FORMATS:
+        yield _resolve_format(file_type)
+
+def _format_table() -> Generator[Dict[str, Any], None, None]:
+    """Format entries as given by supported_formats(), naming the reader and
+    writer modules rather than importing them."""
     # yield ({
     #     "description": "Art Embroidery Format",
     #     "extension": "art",
     #     "extensions": ("art",),
     #     "mimetype": "application/x-art",
     #     "category": "embroidery",
-    #     "reader": ArtReader,
+    #     "reader": "ArtReader",
     #     "metadata": ("name")
     # })
     yield (
@@ -157,8 +250,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pec",),
             "mimetype": "application/x-pec",
             "category": "embroidery",
-            "reader": PecReader,
-            "writer": PecWriter,
+            "reader": "PecReader",
+            "writer": "PecWriter",
             "metadata": ("name"),
         }
     )
@@ -169,8 +262,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pes",),
             "mimetype": "application/x-pes",
             "category": "embroidery",
-            "reader": PesReader,
-            "writer": PesWriter,
+            "reader": "PesReader",
+            "writer": "PesWriter",
             "versions": ("1", "6", "1t", "6t"),
             "metadata": ("name", "author", "category", "keywords", "comments"),
         }
@@ -182,8 +275,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("exp",),
             "mimetype": "application/x-exp",
             "category": "embroidery",
-            "reader": ExpReader,
-            "writer": ExpWriter,
+            "reader": "ExpReader",
+            "writer": "ExpWriter",
         }
     )
     # yield (
@@ -193,7 +286,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
     #         "extensions": ("cnd",),
     #         "mimetype": "application/x-cnd",
     #         "category": "embroidery",
-    #         "reader": CndReader,
+    #         "reader": "CndReader",
     #     }
     # )
     yield (
@@ -203,8 +296,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("dst",),
             "mimetype": "application/x-dst",
             "category": "embroidery",
-            "reader": DstReader,
-            "writer": DstWriter,
+            "reader": "DstReader",
+            "writer": "DstWriter",
             "read_options": {
                 "trim_distance": (None, 3.0, 50.0),
                 "trim_at": (2, 3, 4, 5, 6, 7, 8),
@@ -222,8 +315,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("jef",),
             "mimetype": "application/x-jef",
             "category": "embroidery",
-            "reader": JefReader,
-            "writer": JefWriter,
+            "reader": "JefReader",
+            "writer": "JefWriter",
             "read_options": {
                 "trim_distance": (None, 3.0, 50.0),
                 "trims": (True, False),
@@ -243,8 +336,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("vp3",),
             "mimetype": "application/x-vp3",
             "category": "embroidery",
-            "reader": Vp3Reader,
-            "writer": Vp3Writer,
+            "reader": "Vp3Reader",
+            "writer": "Vp3Writer",
         }
     )
     yield (
@@ -254,7 +347,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("svg", "svgz"),
             "mimetype": "image/svg+xml",
             "category": "vector",
-            "writer": SvgWriter,
+            "writer": "SvgWriter",
         }
     )
     yield (
@@ -264,8 +357,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("csv",),
             "mimetype": "text/csv",
             "category": "debug",
-            "reader": CsvReader,
-            "writer": CsvWriter,
+            "reader": "CsvReader",
+            "writer": "CsvWriter",
             "versions": ("default", "delta", "full"),
         }
     )
@@ -276,8 +369,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("xxx",),
             "mimetype": "application/x-xxx",
             "category": "embroidery",
-            "reader": XxxReader,
-            "writer": XxxWriter,
+            "reader": "XxxReader",
+            "writer": "XxxWriter",
         }
     )
     yield (
@@ -287,7 +380,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("sew",),
             "mimetype": "application/x-sew",
             "category": "embroidery",
-            "reader": SewReader,
+            "reader": "SewReader",
         }
     )
     yield (
@@ -297,8 +390,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("u00", "u01", "u02"),
             "mimetype": "application/x-u01",
             "category": "embroidery",
-            "reader": U01Reader,
-            "writer": U01Writer,
+            "reader": "U01Reader",
+            "writer": "U01Writer",
         }
     )
     yield (
@@ -308,7 +401,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("shv",),
             "mimetype": "application/x-shv",
             "category": "embroidery",
-            "reader": ShvReader,
+            "reader": "ShvReader",
         }
     )
     yield (
@@ -318,7 +411,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("10o",),
             "mimetype": "application/x-10o",
             "category": "embroidery",
-            "reader": A10oReader,
+            "reader": "A10oReader",
         }
     )
     yield (
@@ -328,7 +421,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("100",),
             "mimetype": "application/x-100",
             "category": "embroidery",
-            "reader": A100Reader,
+            "reader": "A100Reader",
         }
     )
     yield (
@@ -338,7 +431,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("bro",),
             "mimetype": "application/x-Bro",
             "category": "embroidery",
-            "reader": BroReader,
+            "reader": "BroReader",
         }
     )
     yield (
@@ -348,7 +441,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("dat",),
             "mimetype": "application/x-dat",
             "category": "embroidery",
-            "reader": DatReader,
+            "reader": "DatReader",
         }
     )
     yield (
@@ -358,7 +451,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("dsb",),
             "mimetype": "application/x-dsb",
             "category": "embroidery",
-            "reader": DsbReader,
+            "reader": "DsbReader",
         }
     )
     yield (
@@ -368,7 +461,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("dsz",),
             "mimetype": "application/x-dsz",
             "category": "embroidery",
-            "reader": DszReader,
+            "reader": "DszReader",
         }
     )
     yield (
@@ -378,7 +471,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("emd",),
             "mimetype": "application/x-emd",
             "category": "embroidery",
-            "reader": EmdReader,
+            "reader": "EmdReader",
         }
     )
     yield (
@@ -388,7 +481,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("e00", "e01", "e02"),
             "mimetype": "application/x-exy",
             "category": "embroidery",
-            "reader": ExyReader,
+            "reader": "ExyReader",
         }
     )
     yield (
@@ -398,7 +491,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("f00", "f01", "f02"),
             "mimetype": "application/x-fxy",
             "category": "embroidery",
-            "reader": FxyReader,
+            "reader": "FxyReader",
         }
     )
     yield (
@@ -408,7 +501,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("gt",),
             "mimetype": "application/x-exy",
             "category": "embroidery",
-            "reader": GtReader,
+            "reader": "GtReader",
         }
     )
     yield (
@@ -418,7 +511,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("inb",),
             "mimetype": "application/x-inb",
             "category": "embroidery",
-            "reader": InbReader,
+            "reader": "InbReader",
         }
     )
     yield (
@@ -428,8 +521,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("tbf",),
             "mimetype": "application/x-tbf",
             "category": "embroidery",
-            "reader": TbfReader,
-            "writer": TbfWriter,
+            "reader": "TbfReader",
+            "writer": "TbfWriter",
         }
     )
     yield (
@@ -439,7 +532,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("ksm",),
             "mimetype": "application/x-ksm",
             "category": "embroidery",
-            "reader": KsmReader,
+            "reader": "KsmReader",
         }
     )
     yield (
@@ -449,7 +542,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("tap",),
             "mimetype": "application/x-tap",
             "category": "embroidery",
-            "reader": TapReader,
+            "reader": "TapReader",
         }
     )
     yield (
@@ -459,7 +552,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("spx"),
             "mimetype": "application/x-spx",
             "category": "embroidery",
-            "reader": SpxReader,
+            "reader": "SpxReader",
         }
     )
     yield (
@@ -469,7 +562,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("stx",),
             "mimetype": "application/x-stx",
             "category": "embroidery",
-            "reader": StxReader,
+            "reader": "StxReader",
         }
     )
     yield (
@@ -479,7 +572,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("phb",),
             "mimetype": "application/x-phb",
             "category": "embroidery",
-            "reader": PhbReader,
+            "reader": "PhbReader",
         }
     )
     yield (
@@ -489,7 +582,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("phc",),
             "mimetype": "application/x-phc",
             "category": "embroidery",
-            "reader": PhcReader,
+            "reader": "PhcReader",
         }
     )
     yield (
@@ -499,7 +592,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("new",),
             "mimetype": "application/x-new",
             "category": "embroidery",
-            "reader": NewReader,
+            "reader": "NewReader",
         }
     )
     yield (
@@ -509,7 +602,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("max",),
             "mimetype": "application/x-max",
             "category": "embroidery",
-            "reader": MaxReader,
+            "reader": "MaxReader",
         }
     )
     yield (
@@ -519,7 +612,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("mit",),
             "mimetype": "application/x-mit",
             "category": "embroidery",
-            "reader": MitReader,
+            "reader": "MitReader",
         }
     )
     yield (
@@ -529,7 +622,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pcd",),
             "mimetype": "application/x-pcd",
             "category": "embroidery",
-            "reader": PcdReader,
+            "reader": "PcdReader",
         }
     )
     yield (
@@ -539,7 +632,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pcq",),
             "mimetype": "application/x-pcq",
             "category": "embroidery",
-            "reader": PcqReader,
+            "reader": "PcqReader",
         }
     )
     yield (
@@ -549,7 +642,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pcm",),
             "mimetype": "application/x-pcm",
             "category": "embroidery",
-            "reader": PcmReader,
+            "reader": "PcmReader",
         }
     )
     yield (
@@ -559,7 +652,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pcs",),
             "mimetype": "application/x-pcs",
             "category": "embroidery",
-            "reader": PcsReader,
+            "reader": "PcsReader",
         }
     )
     yield (
@@ -569,7 +662,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("jpx",),
             "mimetype": "application/x-jpx",
             "category": "embroidery",
-            "reader": JpxReader,
+            "reader": "JpxReader",
         }
     )
     yield (
@@ -579,7 +672,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("stc",),
             "mimetype": "application/x-stc",
             "category": "embroidery",
-            "reader": StcReader,
+            "reader": "StcReader",
         }
     )
     yield ({
@@ -588,7 +681,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
         "extensions": ("zhs",),
         "mimetype": "application/x-zhs",
         "category": "embroidery",
-        "reader": ZhsReader
+        "reader": "ZhsReader"
     })
     yield (
         {
@@ -597,7 +690,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("z00", "z01", "z02"),
             "mimetype": "application/x-zxy",
             "category": "embroidery",
-            "reader": ZxyReader,
+            "reader": "ZxyReader",
         }
     )
     yield (
@@ -607,8 +700,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("pmv",),
             "mimetype": "application/x-pmv",
             "category": "stitch",
-            "reader": PmvReader,
-            "writer": PmvWriter,
+            "reader": "PmvReader",
+            "writer": "PmvWriter",
         }
     )
     yield (
@@ -618,7 +711,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("png",),
             "mimetype": "image/png",
             "category": "image",
-            "writer": PngWriter,
+            "writer": "PngWriter",
             "write_options": {
                 "background": (0x000000, 0xFFFFFF),
                 "linewidth": (1, 2, 3, 4, 5, 6, 7, 8, 9, 10),
@@ -632,7 +725,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("txt",),
             "mimetype": "text/plain",
             "category": "debug",
-            "writer": TxtWriter,
+            "writer": "TxtWriter",
             "versions": ("default", "embroidermodder"),
         }
     )
@@ -643,8 +736,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("gcode", "g-code", "ngc", "nc", ".g"),
             "mimetype": "text/plain",
             "category": "embroidery",
-            "reader": GcodeReader,
-            "writer": InkstitchGcodeWriter,
+            "reader": "GcodeReader",
+            "writer": "InkstitchGcodeWriter",
             "write_options": {
                 "flip_x": (True, False),
                 "flip_y": (True, False),
@@ -660,7 +753,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("hus",),
             "mimetype": "application/x-hus",
             "category": "embroidery",
-            "reader": HusReader,
+            "reader": "HusReader",
         }
     )
     yield(
@@ -670,7 +763,7 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("iqp",),
             "mimetype": "application/x-iqp",
             "category": "quilting",
-            "reader": IqpReader,
+            "reader": "IqpReader",
         }
     )
     yield(
@@ -680,8 +773,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("plt",),
             "mimetype": "text/plain",
             "category": "quilting",
-            "reader": PltReader,
-            "writer": PltWriter,
+            "reader": "PltReader",
+            "writer": "PltWriter",
         }
     )
     yield(
@@ -691,8 +784,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("qcc",),
             "mimetype": "text/plain",
             "category": "quilting",
-            "reader": QccReader,
-            "writer": QccWriter,
+            "reader": "QccReader",
+            "writer": "QccWriter",
         }
     )
     yield (
@@ -702,8 +795,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("edr",),
             "mimetype": "application/x-edr",
             "category": "color",
-            "reader": EdrReader,
-            "writer": EdrWriter,
+            "reader": "EdrReader",
+            "writer": "EdrWriter",
         }
     )
     yield (
@@ -713,8 +806,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("col",),
             "mimetype": "application/x-col",
             "category": "color",
-            "reader": ColReader,
-            "writer": ColWriter,
+            "reader": "ColReader",
+            "writer": "ColWriter",
         }
     )
     yield (
@@ -724,8 +817,8 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("inf",),
             "mimetype": "application/x-inf",
             "category": "color",
-            "reader": InfReader,
-            "writer": InfWriter,
+            "reader": "InfReader",
+            "writer": "InfWriter",
         }
     )
     yield (
@@ -735,170 +828,185 @@ def supported_formats() -> Generator[Dict[str, Any], None, None]:
             "extensions": ("json",),
             "mimetype": "application/json",
             "category": "debug",
-            "reader": JsonReader,
-            "writer": JsonWriter,
+            "reader": "JsonReader",
+            "writer": "JsonWriter",
         }
     )
 
+_FORMATS = tuple(_format_table())
+_FORMATS_BY_EXTENSION = {file_type["extension"]: file_type for file_type in _FORMATS}
+_FORMATS_BY_MIMETYPE: Dict[str, Dict[str, Any]] = {}
+for _file_type in _FORMATS:
+    _FORMATS_BY_MIMETYPE.setdefault(_file_type["mimetype"], _file_type)
+del _file_type
+
 def read_dst(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as DST file"""
-    return EmbPattern.read_embroidery(DstReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("DstReader"), f, settings, pattern)  # type: ignore
 
 def read_pec(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as PEC file"""
-    return EmbPattern.read_embroidery(PecReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("PecReader"), f, settings, pattern)  # type: ignore
 
 def read_pes(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as PES file"""
-    return EmbPattern.read_embroidery(PesReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("PesReader"), f, settings, pattern)  # type: ignore
 
 def read_exp(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as EXP file"""
-    return EmbPattern.read_embroidery(ExpReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("ExpReader"), f, settings, pattern)  # type: ignore
 
 def read_vp3(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as VP3 file"""
-    return EmbPattern.read_embroidery(Vp3Reader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("Vp3Reader"), f, settings, pattern)  # type: ignore
 
 def read_jef(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as JEF file"""
-    return EmbPattern.read_embroidery(JefReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("JefReader"), f, settings, pattern)  # type: ignore
 
 def read_u01(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as U01 file"""
-    return EmbPattern.read_embroidery(U01Reader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("U01Reader"), f, settings, pattern)  # type: ignore
 
 def read_csv(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as CSV file"""
-    return EmbPattern.read_embroidery(CsvReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("CsvReader"), f, settings, pattern)  # type: ignore
 
 def read_json(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
              pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as JSON file"""
-    return EmbPattern.read_embroidery(JsonReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("JsonReader"), f, settings, pattern)  # type: ignore
 
 def read_gcode(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
               pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as GCode file"""
-    return EmbPattern.read_embroidery(GcodeReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("GcodeReader"), f, settings, pattern)  # type: ignore
 
 def read_xxx(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as XXX file"""
-    return EmbPattern.read_embroidery(XxxReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("XxxReader"), f, settings, pattern)  # type: ignore
 
 def read_tbf(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as TBF file"""
-    return EmbPattern.read_embroidery(TbfReader, f, settings, pattern)  # type: ignore
+    return EmbPattern.read_embroidery(_load_module("TbfReader"), f, settings, pattern)  # type: ignore
 
 def read_iqp(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as IQP file"""
-    pattern = EmbPattern.read_embroidery(IqpReader, f, settings, pattern)  # type: ignore
+    pattern = EmbPattern.read_embroidery(_load_module("IqpReader"), f, settings, pattern)  # type: ignore
     return pattern  # type: ignore
 
 def read_plt(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as PLT file"""
-    pattern = EmbPattern.read_embroidery(PltReader, f, settings, pattern)  # type: ignore
+    pattern = EmbPattern.read_embroidery(_load_module("PltReader"), f, settings, pattern)  # type: ignore
     return pattern  # type: ignore
 
 def read_qcc(f: Union[str, IO[Any]], settings: Optional[Dict[str, Any]] = None,
             pattern: Optional['EmbPattern'] = None) -> Optional['EmbPattern']:
     """Reads fileobject as QCC file"""
-    pattern = EmbPattern.read_embroidery(QccReader, f, settings, pattern)  # type: ignore
+    pattern = EmbPattern.read_embroidery(_load_module("QccReader"), f, settings, pattern)  # type: ignore
     return pattern  # type: ignore
 
 def write_dst(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as DST file"""
-    EmbPattern.write_embroidery(DstWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("DstWriter"), pattern, stream, settings)  # type: ignore
 
 def write_pec(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as PEC file"""
-    EmbPattern.write_embroidery(PecWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("PecWriter"), pattern, stream, settings)  # type: ignore
 
 def write_pes(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as PES file"""
-    EmbPattern.write_embroidery(PesWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("PesWriter"), pattern, stream, settings)  # type: ignore
 
 def write_exp(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as EXP file"""
-    EmbPattern.write_embroidery(ExpWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("ExpWriter"), pattern, stream, settings)  # type: ignore
 
 def write_vp3(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as Vp3 file"""
-    EmbPattern.write_embroidery(Vp3Writer, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("Vp3Writer"), pattern, stream, settings)  # type: ignore
 
 def write_jef(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as JEF file"""
-    EmbPattern.write_embroidery(JefWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("JefWriter"), pattern, stream, settings)  # type: ignore
 
 def write_u01(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as U01 file"""
-    EmbPattern.write_embroidery(U01Writer, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("U01Writer"), pattern, stream, settings)  # type: ignore
 
 def write_csv(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as CSV file"""
-    EmbPattern.write_embroidery(CsvWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("CsvWriter"), pattern, stream, settings)  # type: ignore
 
 def write_json(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
               settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as JSON file"""
-    EmbPattern.write_embroidery(JsonWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("JsonWriter"), pattern, stream, settings)  # type: ignore
 
 def write_txt(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as TXT file"""
-    EmbPattern.write_embroidery(TxtWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("TxtWriter"), pattern, stream, settings)  # type: ignore
 
 def write_gcode(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
                settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as Gcode file"""
-    EmbPattern.write_embroidery(GcodeWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("GcodeWriter"), pattern, stream, settings)  # type: ignore
 
 def write_xxx(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as XXX file"""
-    EmbPattern.write_embroidery(XxxWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("XxxWriter"), pattern, stream, settings)  # type: ignore
 
 def write_tbf(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as TBF file"""
-    EmbPattern.write_embroidery(TbfWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("TbfWriter"), pattern, stream, settings)  # type: ignore
 
 def write_plt(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as PLT file"""
-    EmbPattern.write_embroidery(PltWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("PltWriter"), pattern, stream, settings)  # type: ignore
 
 def write_qcc(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as QCC file"""
-    EmbPattern.write_embroidery(QccWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("QccWriter"), pattern, stream, settings)  # type: ignore
 
 def write_svg(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as SVG file"""
-    EmbPattern.write_embroidery(SvgWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("SvgWriter"), pattern, stream, settings)  # type: ignore
 
 def write_png(pattern: 'EmbPattern', stream: Union[str, IO[Any]],
              settings: Optional[Dict[str, Any]] = None) -> None:
     """Writes fileobject as PNG file"""
-    EmbPattern.write_embroidery(PngWriter, pattern, stream, settings)  # type: ignore
+    EmbPattern.write_embroidery(_load_module("PngWriter"), pattern, stream, settings)  # type: ignore
+
+
+# Star imports give the names above, the reader and writer modules and the
+# lazily imported names, which are imported then.
+__all__ = sorted(
+    ({name for name in globals() if not name.startswith("_")} - {"importlib", "List"})
+    | set(_READERS) | set(_WRITERS) | set(_LAZY) | {"readers", "writers"}
+)
@@ -0,0 +1,72 @@
+"""Command line entry point.
+
+    python -m pystitch convert designs/*.pes -t dst -t png -d out -j 8
+    python -m pystitch convert design.pes design.dst
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .utils.EmbBatch import convert_many, expand_jobs
+
+
+def _parse_settings(values: List[str]) -> dict:
+    settings = {}
+    for value in values:
+        key, _, text = value.partition("=")
+        try:
+            settings[key] = int(text)
+        except ValueError:
+            try:
+                settings[key] = float(text)
+            except ValueError:
+                settings[key] = text
+    return settings
+
+
+def convert_command(args: argparse.Namespace) -> int:
+    settings = _parse_settings(args.setting)
+    if args.to:
+        formats = [name for value in args.to for name in value.split(",") if name]
+        try:
+            jobs = expand_jobs(args.inputs, formats, args.output_dir)
+        except ValueError as e:
+            print("convert: %s" % e, file=sys.stderr)
+            return 2
+    elif len(args.inputs) == 2:
+        jobs = [(args.inputs[0], args.inputs[1])]
+    else:
+        print("convert: give a source and target file, or target formats with -t", file=sys.stderr)
+        return 2
+    report = convert_many(jobs, workers=args.workers, settings=settings or None)
+    if not args.quiet:
+        for result in report.succeeded:
+            print("%s -> %s" % (result.source, result.target))
+    print(report.summary(), file=sys.stderr if report.failed else sys.stdout)
+    return 1 if report.failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pystitch", description="Embroidery file tools.")
+    commands = parser.add_subparsers(dest="command")
+    convert = commands.add_parser("convert", help="convert embroidery files between formats")
+    convert.add_argument("inputs", nargs="+", help="input files or glob patterns, or a source and a target file")
+    convert.add_argument("-t", "--to", action="append", default=[],
+                         help="target format extension, repeat or comma separate for several")
+    convert.add_argument("-d", "--output-dir", default=None,
+                         help="directory for the converted files, by default next to the inputs")
+    convert.add_argument("-j", "--workers", type=int, default=None,
+                         help="worker processes, by default one per CPU")
+    convert.add_argument("-s", "--setting", action="append", default=[], metavar="KEY=VALUE",
+                         help="reader/writer setting, for example -s max_stitch=121")
+    convert.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        return convert_command(args)
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Block views over the stitches of an EmbPattern.
+
+The color blocks, command blocks and stitch blocks of a pattern are found in
+one pass over the stitches and kept as (start, end) offsets in an
+EmbBlockIndex. The blocks are then handed out as EmbBlock views over the
+pattern's own storage, list or EmbStitchArray, so walking them copies nothing.
+
+A view reads through to the stitches, it should not be kept across edits of
+the pattern.
+"""
+
+from typing import Any, Iterator, List, Tuple
+
+from .EmbConstant import (
+    COLOR_BREAK,
+    COLOR_CHANGE,
+    COMMAND_MASK,
+    NEEDLE_SET,
+    NO_COMMAND,
+    STITCH,
+)
+
+
+class EmbBlock:
+    """Read-only view of stitches[start:end]."""
+
+    __slots__ = ("stitches", "start", "end")
+
+    def __init__(self, stitches: Any, start: int, end: int) -> None:
+        self.stitches = stitches
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.end - self.start)
+            if step == 1:
+                return EmbBlock(self.stitches, self.start + start, self.start + max(start, stop))
+            return [self.stitches[self.start + i] for i in range(start, stop, step)]
+        length = self.end - self.start
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError("block index out of range")
+        return self.stitches[self.start + item]
+
+    def __iter__(self) -> Iterator[Any]:
+        stitches = self.stitches
+        for i in range(self.start, self.end):
+            yield stitches[i]
+
+    def __reversed__(self) -> Iterator[Any]:
+        stitches = self.stitches
+        for i in range(self.end - 1, self.start - 1, -1):
+            yield stitches[i]
+
+    def __eq__(self, other: Any) -> bool:
+        try:
+            if len(other) != len(self):
+                return False
+        except TypeError:
+            return False
+        for row, other_row in zip(self, other):
+            if list(row) != list(other_row):
+                return False
+        return True
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return "EmbBlock(%r)" % self.tolist()
+
+    def tolist(self) -> list:
+        return [list(stitch) for stitch in self]
+
+
+class EmbBlockIndex:
+    """Offsets of the color, command and stitch blocks of a stitch sequence.
+
+    colorblocks and stitchblocks hold (start, end, thread_index), command_blocks
+    hold (start, end) and color_changes the positions of the COLOR_CHANGE
+    commands."""
+
+    def __init__(self, stitches: Any) -> None:
+        self.colorblocks: List[Tuple[int, int, int]] = []
+        self.command_blocks: List[Tuple[int, int]] = []
+        self.stitchblocks: List[Tuple[int, int, int]] = []
+        self.color_changes: List[int] = []
+        if hasattr(stitches, "command_bytes"):
+            commands: Any = stitches.command_bytes()
+        else:
+            commands = [stitch[2] & COMMAND_MASK for stitch in stitches]
+        self._index(commands)
+
+    def _index(self, commands: Any) -> None:
+        colorblocks = self.colorblocks
+        command_blocks = self.command_blocks
+        stitchblocks = self.stitchblocks
+        color_index = 0
+        colorblock_start = 0
+        last_command = NO_COMMAND
+        command_start = 0
+        stitch_index = 0
+        stitch_start = -1
+        pos = -1
+        for pos, command in enumerate(commands):
+            # Command blocks are runs of the same command.
+            if command != last_command and last_command != NO_COMMAND:
+                command_blocks.append((command_start, pos))
+                command_start = pos
+            last_command = command
+
+            # Stitch blocks are runs of STITCH, threads change at COLOR_CHANGE.
+            if command == STITCH:
+                if stitch_start == -1:
+                    stitch_start = pos
+                continue
+            if stitch_start != -1:
+                stitchblocks.append((stitch_start, pos, stitch_index))
+                stitch_start = -1
+
+            # Color blocks, see EmbPattern.get_as_colorblocks().
+            if command == COLOR_BREAK:
+                if colorblock_start != pos:
+                    colorblocks.append((colorblock_start, pos, color_index))
+                    color_index += 1
+                colorblock_start = pos + 1
+            elif command == COLOR_CHANGE:
+                stitch_index += 1
+                self.color_changes.append(pos)
+                colorblocks.append((colorblock_start, pos + 1, color_index))
+                color_index += 1
+                colorblock_start = pos + 1
+            elif command == NEEDLE_SET and colorblock_start != pos:
+                colorblocks.append((colorblock_start, pos, color_index))
+                color_index += 1
+                colorblock_start = pos
+        end = pos + 1
+        command_blocks.append((command_start, end))
+        if stitch_start != -1:
+            stitchblocks.append((stitch_start, end, stitch_index))
+        if colorblock_start != end:
+            colorblocks.append((colorblock_start, end, color_index))
@@ -0,0 +1,146 @@
+"""Content digests of patterns.
+
+The digest covers the packed stitch columns, the threads and the metadata.
+It is stable between runs and between list and compact storage, and patterns
+comparing equal get equal digests, so differing digests prove two patterns
+differ.
+
+StitchDigest keeps running hashes of the x, y and command columns. Stitches
+appended since the last update are the only ones hashed again, EmbPattern
+keeps one for compact stitches until their version changes.
+"""
+
+import hashlib
+from array import array
+from typing import Any, Dict, List
+
+from ..utils.EmbNumpy import numpy
+
+
+DIGEST_SIZE = 16
+
+
+def _blake2b() -> Any:
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+class StitchDigest:
+    """Running digest of a stitch sequence, list or EmbStitchArray."""
+
+    __slots__ = ("count", "_x", "_y", "_command")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._x = _blake2b()
+        self._y = _blake2b()
+        self._command = _blake2b()
+
+    def update(self, stitches: Any) -> None:
+        """Hashes the stitches past count, those before are taken as unchanged."""
+        start = self.count
+        end = len(stitches)
+        if end <= start:
+            return
+        # Adding 0.0 turns -0.0 into 0.0, which compares equal.
+        if hasattr(stitches, "command_bytes"):
+            np = numpy()
+            if np is not None:
+                xs = (np.frombuffer(stitches.x, dtype=np.float64)[start:end] + 0.0).tobytes()
+                ys = (np.frombuffer(stitches.y, dtype=np.float64)[start:end] + 0.0).tobytes()
+            else:
+                xs = array("d", [x + 0.0 for x in stitches.x[start:end]]).tobytes()
+                ys = array("d", [y + 0.0 for y in stitches.y[start:end]]).tobytes()
+            commands = stitches.command[start:end].tobytes()
+        else:
+            rows = stitches[start:end] if start else stitches
+            xs = array("d", [stitch[0] + 0.0 for stitch in rows]).tobytes()
+            ys = array("d", [stitch[1] + 0.0 for stitch in rows]).tobytes()
+            commands = array("q", [stitch[2] for stitch in rows]).tobytes()
+        self._x.update(xs)
+        self._y.update(ys)
+        self._command.update(commands)
+        self.count = end
+
+    def digest(self) -> bytes:
+        combined = _blake2b()
+        combined.update(self.count.to_bytes(8, "little"))
+        combined.update(self._x.digest())
+        combined.update(self._y.digest())
+        combined.update(self._command.digest())
+        return combined.digest()
+
+
+def stitch_digest(stitches: Any) -> bytes:
+    """Digest of a stitch sequence, list or EmbStitchArray."""
+    digest = StitchDigest()
+    digest.update(stitches)
+    return digest.digest()
+
+
+def _encode(value: Any) -> bytes:
+    """Encodes a metadata value, values comparing equal encode equally."""
+    if value is None:
+        return b"n"
+    if isinstance(value, (bool, int, float)):
+        # Integral floats encode as the int they equal.
+        if isinstance(value, float) and not value.is_integer():
+            return b"f" + value.hex().encode("ascii")
+        return b"i" + str(int(value)).encode("ascii")
+    if isinstance(value, str):
+        return b"s" + _sized(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return b"b" + _sized(bytes(value))
+    if isinstance(value, list):
+        return b"l" + _sequence([_encode(item) for item in value])
+    if isinstance(value, tuple):
+        return b"t" + _sequence([_encode(item) for item in value])
+    if isinstance(value, dict):
+        return b"d" + _sequence(sorted(_sized(_encode(key)) + _encode(item) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return b"S" + _sequence(sorted(_encode(item) for item in value))
+    # Other objects are only known to be present.
+    return b"?"
+
+
+def _sized(data: bytes) -> bytes:
+    return len(data).to_bytes(8, "little") + data
+
+
+def _sequence(items: List[bytes]) -> bytes:
+    return len(items).to_bytes(8, "little") + b"".join(_sized(item) for item in items)
+
+
+def thread_digest(threadlist: List[Any]) -> bytes:
+    """Digest of the thread colors and descriptions, the fields EmbThread compares."""
+    digest = _blake2b()
+    digest.update(len(threadlist).to_bytes(8, "little"))
+    # The fields are strings or None, their reprs are exact. JEF lists
+    # stops as None threads.
+    digest.update("\n".join([
+        "None" if thread is None else repr((
+            thread.color & 0xFFFFFF,
+            thread.description,
+            thread.catalog_number,
+            thread.details,
+            thread.brand,
+            thread.chart,
+            thread.weight,
+        ))
+        for thread in threadlist
+    ]).encode("utf-8"))
+    return digest.digest()
+
+
+def extras_digest(extras: Dict[str, Any]) -> bytes:
+    digest = _blake2b()
+    digest.update(_encode(extras))
+    return digest.digest()
+
+
+def pattern_digest(stitches: bytes, threads: bytes, extras: bytes) -> str:
+    """Combines the part digests into the hex digest of a pattern."""
+    digest = _blake2b()
+    digest.update(stitches)
+    digest.update(threads)
+    digest.update(extras)
+    return digest.hexdigest()
@@ -0,0 +1,68 @@
+"""Summary of an embroidery file without its stitches.
+
+EmbInfo holds what a catalog needs from a file: the metadata, thread list,
+stitch and color counts and the extents. Readers that keep these values in
+the file header fill one in through a peek() function and never decode the
+stitch section. Other formats are read, then summarised in a single pass over
+the stitches, see EmbPattern.peek_embroidery() and get_stats().
+
+Header values are the ones the file declares. They are None when the header
+does not carry them.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..threads.EmbThread import EmbThread
+
+
+class EmbInfo:
+    def __init__(self) -> None:
+        self.threadlist: List[Any] = []
+        self.extras: Dict[str, Any] = {}
+        self.stitch_count: Optional[int] = None
+        self.color_count: Optional[int] = None
+        # min_x, min_y, max_x, max_y
+        self.extents: Optional[Tuple[float, float, float, float]] = None
+        # False when the stitches were decoded to build the summary.
+        self.header_only: bool = True
+
+    def __str__(self) -> str:
+        return "EmbInfo %s (stitches: %s, colors: %s, threads: %3d)" % (
+            self.name,
+            self.stitch_count,
+            self.color_count,
+            len(self.threadlist),
+        )
+
+    @property
+    def name(self) -> Optional[str]:
+        # PEC labels are stored as "Name".
+        return self.extras.get("name", self.extras.get("Name"))
+
+    def add_thread(self, thread: Any) -> None:
+        if isinstance(thread, EmbThread):
+            self.threadlist.append(thread)
+        else:
+            thread_object = EmbThread()
+            thread_object.set(thread)  # type: ignore[misc]
+            self.threadlist.append(thread_object)
+
+    def metadata(self, name: str, data: Any) -> None:
+        self.extras[name] = data
+
+    def get_metadata(self, name: str, default: Any = None) -> Any:
+        return self.extras.get(name, default)
+
+    @classmethod
+    def from_pattern(cls, pattern: Any) -> "EmbInfo":
+        """Summarises a decoded pattern in one pass over its stitches."""
+        info = cls()
+        info.header_only = False
+        info.threadlist = list(pattern.threadlist)
+        info.extras = dict(pattern.extras)
+        stats = pattern.get_stats()
+        info.stitch_count = stats.count_stitches()
+        info.color_count = stats.thread_count
+        if stats.count_stitches() != 0:
+            info.extents = stats.bounds()
+        return info
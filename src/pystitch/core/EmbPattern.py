@@ -1,9 +1,17 @@
+import io
 import os
 from typing import Any, Dict, List, Union, Tuple, cast
 
-from ..utils.EmbEncoder import Transcoder as Normalizer
+from ..utils.EmbEncoder import Transcoder as Normalizer, canonical_settings
 from ..utils.EmbFunctions import encode_thread_change, decode_embroidery_command
+from ..utils.ReadHelper import ReadBuffer
 from ..threads.EmbThread import EmbThread
+from .EmbBlocks import EmbBlock, EmbBlockIndex
+from .EmbDigest import StitchDigest, extras_digest, pattern_digest, stitch_digest, thread_digest
+from .EmbInfo import EmbInfo
+from .EmbSerialize import pack_pattern, unpack_pattern
+from .EmbStats import PatternStats
+from .EmbStitchArray import EmbStitchArray
 from .EmbConstant import (
     COMMAND_MASK, NO_COMMAND, STITCH, JUMP, TRIM, STOP, END,
     COLOR_CHANGE, NEEDLE_SET, SEQUIN_MODE, SEQUIN_EJECT,
@@ -11,17 +19,36 @@ from .EmbConstant import (
     MATRIX_TRANSLATE, MATRIX_SCALE, MATRIX_ROTATE, FRAME_EJECT
 )
 
+# (setting, writer module constant) defaults used when normalizing for a writer.
+WRITER_SETTINGS = (
+    ("max_jump", "MAX_JUMP_DISTANCE"),
+    ("max_stitch", "MAX_STITCH_DISTANCE"),
+    ("full_jump", "FULL_JUMP"),
+    ("round", "ROUND"),
+    ("writes_speeds", "WRITES_SPEEDS"),
+    ("sequin_contingency", "SEQUIN_CONTINGENCY"),
+    ("thread_change_command", "THREAD_CHANGE_COMMAND"),
+    ("explicit_trim", "EXPLICIT_TRIM"),
+    ("translate", "TRANSLATE"),
+    ("scale", "SCALE"),
+    ("rotate", "ROTATE"),
+)
+
 
 class EmbPattern:
+    # Opt-in NormalizationCache used by get_normalized_pattern(), None disables.
+    normalization_cache: Any = None
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
-        # Note: kwargs parameter is part of the interface but not currently used
-        _ = kwargs  # Acknowledge parameter to avoid unused argument warning
-        self.stitches: List[Any] = []
+        # compact=True stores stitches in columnar arrays, see EmbStitchArray.
+        self.stitches: Any = EmbStitchArray() if kwargs.get("compact", False) else []
         self.threadlist: List[Any] = []
         self.extras: Dict[str, Any] = {}
         # filename, name, category, author, keywords, comments, are typical
         self._previousX: float = 0.0
         self._previousY: float = 0.0
+        # Derived data, see _cached().
+        self._cache: Dict[str, Any] = {}
         len_args = len(args)
         if len_args >= 1:
             arg0 = args[0]
@@ -35,12 +62,29 @@ class EmbPattern:
             else:
                 raise TypeError("expected first argument to be an EmbPattern")
 
+    def __getattr__(self, name: str) -> Any:
+        # Only called for missing attributes. The stitches of a lazily read
+        # pattern are missing until first used, see read_embroidery().
+        if name == "stitches":
+            deferred = self.__dict__.pop("_deferred", None)
+            if deferred is not None:
+                self.stitches, decode = deferred
+                decode()
+                return self.stitches
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
     def __ne__(self, other: Any) -> bool:
         return not self.__eq__(other)
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, EmbPattern):
             return False
+        if len(self.stitches) != len(other.stitches):
+            return False
+        # Equal patterns have equal digests. Compact storage keeps its stitch
+        # digest up to date, list storage would have to hash every row.
+        if self.compact and other.compact and self.digest() != other.digest():
+            return False
         if self.stitches != other.stitches:
             return False
         if self.threadlist != other.threadlist:
@@ -74,6 +118,7 @@ class EmbPattern:
             self.extras[key] = value
         else:
             self.stitches[key] = value
+            self.invalidate()
 
     def __copy__(self):
         return self.copy()
@@ -81,6 +126,20 @@ class EmbPattern:
     def __deepcopy__(self, memo: Any) -> 'EmbPattern':
         return self.copy()
 
+    def __reduce__(self) -> Any:
+        # Pickles as the packed payload of to_bytes(), the cache is not kept.
+        return type(self).from_bytes, (self.to_bytes(),)
+
+    def to_bytes(self) -> bytes:
+        """Packs the pattern into a compact binary payload, see EmbSerialize.
+        A lazily read pattern is decoded first."""
+        return pack_pattern(self)
+
+    @classmethod
+    def from_bytes(cls, data: Any) -> 'EmbPattern':
+        """Restores a pattern packed by to_bytes()."""
+        return unpack_pattern(data, cls())
+
     def __iadd__(self, other: Any) -> 'EmbPattern':
         if isinstance(other, EmbPattern):
             self.add_pattern(other)
@@ -138,6 +197,79 @@ class EmbPattern:
         p.add_pattern(self)
         return p
 
+    @property
+    def deferred(self) -> bool:
+        """True while the stitches of a lazily read pattern are not decoded yet."""
+        return "stitches" not in self.__dict__ and "_deferred" in self.__dict__
+
+    def _defer_stitches(self, decode: Any) -> None:
+        """Leaves the stitches to decode(), run on first use of pattern.stitches."""
+        self._deferred = (self.__dict__.pop("stitches"), decode)
+
+    @property
+    def compact(self) -> bool:
+        """True if the stitches are held in columnar EmbStitchArray storage."""
+        return isinstance(self.stitches, EmbStitchArray)
+
+    def _rows(self) -> Any:
+        """Iterates the stitches for reading, compact storage gives (x, y, command)
+        tuples rather than row views."""
+        if isinstance(self.stitches, EmbStitchArray):
+            return self.stitches.records()
+        return self.stitches
+
+    def _stitch_version(self) -> Any:
+        """Changes whenever compact stitches are edited or replaced. None for
+        list storage, whose rows can be edited in place unnoticed."""
+        stitches = self.stitches
+        if isinstance(stitches, EmbStitchArray):
+            return stitches.version, len(stitches)
+        return None
+
+    def _cached(self, name: str, build: Any) -> Any:
+        """Returns build(), kept while the compact stitches are unchanged.
+        For list storage build() runs on every call."""
+        key = self._stitch_version()
+        if key is None:
+            return build()
+        entry = self._cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._cache[name] = entry
+        return entry[1]
+
+    def _stitch_digest(self) -> bytes:
+        """Digest of the stitches. For compact storage the digest is kept and
+        updated with the stitches appended since the last call, list storage
+        is hashed on every call."""
+        stitches = self.stitches
+        if not isinstance(stitches, EmbStitchArray):
+            return stitch_digest(stitches)
+        entry = self._cache.get("digest")
+        if entry is None or entry[0] != stitches.version:
+            entry = (stitches.version, StitchDigest())
+            self._cache["digest"] = entry
+        entry[1].update(stitches)
+        return entry[1].digest()
+
+    def digest(self) -> str:
+        """Stable hex digest of the stitches, threads and metadata.
+        Equal patterns have equal digests, whether stored compact or not."""
+        return pattern_digest(
+            self._stitch_digest(),
+            thread_digest(self.threadlist),
+            extras_digest(self.extras),
+        )
+
+    def invalidate(self) -> None:
+        """Drops the cached block index and statistics, called by the methods
+        that edit the pattern. Needed after writing to the columns of compact
+        stitches directly."""
+        self._cache.clear()
+        stitches = self.__dict__.get("stitches")
+        if isinstance(stitches, EmbStitchArray):
+            stitches._touch()
+
     def copy(self) -> 'EmbPattern':
         emb_pattern = EmbPattern()
         emb_pattern.stitches = self.stitches[:]
@@ -148,11 +280,12 @@ class EmbPattern:
         return emb_pattern
 
     def clear(self) -> None:
-        self.stitches = []
+        self.stitches = EmbStitchArray() if self.compact else []
         self.threadlist = []
         self.extras = {}
         self._previousX = 0
         self._previousY = 0
+        self.invalidate()
 
     def move(self, dx: float = 0, dy: float = 0, position: Any = None) -> None:
         """Move dx, dy"""
@@ -250,9 +383,17 @@ class EmbPattern:
     def get_metadata(self, name: str, default: Any = None) -> Any:
         return self.extras.get(name, default)
 
+    def get_stats(self) -> PatternStats:
+        """Bounds, command counts, color block extents and lengths of the
+        stitches, computed in one pass. Compact patterns keep them until
+        they are modified."""
+        return self._cached("stats", lambda: PatternStats(self.stitches))
+
     def bounds(self) -> tuple[float, float, float, float]:
         """Returns the bounds of the stitch data:
         min_x, min_y, max_x, max_y"""
+        if self._stitch_version() is not None:
+            return self.get_stats().bounds()
         min_x = float("inf")
         min_y = float("inf")
         max_x = -float("inf")
@@ -273,6 +414,8 @@ class EmbPattern:
     extents = bounds
 
     def count_stitch_commands(self, command: int) -> int:
+        if self._stitch_version() is not None:
+            return self.get_stats().count_stitch_commands(command)
         count = 0
         for stitch in self.stitches:
             flags = stitch[2] & COMMAND_MASK
@@ -314,36 +457,28 @@ class EmbPattern:
             if flags == command:
                 yield stitch
 
+    def get_block_index(self) -> EmbBlockIndex:
+        """Offsets of the color, command and stitch blocks, computed once until
+        the pattern is modified."""
+        return self._cached("blocks", lambda: EmbBlockIndex(self.stitches))
+
     def get_as_stitchblock(self) -> Any:
-        stitchblock: List[Any] = []
+        """Returns a generator of (block, thread) for the runs of STITCH commands.
+        The blocks are EmbBlock views over the stitches."""
+        stitches = self.stitches
+        thread_index = 0
         thread = self.get_thread_or_filler(0)
-        thread_index = 1
-        for stitch in self.stitches:
-            flags = stitch[2] & COMMAND_MASK
-            if flags == STITCH:
-                stitchblock.append(stitch)
-            else:
-                if len(stitchblock) > 0:
-                    yield (stitchblock, thread)
-                    stitchblock = []
-                if flags == COLOR_CHANGE:
-                    thread = self.get_thread_or_filler(thread_index)
-                    thread_index += 1
-        if len(stitchblock) > 0:
-            yield (stitchblock, thread)
+        for start, end, index in self.get_block_index().stitchblocks:
+            if index != thread_index:
+                thread_index = index
+                thread = self.get_thread_or_filler(index)
+            yield (EmbBlock(stitches, start, end), thread)
 
     def get_as_command_blocks(self) -> Any:
-        last_pos = 0
-        last_command = NO_COMMAND
-        for pos, stitch in enumerate(self.stitches):
-            command = stitch[2] & COMMAND_MASK
-            if command == last_command or last_command == NO_COMMAND:
-                last_command = command
-                continue
-            last_command = command
-            yield self.stitches[last_pos:pos]
-            last_pos = pos
-        yield self.stitches[last_pos:]
+        """Returns a generator of EmbBlock views over the runs of the same command."""
+        stitches = self.stitches
+        for start, end in self.get_block_index().command_blocks:
+            yield EmbBlock(stitches, start, end)
 
     def get_as_colorblocks(self) -> Any:
         """
@@ -351,35 +486,12 @@ class EmbPattern:
         the command omitted whereas color blocks delimited with color_change will end with the
         color_change command, and if delimited with needle_set, the blocks will begin the new
         color block with the needle_set.
-        """
-        thread_index = 0
-        colorblock_start = 0
 
-        for pos, stitch in enumerate(self.stitches):
-            command = stitch[2] & COMMAND_MASK
-            if command == COLOR_BREAK:
-                if colorblock_start != pos:
-                    thread = self.get_thread_or_filler(thread_index)
-                    thread_index += 1
-                    yield self.stitches[colorblock_start:pos], thread
-                colorblock_start = pos + 1
-                continue
-            if command == COLOR_CHANGE:
-                thread = self.get_thread_or_filler(thread_index)
-                thread_index += 1
-                yield self.stitches[colorblock_start : pos + 1], thread
-                colorblock_start = pos + 1
-                continue
-            if command == NEEDLE_SET and colorblock_start != pos:
-                thread = self.get_thread_or_filler(thread_index)
-                thread_index += 1
-                yield self.stitches[colorblock_start:pos], thread
-                colorblock_start = pos
-                continue
-
-        if colorblock_start != len(self.stitches):
-            thread = self.get_thread_or_filler(thread_index)
-            yield self.stitches[colorblock_start:], thread
+        The blocks are EmbBlock views over the stitches.
+        """
+        stitches = self.stitches
+        for start, end, thread_index in self.get_block_index().colorblocks:
+            yield EmbBlock(stitches, start, end), self.get_thread_or_filler(thread_index)
 
     def get_as_stitches(self) -> Any:
         """pos, x, y, command, v1, v2, v3"""
@@ -410,26 +522,37 @@ class EmbPattern:
         self.translate(-cx, -cy)
 
     def translate(self, dx: float, dy: float) -> None:
-        for stitch in self.stitches:
-            stitch[0] += dx
-            stitch[1] += dy
+        if isinstance(self.stitches, EmbStitchArray):
+            self.stitches.translate(dx, dy)
+        else:
+            for stitch in self.stitches:
+                stitch[0] += dx
+                stitch[1] += dy
+        self.invalidate()
 
     def transform(self, matrix: Any) -> None:
-        for stitch in self.stitches:
-            matrix.apply(stitch)
+        if isinstance(self.stitches, EmbStitchArray):
+            self.stitches.transform(matrix)
+        else:
+            for stitch in self.stitches:
+                matrix.apply(stitch)
+        self.invalidate()
 
     def fix_color_count(self) -> None:
         """Ensure that there are threads for all color blocks."""
-        thread_index = 0
-        init_color = True
-        for stitch in self.stitches:
-            data = stitch[2] & COMMAND_MASK
-            if data == STITCH or data == SEW_TO or data == NEEDLE_AT:
-                if init_color:
-                    thread_index += 1
-                    init_color = False
-            elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
-                init_color = True
+        if self._stitch_version() is not None:
+            thread_index = self.get_stats().thread_count
+        else:
+            thread_index = 0
+            init_color = True
+            for stitch in self.stitches:
+                data = stitch[2] & COMMAND_MASK
+                if data == STITCH or data == SEW_TO or data == NEEDLE_AT:
+                    if init_color:
+                        thread_index += 1
+                        init_color = False
+                elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
+                    init_color = True
         while len(self.threadlist) < thread_index:
             self.add_thread(self.get_thread_or_filler(len(self.threadlist)))
 
@@ -583,33 +706,40 @@ class EmbPattern:
             elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
                 self.stitches[i][2] = NO_COMMAND
         self.extras.update(pattern.extras)
+        self.invalidate()
 
     def interpolate_duplicate_color_as_stop(self) -> None:
         """Processes a pattern replacing any duplicate colors in the threadlist as a stop."""
-        thread_index = 0
+        threadlist = self.threadlist
+        thread_index = 0  # Index within the threadlist with the duplicates removed.
+        previous = None  # Source index of the thread at thread_index - 1.
+        removed = set()
         init_color = True
         last_change = None
-        for position, stitch in enumerate(self.stitches):
+        for position, stitch in enumerate(self._rows()):
             data = stitch[2] & COMMAND_MASK
             if data == STITCH or data == SEW_TO or data == NEEDLE_AT:
                 if init_color:
-                    try:
-                        if (
-                            last_change is not None
-                            and thread_index != 0
-                            and self.threadlist[thread_index - 1]
-                            == self.threadlist[thread_index]
-                        ):
-                            del self.threadlist[thread_index]
+                    if last_change is not None and thread_index != 0:
+                        current = thread_index + len(removed)
+                        if previous >= len(threadlist) or current >= len(threadlist):
+                            break  # Non-existent threads cannot double
+                        if threadlist[previous] == threadlist[current]:
+                            removed.add(current)
                             self.stitches[last_change][2] = STOP
                         else:
+                            previous = current
                             thread_index += 1
-                    except IndexError:  # Non-existent threads cannot double
-                        return
+                    else:
+                        previous = thread_index + len(removed)
+                        thread_index += 1
                     init_color = False
             elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
                 init_color = True
                 last_change = position
+        if removed:
+            threadlist[:] = [thread for i, thread in enumerate(threadlist) if i not in removed]
+        self.invalidate()
 
     def interpolate_stop_as_duplicate_color(self, thread_change_command: int = COLOR_CHANGE) -> None:
         """Processes a pattern replacing any stop as a duplicate color, and color_change
@@ -627,18 +757,17 @@ class EmbPattern:
                     self.stitches[position][2] = thread_change_command
                     thread_index += 1
                 except IndexError:  # There are no colors to duplicate
-                    return
+                    break
+        self.invalidate()
 
     def interpolate_frame_eject(self) -> None:
         """Processes a pattern replacing jump-stop-jump/jump-stop-end sequences with FRAME_EJECT."""
+        stitches = []
         mode = 0
         stop_x = None
         stop_y = None
         sequence_start_position = None
-        position = 0
-        ie = len(self.stitches)
-        while position < ie:
-            stitch = self.stitches[position]
+        for stitch in self._rows():
             data = stitch[2] & COMMAND_MASK
             if (
                 data == STITCH
@@ -649,35 +778,34 @@ class EmbPattern:
                 or data == NEEDLE_SET
             ):
                 if mode == 3 and sequence_start_position is not None:
-                    del self.stitches[sequence_start_position:position]
-                    position = sequence_start_position
-                    self.stitches.insert(position, [stop_x, stop_y, FRAME_EJECT])
-                    ie = len(self.stitches)
+                    del stitches[sequence_start_position:]
+                    stitches.append([stop_x, stop_y, FRAME_EJECT])
                 mode = 0
             elif data == JUMP:
                 if mode == 2:
                     mode = 3
                 if mode == 0:
-                    sequence_start_position = position
+                    sequence_start_position = len(stitches)
                     mode = 1
             elif data == STOP:
                 if mode == 1:
                     mode = 2
                     stop_x = stitch[0]
                     stop_y = stitch[1]
-            position += 1
+            stitches.append(stitch)
         if mode >= 2 and sequence_start_position is not None:  # Frame_eject at end.
-            del self.stitches[sequence_start_position:position]
-            position = sequence_start_position
-            self.stitches.insert(position, [stop_x, stop_y, FRAME_EJECT])
+            del stitches[sequence_start_position:]
+            stitches.append([stop_x, stop_y, FRAME_EJECT])
+        self.stitches[:] = stitches
+        self.invalidate()
 
     def interpolate_trims(
         self, jumps_to_require_trim: Any = None, distance_to_require_trim: Any = None, clipping: bool = True
     ) -> None:
         """Processes a pattern adding trims according to the given criteria."""
-        i = -1
-        ie = len(self.stitches) - 1
-
+        # Built into a new list, trims are inserted before the jump run being
+        # read and clipped runs are dropped from the tail, never mid-list.
+        stitches = []
         x = 0
         y = 0
         jump_count = 0
@@ -686,13 +814,12 @@ class EmbPattern:
         jump_dy = 0
         jumping = False
         trimmed = True
-        while i < ie:
-            i += 1
-            stitch = self.stitches[i]
+        for stitch in self._rows():
             dx = stitch[0] - x
             dy = stitch[1] - y
             x = stitch[0]
             y = stitch[1]
+            stitches.append(stitch)
             command = stitch[2] & COMMAND_MASK
             if command == STITCH or command == SEQUIN_EJECT:
                 trimmed = False
@@ -705,7 +832,7 @@ class EmbPattern:
                     jump_dx = 0
                     jump_dy = 0
                     jump_count = 0
-                    jump_start = i
+                    jump_start = len(stitches) - 1
                     jumping = True
                 jump_count += 1
                 jump_dx += dx
@@ -719,17 +846,20 @@ class EmbPattern:
                             or abs(jump_dx) > distance_to_require_trim
                         )
                     ):
-                        self.trim(position=jump_start)
+                        # Same as self.trim(position=jump_start), in place at the previous stitch.
+                        if jump_start == 0:
+                            stitches.insert(0, [0, 0, TRIM])
+                        else:
+                            previous = stitches[jump_start - 1]
+                            stitches.insert(jump_start, [previous[0], previous[1], TRIM])
                         jump_start += 1  # We inserted a position, start jump has moved.
-                        i += 1
-                        ie += 1
                         trimmed = True
                 if (
                     clipping and jump_dx == 0 and jump_dy == 0
                 ):  # jump displacement is 0, clip trim command.
-                    del self.stitches[jump_start : i + 1]
-                    i = jump_start - 1
-                    ie = len(self.stitches) - 1
+                    del stitches[jump_start:]
+        self.stitches[:] = stitches
+        self.invalidate()
 
     def get_pattern_interpolate_trim(self, jumps_to_require_trim: Any) -> 'EmbPattern':
         """Gets a processed pattern with untrimmed jumps merged
@@ -798,12 +928,33 @@ class EmbPattern:
         return stable_pattern
 
     def get_normalized_pattern(self, encode_settings: Any = None) -> 'EmbPattern':
-        """Encodes pattern typically for saving."""
-        normal_pattern = EmbPattern()
+        """Encodes pattern typically for saving.
+        Repeated normalizations are served from EmbPattern.normalization_cache when one is set."""
+        cache = EmbPattern.normalization_cache
+        if cache is not None:
+            return cache.normalize(self, encode_settings)
+        return self._normalize(encode_settings)
+
+    def _normalize(self, encode_settings: Any = None) -> 'EmbPattern':
+        normal_pattern = EmbPattern(compact=self.compact)
         transcoder = Normalizer(encode_settings)
         transcoder.transcode(self, normal_pattern)
         return normal_pattern
 
+    @staticmethod
+    def _normalize_packed(data: bytes, encode_settings: Any = None) -> 'EmbPattern':
+        return EmbPattern.from_bytes(data)._normalize(encode_settings)
+
+    def get_normalized_stream(self, encode_settings: Any = None) -> Tuple['EmbPattern', Any]:
+        """Encodes pattern lazily, typically for saving.
+        Returns a pattern holding the metadata and threads, and a generator of the
+        normalized [x, y, cmd] records. The threads are complete once the
+        generator is exhausted."""
+        normal_pattern = EmbPattern()
+        transcoder = Normalizer(encode_settings)
+        stitches = transcoder.transcode_stream(self, normal_pattern)
+        return normal_pattern, stitches
+
     def append_translation(self, x: float, y: float) -> None:
         """Appends translation to the pattern.
         All commands will be translated by the given amount,
@@ -816,8 +967,13 @@ class EmbPattern:
         return os.path.splitext(filename)[1][1:]
 
     @staticmethod
-    def read_embroidery(reader: Any, f: Any, settings: Any = None, pattern: Any = None) -> Any:
-        """Reads fileobject or filename with reader."""
+    def read_embroidery(reader: Any, f: Any, settings: Any = None, pattern: Any = None, lazy: bool = False) -> Any:
+        """Reads fileobject or filename with reader.
+
+        With lazy, readers with a read_deferred() function only read the
+        header, threads and metadata. The file data is kept and the stitches
+        are decoded from it on first use of pattern.stitches, which any method
+        using the stitches does. Other readers read the whole file."""
         if reader is None:
             return None
         if pattern is None:
@@ -838,16 +994,87 @@ class EmbPattern:
                     pass
             else:
                 with open(f, "rb") as stream:
-                    reader.read(stream, pattern, settings)
+                    buffer = EmbPattern._read_buffer(stream, settings)
+                    EmbPattern._read_from(reader, buffer, pattern, settings, lazy)
         else:
-            reader.read(f, pattern, settings)
+            text_mode = False
+            try:
+                text_mode = reader.READ_FILE_IN_TEXT_MODE
+            except AttributeError:
+                pass
+            if text_mode:
+                reader.read(f, pattern, settings)
+            else:
+                # Readers decode from memory, the stream is left where the reader stopped.
+                buffer = EmbPattern._read_buffer(f, settings)
+                owned = buffer is not f
+                if not owned and lazy:
+                    # Deferred stitches are decoded with a cursor of their own.
+                    buffer = ReadBuffer(f.data, f.position)
+                EmbPattern._read_from(reader, buffer, pattern, settings, lazy, f, owned)
         return pattern
 
-
     @staticmethod
-    def write_embroidery(writer: Any, pattern: Any, stream: Any, settings: Any = None) -> None:
-        if pattern is None:
+    def _read_from(reader: Any, buffer: ReadBuffer, pattern: Any, settings: Any, lazy: bool,
+                   stream: Any = None, owned: bool = True) -> None:
+        """Reads from the buffer, closed once the stitches are decoded if owned."""
+        decode = None
+        try:
+            read_deferred = getattr(reader, "read_deferred", None) if lazy else None
+            if read_deferred is not None:
+                decode = read_deferred(buffer, pattern, settings)
+            else:
+                reader.read(buffer, pattern, settings)
+            if stream is not None:
+                buffer.sync(stream)
+        finally:
+            if decode is None and owned:
+                buffer.close()
+        if decode is None:
             return
+
+        def decode_stitches() -> None:
+            try:
+                decode()
+            finally:
+                if owned:
+                    buffer.close()
+
+        pattern._defer_stitches(decode_stitches)
+
+    @staticmethod
+    def _read_buffer(stream: Any, settings: Any = None) -> ReadBuffer:
+        """Wraps a binary stream for reading. With the "mmap" setting, regular
+        files are memory-mapped rather than read into memory."""
+        if settings is not None and settings.get("mmap", False):
+            return ReadBuffer.from_mmap(stream)
+        return ReadBuffer.from_stream(stream)
+
+    @staticmethod
+    def peek_embroidery(reader: Any, f: Any, settings: Any = None) -> Any:
+        """Reads the EmbInfo summary of fileobject or filename with reader.
+        Readers with a peek() function only read the file header, the stream
+        is left where the header ends. Other readers read the whole file."""
+        if reader is None:
+            return None
+        try:
+            peek = reader.peek
+        except AttributeError:
+            return EmbInfo.from_pattern(EmbPattern.read_embroidery(reader, f, settings))
+        info = EmbInfo()
+        if isinstance(f, str):
+            with open(f, "rb") as stream:
+                peek(stream, info, settings)
+        else:
+            peek(f, info, settings)
+        return info
+
+
+    @staticmethod
+    def get_writer_settings(writer: Any, settings: Any = None) -> Tuple[bool, Dict[str, Any]]:
+        """Gives whether patterns are normalized for the writer, and a copy of the
+        settings. When normalizing, settings not given are taken from the writer's
+        constants, see WRITER_SETTINGS."""
         if settings is None:
             settings = {}
         else:
@@ -856,76 +1083,122 @@ class EmbPattern:
             encode = writer.ENCODE
         except AttributeError:
             encode = True
+        encode = settings.get("encode", encode)
+        if encode:
+            for key, constant in WRITER_SETTINGS:
+                if not (key in settings):
+                    try:
+                        settings[key] = getattr(writer, constant)
+                    except AttributeError:
+                        pass
+        return encode, settings
 
-        if settings.get("encode", encode):
-            if not ("max_jump" in settings):
-                try:
-                    settings["max_jump"] = writer.MAX_JUMP_DISTANCE
-                except AttributeError:
-                    pass
-            if not ("max_stitch" in settings):
-                try:
-                    settings["max_stitch"] = writer.MAX_STITCH_DISTANCE
-                except AttributeError:
-                    pass
-            if not ("full_jump" in settings):
-                try:
-                    settings["full_jump"] = writer.FULL_JUMP
-                except AttributeError:
-                    pass
-            if not ("round" in settings):
-                try:
-                    settings["round"] = writer.ROUND
-                except AttributeError:
-                    pass
-            if not ("writes_speeds" in settings):
-                try:
-                    settings["writes_speeds"] = writer.WRITES_SPEEDS
-                except AttributeError:
-                    pass
-            if not ("sequin_contingency" in settings):
-                try:
-                    settings["sequin_contingency"] = writer.SEQUIN_CONTINGENCY
-                except AttributeError:
-                    pass
-            if not ("thread_change_command" in settings):
-                try:
-                    settings["thread_change_command"] = writer.THREAD_CHANGE_COMMAND
-                except AttributeError:
-                    pass
-            if not ("explicit_trim" in settings):
-                try:
-                    settings["explicit_trim"] = writer.EXPLICIT_TRIM
-                except AttributeError:
-                    pass
-            if not ("translate" in settings):
-                try:
-                    settings["translate"] = writer.TRANSLATE
-                except AttributeError:
-                    pass
-            if not ("scale" in settings):
-                try:
-                    settings["scale"] = writer.SCALE
-                except AttributeError:
-                    pass
-            if not ("rotate" in settings):
-                try:
-                    settings["rotate"] = writer.ROTATE
-                except AttributeError:
-                    pass
-            pattern = pattern.get_normalized_pattern(settings)
+    @staticmethod
+    def write_embroidery(writer: Any, pattern: Any, stream: Any, settings: Any = None) -> None:
+        if pattern is None:
+            return
+        encode, settings = EmbPattern.get_writer_settings(writer, settings)
+
+        stitches = None
+        if encode:
+            stream_writer = settings.get("stream", True) and hasattr(writer, "write_stream")
+            if stream_writer:
+                # Forward pass writers consume the records without an intermediate pattern.
+                pattern, stitches = pattern.get_normalized_stream(settings)
+            else:
+                pattern = pattern.get_normalized_pattern(settings)
+        EmbPattern._write_file(writer, pattern, stitches, stream, settings)
 
+    @staticmethod
+    def write_embroidery_all(targets: Any, pattern: Any, settings: Any = None, workers: Any = None) -> None:
+        """Writes the pattern for each (writer, stream) or (writer, stream, settings)
+        target, the target settings update the shared settings.
+
+        Targets whose writers normalize with the same encoder settings, see
+        ENCODER_SETTINGS, are written from one normalized pattern. With workers
+        above 1 the normalizations run in parallel processes."""
+        if pattern is None:
+            return
+        groups: List[Any] = []  # [encoder settings or None, [(writer, stream, settings)]]
+        for target in targets:
+            target_settings = settings
+            if len(target) > 2 and target[2] is not None:
+                target_settings = dict(settings or {}, **target[2])
+            encode, target_settings = EmbPattern.get_writer_settings(target[0], target_settings)
+            key = None
+            if encode:
+                key = canonical_settings(target_settings)
+            member = (target[0], target[1], target_settings)
+            for group in groups:
+                if group[0] == key:
+                    group[1].append(member)
+                    break
+            else:
+                groups.append([key, [member]])
+
+        encoded = [group for group in groups if group[0] is not None]
+        group_settings = [group[1][0][2] for group in encoded]
+        if workers is not None and workers > 1 and len(encoded) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            cache = EmbPattern.normalization_cache
+            normalized = [None if cache is None else cache.lookup(pattern, group) for group in group_settings]
+            missing = [i for i, normal_pattern in enumerate(normalized) if normal_pattern is None]
+            if missing:
+                # Packed once, rather than pickled again for each worker task.
+                data = pattern.to_bytes()
+                with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+                    results = executor.map(
+                        EmbPattern._normalize_packed, [data] * len(missing), [group_settings[i] for i in missing]
+                    )
+                    for i, normal_pattern in zip(missing, results):
+                        if cache is not None:
+                            cache.store(pattern, group_settings[i], normal_pattern)
+                        normalized[i] = normal_pattern
+        else:
+            normalized = [pattern.get_normalized_pattern(group) for group in group_settings]
+        for group, normal_pattern in zip(encoded, normalized):
+            group.append(normal_pattern)
+
+        for group in groups:
+            members = group[1]
+            for i, (writer, stream, target_settings) in enumerate(members):
+                if group[0] is None:
+                    target_pattern = pattern
+                elif i == len(members) - 1:
+                    target_pattern = group[2]
+                else:
+                    # Writers may fill in threads or rewrite commands, each gets its own copy.
+                    target_pattern = group[2].copy()
+                    if not target_pattern.compact:
+                        target_pattern.stitches = [list(stitch) for stitch in target_pattern.stitches]
+                EmbPattern._write_file(writer, target_pattern, None, stream, target_settings)
+
+    @staticmethod
+    def _write_file(writer: Any, pattern: Any, stitches: Any, stream: Any, settings: Any) -> None:
+        text_mode = False
+        try:
+            text_mode = writer.WRITE_FILE_IN_TEXT_MODE
+        except AttributeError:
+            pass
         if isinstance(stream, str):
-            text_mode = False
-            try:
-                text_mode = writer.WRITE_FILE_IN_TEXT_MODE
-            except AttributeError:
-                pass
             if text_mode:
                 with open(stream, "w", encoding='utf-8') as stream:
-                    writer.write(pattern, stream, settings)
+                    EmbPattern._write_to(writer, pattern, stitches, stream, settings)
             else:
                 with open(stream, "wb") as stream:
-                    writer.write(pattern, stream, settings)
+                    EmbPattern._write_to(writer, pattern, stitches, stream, settings)
+        elif text_mode and isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+            # Text written to a binary stream is encoded as the file would be.
+            text = io.StringIO()
+            EmbPattern._write_to(writer, pattern, stitches, text, settings)
+            stream.write(text.getvalue().encode("utf-8"))
         else:
+            EmbPattern._write_to(writer, pattern, stitches, stream, settings)
+
+    @staticmethod
+    def _write_to(writer: Any, pattern: Any, stitches: Any, stream: Any, settings: Any) -> None:
+        if stitches is None:
             writer.write(pattern, stream, settings)
+        else:
+            writer.write_stream(pattern, stitches, stream, settings)
@@ -0,0 +1,336 @@
+"""Compact binary serialization of patterns.
+
+pack_pattern() writes a pattern as a header followed by length prefixed
+sections: the x, y and command columns as packed arrays, the thread table
+and the pickled extras. Coordinates are stored as 32-bit integers when they
+all are, otherwise as doubles, and commands as unsigned 32-bit integers when
+they fit, which covers the thread change bits. unpack_pattern() restores a
+pattern equal to the one packed, with the same storage and value types.
+
+EmbPattern pickles through this payload, which is several times smaller and
+faster than pickling the list of stitch lists, so patterns are cheap to send
+between processes.
+
+Stitch lists mixing ints and floats keep a bitmask of the ints. Stitch lists
+holding other number types and threads that are not plain EmbThread objects
+are pickled as they are.
+"""
+
+import pickle
+import struct
+import sys
+from array import array
+from typing import Any, List, Tuple
+
+from ..threads.EmbThread import EmbThread
+from ..utils.EmbNumpy import numpy
+from .EmbStitchArray import EmbStitchArray
+
+
+MAGIC = b"EMBP"
+VERSION = 1
+
+# magic, version, flags, x kind, y kind, command kind, thread count,
+# previous x, previous y.
+HEADER = struct.Struct("<4sBBBBBQdd")
+SECTION = struct.Struct("<Q")
+THREAD_COLOR = struct.Struct("<I")
+THREAD_TEXT = struct.Struct("<i")
+
+FLAG_COMPACT = 0x01
+FLAG_THREADS_PICKLED = 0x02
+FLAG_PREVIOUS_X_INT = 0x04
+FLAG_PREVIOUS_Y_INT = 0x08
+
+# Column kinds, the stored typecode and whether values restore as int.
+KIND_FLOAT = 0
+KIND_INTEGRAL = 1
+KIND_INT = 2
+KIND_INT64 = 3
+KIND_PICKLED = 0xFF
+# Set on the kind of doubles followed by a bitmask of the values that are ints.
+KIND_MIXED = 0x80
+COLUMN_KINDS = {
+    KIND_FLOAT: ("d", False),
+    KIND_INTEGRAL: ("i", False),
+    KIND_INT: ("i", True),
+    KIND_INT64: ("q", True),
+}
+
+COMMAND_UINT32 = 0
+COMMAND_INT64 = 1
+COMMAND_KINDS = {
+    COMMAND_UINT32: "I",
+    COMMAND_INT64: "q",
+}
+
+THREAD_FIELDS = ("description", "catalog_number", "details", "brand", "chart", "weight")
+_THREAD_ATTRIBUTES = frozenset(("color",) + THREAD_FIELDS)
+
+_INT32_MAX = 0x7FFFFFFF
+# Ints up to this size are exact as doubles.
+_EXACT_MAX = 1 << 53
+_SWAP = sys.byteorder != "little"
+
+
+def _le_bytes(column: Any) -> bytes:
+    if _SWAP:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le_bytes(typecode: str, data: Any) -> Any:
+    column = array(typecode)
+    column.frombytes(data)
+    if _SWAP:
+        column.byteswap()
+    return column
+
+
+def _pack_doubles(column: Any) -> Tuple[int, Any]:
+    """Packs an array('d') as int32 if that restores every value bit for bit,
+    otherwise as it is."""
+    np = numpy()
+    if np is not None:
+        values = np.frombuffer(column, dtype=np.float64)
+        if values.size and (np.abs(values) <= _INT32_MAX).all():
+            ints = values.astype(np.int32)
+            if ints.astype(np.float64).tobytes() == values.tobytes():
+                return KIND_INTEGRAL, array("i", ints.tobytes())
+        return KIND_FLOAT, column
+    try:
+        ints = array("i", map(int, column))
+    except (OverflowError, ValueError):
+        return KIND_FLOAT, column
+    if array("d", ints).tobytes() == column.tobytes():
+        return KIND_INTEGRAL, ints
+    return KIND_FLOAT, column
+
+
+def _pack_values(values: List[Any]) -> Any:
+    """Packs the values of a stitch list column as its kind, array and int
+    bitmask. None if they need pickling."""
+    types = set(map(type, values))
+    if not types or types == {float}:
+        return _pack_doubles(array("d", values)) + (b"",)
+    if types == {int}:
+        try:
+            return KIND_INT, array("i", values), b""
+        except OverflowError:
+            pass
+        try:
+            return KIND_INT64, array("q", values), b""
+        except OverflowError:
+            pass
+    elif types == {int, float}:
+        mask = bytearray((len(values) + 7) >> 3)
+        for i in [i for i, value in enumerate(values) if type(value) is int]:
+            if not -_EXACT_MAX <= values[i] <= _EXACT_MAX:
+                return None
+            mask[i >> 3] |= 1 << (i & 7)
+        kind, column = _pack_doubles(array("d", values))
+        return kind | KIND_MIXED, column, bytes(mask)
+    return None
+
+
+def _pack_commands(commands: Any) -> Any:
+    """Packs commands as uint32 when they fit, None if they need pickling."""
+    np = numpy()
+    if np is not None and isinstance(commands, array):
+        values = np.frombuffer(commands, dtype=np.int64)
+        if not values.size or (values.min() >= 0 and values.max() <= 0xFFFFFFFF):
+            return COMMAND_UINT32, array("I", values.astype(np.uint32).tobytes())
+        return COMMAND_INT64, commands
+    if not isinstance(commands, array) and set(map(type, commands)) - {int}:
+        return None
+    try:
+        return COMMAND_UINT32, array("I", commands)
+    except OverflowError:
+        pass
+    try:
+        return COMMAND_INT64, array("q", commands)
+    except OverflowError:
+        return None
+
+
+def _pack_threads(threadlist: List[Any]) -> Any:
+    """Thread table, a presence byte and the color and fields of each thread.
+    None if a thread is not a plain EmbThread."""
+    parts = []
+    for thread in threadlist:
+        if thread is None:
+            parts.append(b"\x00")
+            continue
+        if type(thread) is not EmbThread or not _THREAD_ATTRIBUTES.issuperset(thread.__dict__):
+            return None
+        color = thread.color
+        if not isinstance(color, int) or not 0 <= color <= 0xFFFFFFFF:
+            return None
+        parts.append(b"\x01")
+        parts.append(THREAD_COLOR.pack(color))
+        for name in THREAD_FIELDS:
+            value = getattr(thread, name, None)
+            if value is None:
+                parts.append(THREAD_TEXT.pack(-1))
+            elif type(value) is str:
+                text = value.encode("utf-8", "surrogatepass")
+                parts.append(THREAD_TEXT.pack(len(text)))
+                parts.append(text)
+            else:
+                return None
+    return b"".join(parts)
+
+
+def _unpack_threads(data: Any, count: int) -> List[Any]:
+    threadlist: List[Any] = []
+    position = 0
+    for _ in range(count):
+        present = data[position]
+        position += 1
+        if not present:
+            threadlist.append(None)
+            continue
+        thread = EmbThread()
+        thread.color = THREAD_COLOR.unpack_from(data, position)[0]
+        position += THREAD_COLOR.size
+        for name in THREAD_FIELDS:
+            length = THREAD_TEXT.unpack_from(data, position)[0]
+            position += THREAD_TEXT.size
+            if length >= 0:
+                setattr(thread, name, bytes(data[position:position + length]).decode("utf-8", "surrogatepass"))
+                position += length
+        threadlist.append(thread)
+    return threadlist
+
+
+_DTYPES = {"d": "<f8", "i": "<i4", "I": "<u4", "q": "<i8"}
+
+
+def _widen(typecode: str, stored: str, data: Any) -> Any:
+    """Reads a column stored as the stored typecode into an array(typecode)."""
+    if stored == typecode:
+        return _from_le_bytes(typecode, data)
+    np = numpy()
+    if np is None:
+        return array(typecode, _from_le_bytes(stored, data))
+    column = array(typecode)
+    column.frombytes(np.frombuffer(data, dtype=_DTYPES[stored]).astype(typecode).tobytes())
+    return column
+
+
+def _restore_values(kind: int, data: Any, count: int) -> List[Any]:
+    """Values of a stitch list column, integral doubles come back as floats
+    unless the bitmask marks them as ints."""
+    typecode, as_int = COLUMN_KINDS[kind & ~KIND_MIXED]
+    size = count * array(typecode).itemsize
+    values = _widen(typecode if as_int else "d", typecode, data[:size]).tolist()
+    if kind & KIND_MIXED:
+        for index, bits in enumerate(data[size:]):
+            if bits:
+                for bit in range(8):
+                    if bits >> bit & 1:
+                        i = (index << 3) | bit
+                        values[i] = int(values[i])
+    return values
+
+
+def pack_pattern(pattern: Any) -> bytes:
+    """Packs the stitches, threads, metadata and position of a pattern."""
+    stitches = pattern.stitches
+    flags = 0
+    columns = None
+    if isinstance(stitches, EmbStitchArray):
+        flags |= FLAG_COMPACT
+        columns = (
+            _pack_doubles(stitches.x) + (b"",),
+            _pack_doubles(stitches.y) + (b"",),
+            _pack_commands(stitches.command) + (b"",),
+        )
+    else:
+        x = _pack_values([stitch[0] for stitch in stitches])
+        y = _pack_values([stitch[1] for stitch in stitches])
+        commands = _pack_commands([stitch[2] for stitch in stitches])
+        if x is not None and y is not None and commands is not None:
+            columns = (x, y, commands + (b"",))
+    if columns is not None:
+        kinds = (columns[0][0], columns[1][0], columns[2][0])
+        sections = [_le_bytes(column) + mask for kind, column, mask in columns]
+    else:
+        kinds = (KIND_PICKLED, KIND_PICKLED, KIND_PICKLED)
+        sections = [pickle.dumps(list(stitches), pickle.HIGHEST_PROTOCOL), b"", b""]
+
+    threads = _pack_threads(pattern.threadlist)
+    if threads is None:
+        flags |= FLAG_THREADS_PICKLED
+        threads = pickle.dumps(pattern.threadlist, pickle.HIGHEST_PROTOCOL)
+    sections.append(threads)
+    sections.append(pickle.dumps(pattern.extras, pickle.HIGHEST_PROTOCOL) if pattern.extras else b"")
+
+    previous_x = pattern._previousX
+    previous_y = pattern._previousY
+    if type(previous_x) is int:
+        flags |= FLAG_PREVIOUS_X_INT
+    if type(previous_y) is int:
+        flags |= FLAG_PREVIOUS_Y_INT
+    parts = [
+        HEADER.pack(
+            MAGIC, VERSION, flags, kinds[0], kinds[1], kinds[2],
+            len(pattern.threadlist) if not flags & FLAG_THREADS_PICKLED else 0,
+            previous_x, previous_y,
+        )
+    ]
+    for section in sections:
+        parts.append(SECTION.pack(len(section)))
+        parts.append(section)
+    return b"".join(parts)
+
+
+def unpack_pattern(data: Any, pattern: Any) -> Any:
+    """Restores the packed pattern into pattern, a new empty EmbPattern."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError("Packed pattern is truncated")
+    magic, version, flags, x_kind, y_kind, command_kind, thread_count, previous_x, previous_y = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a packed pattern")
+    if version != VERSION:
+        raise ValueError("Unsupported packed pattern version %d" % version)
+    sections = []
+    position = HEADER.size
+    for _ in range(5):
+        if position + SECTION.size > len(view):
+            raise ValueError("Packed pattern is truncated")
+        length = SECTION.unpack_from(view, position)[0]
+        position += SECTION.size
+        if position + length > len(view):
+            raise ValueError("Packed pattern is truncated")
+        sections.append(view[position:position + length])
+        position += length
+
+    if x_kind == KIND_PICKLED:
+        rows = pickle.loads(sections[0])
+        pattern.stitches = EmbStitchArray(rows) if flags & FLAG_COMPACT else rows
+    else:
+        if flags & FLAG_COMPACT:
+            stitches = EmbStitchArray()
+            stitches.x = _widen("d", COLUMN_KINDS[x_kind][0], sections[0])
+            stitches.y = _widen("d", COLUMN_KINDS[y_kind][0], sections[1])
+            stitches.command = _widen("q", COMMAND_KINDS[command_kind], sections[2])
+            x, y, commands = stitches.x, stitches.y, stitches.command
+        else:
+            commands = _from_le_bytes(COMMAND_KINDS[command_kind], sections[2]).tolist()
+            x = _restore_values(x_kind, sections[0], len(commands))
+            y = _restore_values(y_kind, sections[1], len(commands))
+            stitches = list(map(list, zip(x, y, commands)))
+        if len(x) != len(commands) or len(y) != len(commands):
+            raise ValueError("Packed pattern columns differ in length")
+        pattern.stitches = stitches
+    if flags & FLAG_THREADS_PICKLED:
+        pattern.threadlist = pickle.loads(sections[3])
+    else:
+        pattern.threadlist = _unpack_threads(sections[3], thread_count)
+    pattern.extras = pickle.loads(sections[4]) if len(sections[4]) else {}
+    pattern._previousX = int(previous_x) if flags & FLAG_PREVIOUS_X_INT else previous_x
+    pattern._previousY = int(previous_y) if flags & FLAG_PREVIOUS_Y_INT else previous_y
+    return pattern
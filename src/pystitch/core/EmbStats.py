@@ -0,0 +1,255 @@
+"""Statistics of the stitches of an EmbPattern.
+
+PatternStats gathers in one pass what the pattern queries and the writer
+headers need: the bounds, a histogram of the commands, the number of threads
+the color blocks require, per color block extents and counts, the total
+stitch and jump lengths and the longest stitch. EmbPattern.get_stats() keeps
+one for compact patterns until they are modified.
+
+Lengths are the distances moved from the previous position, starting from
+0, 0. When NumPy is importable, compact patterns are measured with whole
+column operations; the values match the pure Python pass.
+"""
+
+from math import sqrt
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .EmbConstant import (
+    COLOR_BREAK,
+    COLOR_CHANGE,
+    COMMAND_MASK,
+    JUMP,
+    NEEDLE_AT,
+    NEEDLE_SET,
+    SEW_TO,
+    STITCH,
+    STOP,
+)
+from ..utils.EmbNumpy import numpy
+
+
+class ColorBlockStats:
+    """Counts and extents of the STITCH commands of one color block. start is
+    the position of the first stitch of the block."""
+
+    __slots__ = ("start", "count", "min_x", "min_y", "max_x", "max_y", "length")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.count = 0
+        self.min_x = float("inf")
+        self.min_y = float("inf")
+        self.max_x = -float("inf")
+        self.max_y = -float("inf")
+        self.length = 0.0
+
+    def __repr__(self) -> str:
+        return "ColorBlockStats(start=%d, count=%d, bounds=%r, length=%r)" % (
+            self.start,
+            self.count,
+            self.bounds(),
+            self.length,
+        )
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self.min_x, self.min_y, self.max_x, self.max_y
+
+
+class PatternStats:
+    """Single pass statistics of a stitch sequence, list or EmbStitchArray.
+
+    _track() is the one pass over the records, StitchTally in WriteHelper
+    runs it lazily while a writer encodes the stitches."""
+
+    MEASURE = True  # also measure lengths and color block extents.
+
+    def __init__(self, stitches: Any) -> None:
+        self._reset()
+        if len(stitches) == 0:
+            return
+        if hasattr(stitches, "command_bytes") and numpy() is not None:
+            self._measure_columns(stitches)
+        else:
+            if hasattr(stitches, "records"):
+                records = stitches.records()
+            else:
+                records = stitches
+            for _ in self._track(records):
+                pass
+        self.last = stitches[-1]
+
+    def _reset(self) -> None:
+        self.count = 0
+        self.min_x = float("inf")
+        self.min_y = float("inf")
+        self.max_x = -float("inf")
+        self.max_y = -float("inf")
+        self.last: Optional[Any] = None
+        self.commands = [0] * (COMMAND_MASK + 1)
+        self.command_order: List[int] = []  # masked commands, in order of first use.
+        self.thread_count = 0  # threads required, as counted by fix_color_count.
+        self.changes: Optional[List[Any]] = None  # change and stop records, if collected.
+        self.colorblocks: List[ColorBlockStats] = []
+        self.stitch_length = 0.0
+        self.jump_length = 0.0
+        self.longest_stitch = 0.0
+
+    def _track(self, stitches: Iterable[Any]) -> Iterator[Any]:
+        """Yields the records, the values are set once they are exhausted."""
+        measure = self.MEASURE
+        count = 0
+        min_x = self.min_x
+        min_y = self.min_y
+        max_x = self.max_x
+        max_y = self.max_y
+        last = None
+        commands = self.commands
+        command_order = self.command_order
+        changes = self.changes
+        colorblocks = self.colorblocks
+        block = None
+        thread_count = 0
+        stitch_length = 0.0
+        jump_length = 0.0
+        longest = 0.0
+        init_color = True
+        last_x = 0
+        last_y = 0
+        for stitch in stitches:
+            x = stitch[0]
+            y = stitch[1]
+            if x > max_x:
+                max_x = x
+            if x < min_x:
+                min_x = x
+            if y > max_y:
+                max_y = y
+            if y < min_y:
+                min_y = y
+            data = stitch[2] & COMMAND_MASK
+            if commands[data] == 0:
+                command_order.append(data)
+            commands[data] += 1
+            if data == STITCH or data == SEW_TO or data == NEEDLE_AT:
+                if init_color:
+                    thread_count += 1
+                    init_color = False
+                    if measure:
+                        block = ColorBlockStats(count)
+                        colorblocks.append(block)
+                if data == STITCH and measure:
+                    dx = x - last_x
+                    dy = y - last_y
+                    length = sqrt(dx * dx + dy * dy)
+                    stitch_length += length
+                    if length > longest:
+                        longest = length
+                    block.count += 1
+                    block.length += length
+                    if x > block.max_x:
+                        block.max_x = x
+                    if x < block.min_x:
+                        block.min_x = x
+                    if y > block.max_y:
+                        block.max_y = y
+                    if y < block.min_y:
+                        block.min_y = y
+            elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
+                init_color = True
+                if changes is not None:
+                    changes.append(stitch)
+            elif data == STOP:
+                if changes is not None:
+                    changes.append(stitch)
+            elif data == JUMP and measure:
+                dx = x - last_x
+                dy = y - last_y
+                jump_length += sqrt(dx * dx + dy * dy)
+            last_x = x
+            last_y = y
+            count += 1
+            last = stitch
+            yield stitch
+        self.count = count
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self.last = last
+        self.thread_count = thread_count
+        self.stitch_length = stitch_length
+        self.jump_length = jump_length
+        self.longest_stitch = longest
+
+    def _measure_columns(self, stitches: Any) -> None:
+        np = numpy()
+        xs = np.frombuffer(stitches.x, dtype=np.float64)
+        ys = np.frombuffer(stitches.y, dtype=np.float64)
+        data = np.frombuffer(stitches.command_bytes(), dtype=np.uint8)
+        self.count = len(data)
+        self.min_x = float(xs.min())
+        self.min_y = float(ys.min())
+        self.max_x = float(xs.max())
+        self.max_y = float(ys.max())
+        self.commands = [int(c) for c in np.bincount(data, minlength=COMMAND_MASK + 1)]
+        used, first = np.unique(data, return_index=True)
+        self.command_order = [int(used[i]) for i in np.argsort(first, kind="stable")]
+
+        dx = np.diff(xs, prepend=0.0)
+        dy = np.diff(ys, prepend=0.0)
+        lengths = np.sqrt(dx * dx + dy * dy)
+        is_stitch = data == STITCH
+        is_jump = data == JUMP
+        stitch_lengths = lengths[is_stitch]
+        if len(stitch_lengths):
+            # cumsum adds in order, as the pure Python pass does.
+            self.stitch_length = float(np.cumsum(stitch_lengths)[-1])
+            self.longest_stitch = float(stitch_lengths.max())
+        if is_jump.any():
+            self.jump_length = float(np.cumsum(lengths[is_jump])[-1])
+
+        # Color blocks start at the first stitching command after a change.
+        change = (data == COLOR_CHANGE) | (data == COLOR_BREAK) | (data == NEEDLE_SET)
+        block_ids = np.cumsum(change)
+        stitching = (data == STITCH) | (data == SEW_TO) | (data == NEEDLE_AT)
+        ids, starts = np.unique(block_ids[stitching], return_index=True)
+        self.thread_count = len(ids)
+        stitching_positions = np.flatnonzero(stitching)
+        stitch_ids = block_ids[is_stitch]
+        block_x = xs[is_stitch]
+        block_y = ys[is_stitch]
+        lo = np.searchsorted(stitch_ids, ids, side="left")
+        hi = np.searchsorted(stitch_ids, ids, side="right")
+        for i in range(len(ids)):
+            block = ColorBlockStats(int(stitching_positions[starts[i]]))
+            a = int(lo[i])
+            b = int(hi[i])
+            if a != b:
+                block.count = b - a
+                block.min_x = float(block_x[a:b].min())
+                block.min_y = float(block_y[a:b].min())
+                block.max_x = float(block_x[a:b].max())
+                block.max_y = float(block_y[a:b].max())
+                block.length = float(np.cumsum(stitch_lengths[a:b])[-1])
+            self.colorblocks.append(block)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self.min_x, self.min_y, self.max_x, self.max_y
+
+    def histogram(self) -> Dict[int, int]:
+        """Counts of the masked commands used, in order of first use."""
+        return {command: self.commands[command] for command in self.command_order}
+
+    def count_stitches(self) -> int:
+        return self.count
+
+    def count_stitch_commands(self, command: int) -> int:
+        if not 0 <= command <= COMMAND_MASK:
+            return 0
+        return self.commands[command]
+
+    def count_color_changes(self) -> int:
+        return self.commands[COLOR_CHANGE]
+
+    def count_needle_sets(self) -> int:
+        return self.commands[NEEDLE_SET]
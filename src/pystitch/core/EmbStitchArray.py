@@ -0,0 +1,288 @@
+"""Columnar stitch storage for EmbPattern.
+
+EmbStitchArray stores the x, y and command values of a pattern in three
+contiguous arrays rather than a list of [x, y, command] lists. Indexing
+returns lightweight row views so that ``stitches[i][0]`` and
+``stitches[i][2] = STOP`` keep working for readers, writers and the encoder.
+
+When NumPy is importable the geometry kernels (bounds, translate, transform
+and command counts) run as whole-array operations on the columns in place.
+Otherwise they fall back to pure Python; both give identical results.
+"""
+
+import itertools
+import sys
+from array import array
+from typing import Any, Iterable, Iterator, Tuple
+
+from .EmbConstant import COMMAND_MASK
+from ..utils.EmbNumpy import numpy
+
+
+# Offset of the least significant byte within each 8 byte command.
+_LOW_BYTE = 0 if sys.byteorder == "little" else 7
+
+# Versions are drawn from one counter, no two arrays or states share one.
+_versions = itertools.count(1)
+
+
+class EmbStitchView:
+    """Row view of a single stitch within an EmbStitchArray.
+
+    The view refers to a position, so it should not be kept across inserts
+    or deletes of earlier stitches."""
+
+    __slots__ = ("_stitches", "_index")
+
+    def __init__(self, stitches: 'EmbStitchArray', index: int) -> None:
+        self._stitches = stitches
+        self._index = index
+
+    def _column(self, item: int) -> Any:
+        if item == 0 or item == -3:
+            return self._stitches.x
+        if item == 1 or item == -2:
+            return self._stitches.y
+        if item == 2 or item == -1:
+            return self._stitches.command
+        raise IndexError("stitch index out of range")
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, slice):
+            return self.tolist()[item]
+        return self._column(item)[self._index]
+
+    def __setitem__(self, item: int, value: Any) -> None:
+        self._column(item)[self._index] = value
+        self._stitches._touch()
+
+    def __len__(self) -> int:
+        return 3
+
+    def __iter__(self) -> Iterator[Any]:
+        i = self._index
+        s = self._stitches
+        yield s.x[i]
+        yield s.y[i]
+        yield s.command[i]
+
+    def __eq__(self, other: Any) -> bool:
+        try:
+            return len(other) == 3 and self.tolist() == list(other)
+        except TypeError:
+            return False
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(self.tolist())
+
+    def tolist(self) -> list:
+        i = self._index
+        s = self._stitches
+        return [s.x[i], s.y[i], s.command[i]]
+
+
+class EmbStitchArray:
+    """Compact replacement for the list of [x, y, command] lists.
+
+    Coordinates are stored as doubles. Commands are stored as 64-bit signed
+    integers since the thread, needle and order bits reach beyond 32 bits and
+    NO_COMMAND is negative.
+
+    version changes on every edit other than appending, including writes
+    through row views, so cached results can be checked against it. Writes
+    to the columns directly are not noticed and need a call to _touch()."""
+
+    def __init__(self, stitches: Any = None) -> None:
+        self.x = array("d")
+        self.y = array("d")
+        self.command = array("q")
+        self.version = next(_versions)
+        if stitches is not None:
+            self.extend(stitches)
+
+    def _touch(self) -> None:
+        self.version = next(_versions)
+
+    @classmethod
+    def from_columns(cls, x: Any, y: Any, command: Any) -> 'EmbStitchArray':
+        stitches = cls()
+        stitches.x = array("d", x)
+        stitches.y = array("d", y)
+        stitches.command = array("q", command)
+        return stitches
+
+    def __len__(self) -> int:
+        return len(self.command)
+
+    def _position(self, index: int) -> int:
+        length = len(self.command)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("stitch index out of range")
+        return index
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, slice):
+            return EmbStitchArray.from_columns(
+                self.x[item], self.y[item], self.command[item]
+            )
+        return EmbStitchView(self, self._position(item))
+
+    def __setitem__(self, item: Any, value: Any) -> None:
+        if isinstance(item, slice):
+            rows = EmbStitchArray(value)
+            self.x[item] = rows.x
+            self.y[item] = rows.y
+            self.command[item] = rows.command
+            self._touch()
+            return
+        i = self._position(item)
+        self.x[i] = value[0]
+        self.y[i] = value[1]
+        self.command[i] = value[2]
+        self._touch()
+
+    def __delitem__(self, item: Any) -> None:
+        del self.x[item]
+        del self.y[item]
+        del self.command[item]
+        self._touch()
+
+    def __iter__(self) -> Iterator[EmbStitchView]:
+        for i in range(len(self.command)):
+            yield EmbStitchView(self, i)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, EmbStitchArray):
+            return (
+                self.command == other.command
+                and self.x == other.x
+                and self.y == other.y
+            )
+        try:
+            if len(other) != len(self):
+                return False
+        except TypeError:
+            return False
+        for row, other_row in zip(self.records(), other):
+            if list(row) != list(other_row):
+                return False
+        return True
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return "EmbStitchArray(%r)" % self.tolist()
+
+    def __copy__(self) -> 'EmbStitchArray':
+        return self.copy()
+
+    def copy(self) -> 'EmbStitchArray':
+        return EmbStitchArray.from_columns(self.x, self.y, self.command)
+
+    def append(self, stitch: Any) -> None:
+        self.x.append(stitch[0])
+        self.y.append(stitch[1])
+        self.command.append(stitch[2])
+
+    def extend(self, stitches: Iterable[Any]) -> None:
+        if isinstance(stitches, EmbStitchArray):
+            self.x.extend(stitches.x)
+            self.y.extend(stitches.y)
+            self.command.extend(stitches.command)
+            return
+        for stitch in stitches:
+            self.x.append(stitch[0])
+            self.y.append(stitch[1])
+            self.command.append(stitch[2])
+
+    def __iadd__(self, stitches: Iterable[Any]) -> 'EmbStitchArray':
+        self.extend(stitches)
+        return self
+
+    def insert(self, index: int, stitch: Any) -> None:
+        self.x.insert(index, stitch[0])
+        self.y.insert(index, stitch[1])
+        self.command.insert(index, stitch[2])
+        self._touch()
+
+    def pop(self, index: int = -1) -> list:
+        stitch = [self.x.pop(index), self.y.pop(index), self.command.pop(index)]
+        self._touch()
+        return stitch
+
+    def clear(self) -> None:
+        del self.x[:]
+        del self.y[:]
+        del self.command[:]
+        self._touch()
+
+    def records(self) -> Iterator[Tuple[float, float, int]]:
+        """Iterates (x, y, command) tuples without creating row views."""
+        return zip(self.x, self.y, self.command)
+
+    def tolist(self) -> list:
+        return [[x, y, c] for x, y, c in zip(self.x, self.y, self.command)]
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        if len(self.command) == 0:
+            return float("inf"), float("inf"), -float("inf"), -float("inf")
+        np = numpy()
+        if np is not None:
+            xs = np.frombuffer(self.x, dtype=np.float64)
+            ys = np.frombuffer(self.y, dtype=np.float64)
+            return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+        return min(self.x), min(self.y), max(self.x), max(self.y)
+
+    def translate(self, dx: float, dy: float) -> None:
+        self._touch()
+        np = numpy()
+        if np is not None:
+            xs = np.frombuffer(self.x, dtype=np.float64)
+            ys = np.frombuffer(self.y, dtype=np.float64)
+            xs += dx
+            ys += dy
+            return
+        self.x = array("d", [x + dx for x in self.x])
+        self.y = array("d", [y + dy for y in self.y])
+
+    def transform(self, matrix: Any) -> None:
+        m = matrix.get_matrix()
+        m0, m1, m3, m4, m6, m7 = m[0], m[1], m[3], m[4], m[6], m[7]
+        self._touch()
+        np = numpy()
+        if np is not None:
+            xs = np.frombuffer(self.x, dtype=np.float64)
+            ys = np.frombuffer(self.y, dtype=np.float64)
+            tx = xs * m0 + ys * m3 + 1 * m6
+            ty = xs * m1 + ys * m4 + 1 * m7
+            xs[:] = tx
+            ys[:] = ty
+            return
+        xs = self.x
+        ys = self.y
+        self.x = array("d", [x * m0 + y * m3 + 1 * m6 for x, y in zip(xs, ys)])
+        self.y = array("d", [x * m1 + y * m4 + 1 * m7 for x, y in zip(xs, ys)])
+
+    def command_bytes(self) -> bytes:
+        """Returns the commands masked with COMMAND_MASK, one byte per stitch."""
+        view = memoryview(self.command).cast("B")
+        return bytes(view[_LOW_BYTE::8])
+
+    def count_command(self, command: int) -> int:
+        if not 0 <= command <= COMMAND_MASK:
+            return 0
+        np = numpy()
+        if np is not None:
+            commands = np.frombuffer(self.command, dtype=np.int64)
+            return int(np.count_nonzero((commands & COMMAND_MASK) == command))
+        return self.command_bytes().count(command)
@@ -1,12 +1,21 @@
 """Core framework modules"""
 
 from .EmbPattern import EmbPattern
+from .EmbBlocks import EmbBlock, EmbBlockIndex
+from .EmbStats import ColorBlockStats, PatternStats
+from .EmbStitchArray import EmbStitchArray, EmbStitchView
 from .EmbConstant import *
 from .exceptions import *
 # from .pystitch import *  # Removed star import to avoid namespace pollution
 
 __all__ = [
     'EmbPattern',
+    'EmbStitchArray',
+    'EmbStitchView',
+    'EmbBlock',
+    'EmbBlockIndex',
+    'PatternStats',
+    'ColorBlockStats',
     # EmbConstant exports
     # Add all symbols exported by EmbConstant here, e.g.:
     # 'SOME_CONSTANT', 'ANOTHER_CONSTANT',
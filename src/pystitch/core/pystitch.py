@@ -5,3 +5,5 @@ get_extension_by_filename = EmbPattern.get_extension_by_filename
 read_embroidery = EmbPattern.read_embroidery
 
 write_embroidery = EmbPattern.write_embroidery
+
+peek_embroidery = EmbPattern.peek_embroidery
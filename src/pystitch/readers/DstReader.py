@@ -4,9 +4,11 @@ This module provides functionality to read DST (Tajima) embroidery files,
 parsing both header information and stitch data into an EmbPattern object.
 DST is a popular embroidery format used by Tajima and other embroidery machines."""
 
-from typing import BinaryIO, Optional, Dict, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Dict, Any, Iterator, Tuple
 
 from ..core.EmbPattern import EmbPattern
+from ..utils.ReadHelper import ReadBuffer
 
 def getbit(b: int, pos: int) -> int:
     return (b >> pos) & 1
@@ -53,8 +55,8 @@ def process_header_info(out: EmbPattern, prefix: str, value: str) -> None:
     else:
         out.metadata(prefix, value)  # type: ignore
 
-def dst_read_header(f: BinaryIO, out: EmbPattern) -> None:
-    header = f.read(512)
+def dst_header_lines(header: bytes) -> Iterator[Tuple[str, str]]:
+    """Splits a DST style header into (prefix, value) pairs."""
     start = 0
     for i, element in enumerate(header):
         if (
@@ -65,35 +67,108 @@ def dst_read_header(f: BinaryIO, out: EmbPattern) -> None:
             start = end
             try:
                 line = data.decode("utf8").strip()
-                if len(line) > 3:
-                    process_header_info(out, line[0:2].strip(), 
-                                       line[3:].strip())
             except UnicodeDecodeError:  # Non-utf8 information. See #83
                 continue
+            if len(line) > 3:
+                yield line[0:2].strip(), line[3:].strip()
+
+def dst_read_header(f: BinaryIO, out: EmbPattern) -> None:
+    header = f.read(512)
+    for prefix, value in dst_header_lines(header):
+        process_header_info(out, prefix, value)
+
+def header_int(fields: Dict[str, str], prefix: str) -> Optional[int]:
+    try:
+        return int(fields[prefix])
+    except (KeyError, ValueError):
+        return None
+
+def dst_header_summary(out: Any, fields: Dict[str, str]) -> None:
+    """Sets the stitch count and extents of an EmbInfo from the ST and
+    +X/-X/+Y/-Y header fields, the extents being distances from the origin."""
+    out.stitch_count = header_int(fields, "ST")
+    extents = [header_int(fields, prefix) for prefix in ("-X", "-Y", "+X", "+Y")]
+    if None not in extents:
+        out.extents = (-abs(extents[0]), -abs(extents[1]), abs(extents[2]), abs(extents[3]))
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Dict[str, Any]] = None) -> None:
+    fields: Dict[str, str] = {}
+    for prefix, value in dst_header_lines(f.read(512)):
+        process_header_info(out, prefix, value)
+        fields[prefix] = value
+    dst_header_summary(out, fields)
+    color_changes = header_int(fields, "CO")
+    if color_changes is not None:
+        # CO counts the color changes and stops.
+        out.color_count = color_changes + 1 if out.stitch_count else 0
+
+# Per-byte decode tables. Each bit of a record belongs to a single byte, so a
+# displacement is the sum of the contributions of its three bytes.
+DX_TABLE = tuple(
+    tuple(decode_dx(*[b if i == j else 0 for j in range(3)]) for b in range(256))
+    for i in range(3)
+)
+DY_TABLE = tuple(
+    tuple(decode_dy(*[b if i == j else 0 for j in range(3)]) for b in range(256))
+    for i in range(3)
+)
+
+# Record types decoded from the third byte.
+RECORD_STITCH = 0
+RECORD_MOVE = 1
+RECORD_COLOR_CHANGE = 2
+RECORD_SEQUIN_MODE = 3
+RECORD_END = 4
+
+
+def get_record_type(b2: int) -> int:
+    if b2 & 0b11110011 == 0b11110011:
+        return RECORD_END
+    elif b2 & 0b11000011 == 0b11000011:
+        return RECORD_COLOR_CHANGE
+    elif b2 & 0b01000011 == 0b01000011:
+        return RECORD_SEQUIN_MODE
+    elif b2 & 0b10000011 == 0b10000011:
+        return RECORD_MOVE
+    return RECORD_STITCH
+
+
+RECORD_TYPE_TABLE = tuple(get_record_type(b) for b in range(256))
+
 
-def dst_read_stitches(f: BinaryIO, out: EmbPattern, 
+def dst_read_stitches(f: BinaryIO, out: EmbPattern,
                      settings: Optional[Dict[str, Any]] = None) -> None:
     sequin_mode = False
-    while True:
-        byte = bytearray(f.read(3))
-        if len(byte) != 3:
-            break
-        dx = decode_dx(byte[0], byte[1], byte[2])
-        dy = decode_dy(byte[0], byte[1], byte[2])
-        if byte[2] & 0b11110011 == 0b11110011:
-            break
-        elif byte[2] & 0b11000011 == 0b11000011:
-            out.color_change(dx, dy)  # type: ignore
-        elif byte[2] & 0b01000011 == 0b01000011:
-            out.sequin_mode(dx, dy)  # type: ignore
-            sequin_mode = not sequin_mode
-        elif byte[2] & 0b10000011 == 0b10000011:
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    dx0, dx1, dx2 = DX_TABLE
+    dy0, dy1, dy2 = DY_TABLE
+    record_types = RECORD_TYPE_TABLE
+    for i in range(buffer.position, buffer.length - 2, 3):
+        b0 = data[i]
+        b1 = data[i + 1]
+        b2 = data[i + 2]
+        dx = dx0[b0] + dx1[b1] + dx2[b2]
+        dy = dy0[b0] + dy1[b1] + dy2[b2]
+        record_type = record_types[b2]
+        if record_type == RECORD_STITCH:
+            out.stitch(dx, dy)  # type: ignore
+        elif record_type == RECORD_MOVE:
             if sequin_mode:
                 out.sequin_eject(dx, dy)  # type: ignore
             else:
                 out.move(dx, dy)  # type: ignore
+        elif record_type == RECORD_COLOR_CHANGE:
+            out.color_change(dx, dy)  # type: ignore
+        elif record_type == RECORD_SEQUIN_MODE:
+            out.sequin_mode(dx, dy)  # type: ignore
+            sequin_mode = not sequin_mode
         else:
-            out.stitch(dx, dy)  # type: ignore
+            buffer.position = i + 3
+            break
+    else:
+        buffer.position = max(buffer.position, buffer.length)
+    buffer.sync(f)
     out.end()  # type: ignore
 
     count_max = 3
@@ -111,3 +186,10 @@ def read(f: BinaryIO, out: EmbPattern,
          settings: Optional[Dict[str, Any]] = None) -> None:
     dst_read_header(f, out)
     dst_read_stitches(f, out, settings)
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern,
+                  settings: Optional[Dict[str, Any]] = None) -> Callable[[], None]:
+    """Reads the header, the returned function decodes the stitches."""
+    dst_read_header(f, out)
+    return partial(dst_read_stitches, f, out, settings)
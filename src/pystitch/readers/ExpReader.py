@@ -1,26 +1,35 @@
-from typing import BinaryIO, Optional, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
-from ..utils.ReadHelper import signed8
+from ..utils.ReadHelper import ReadBuffer, signed8
 
 
 def read_exp_stitches(f: BinaryIO, out: EmbPattern) -> None:
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    position = buffer.position
+    length = buffer.length
     while True:
-        b = bytearray(f.read(2))
-        if len(b) != 2:
+        if position + 2 > length:
+            position = max(position, length)
             break
-        if b[0] != 0x80:
-            x = signed8(b[0])
-            y = -signed8(b[1])
+        b0 = data[position]
+        b1 = data[position + 1]
+        position += 2
+        if b0 != 0x80:
+            x = signed8(b0)
+            y = -signed8(b1)
             out.stitch(x, y)
             continue
 
-        control = b[1]
-        b = bytearray(f.read(2))  # 07 00
-        if len(b) != 2:
+        control = b1
+        if position + 2 > length:  # 07 00
+            position = max(position, length)
             break
-        x = signed8(b[0])
-        y = -signed8(b[1])
+        x = signed8(data[position])
+        y = -signed8(data[position + 1])
+        position += 2
         if control == 0x80:  # Trim
             out.trim()
             continue
@@ -37,8 +46,15 @@ def read_exp_stitches(f: BinaryIO, out: EmbPattern) -> None:
                 out.move(x, y)
             continue
         break  # Uncaught Control
+    buffer.position = position
+    buffer.sync(f)
     out.end()
 
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     read_exp_stitches(f, out)
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Callable[[], None]:
+    """EXP has no header, the returned function decodes the stitches."""
+    return partial(read_exp_stitches, f, out)
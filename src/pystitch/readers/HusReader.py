@@ -1,47 +1,32 @@
-from typing import BinaryIO, Optional, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Any, Tuple
 
 from ..utils.EmbCompress import expand
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThreadHus import get_thread_set
-from ..utils.ReadHelper import read_int_16le, read_int_32le, read_string_8, signed8, signed16
+from ..utils.ReadHelper import ReadBuffer, read_int_16le, read_int_32le, read_string_8, signed8, signed16
 
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
-    _ = read_int_32le(f)  # magic_code unused
-    number_of_stitches = read_int_32le(f)
-    number_of_colors = read_int_32le(f)
+    read_deferred(f, out, settings)()
 
-    extend_pos_x = read_int_16le(f)
-    _ = signed16(extend_pos_x) if extend_pos_x is not None else None  # extend_pos_x unused
-    extend_pos_y = read_int_16le(f)
-    _ = signed16(extend_pos_y) if extend_pos_y is not None else None  # extend_pos_y unused
-    extend_neg_x = read_int_16le(f)
-    _ = signed16(extend_neg_x) if extend_neg_x is not None else None  # extend_neg_x unused
-    extend_neg_y = read_int_16le(f)
-    _ = signed16(extend_neg_y) if extend_neg_y is not None else None  # extend_neg_y unused
-
-    command_offset = read_int_32le(f)
-    x_offset = read_int_32le(f)
-    y_offset = read_int_32le(f)
 
-    _ = read_string_8(f, 8)  # string_value unused
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Callable[[], None]:
+    """Reads the header and threads, the returned function decodes the stitches."""
+    number_of_stitches, _, _, command_offset, x_offset, y_offset = read_hus_header(f, out)
+    return partial(read_hus_stitches, f, out, number_of_stitches, command_offset, x_offset, y_offset)
 
-    _ = read_int_16le(f)  # unknown_16_bit unused
 
-    hus_thread_set = get_thread_set()
-    if number_of_colors is not None:
-        for i in range(0, number_of_colors):
-            index = read_int_16le(f)
-            if index is not None:
-                out.add_thread(hus_thread_set[index])
-    
+def read_hus_stitches(f: BinaryIO, out: EmbPattern, number_of_stitches: Optional[int],
+                      command_offset: Optional[int], x_offset: Optional[int], y_offset: Optional[int]) -> None:
     if command_offset is not None and x_offset is not None and y_offset is not None:
-        f.seek(command_offset, 0)
-        command_compressed = bytearray(f.read(x_offset - command_offset))
-        f.seek(x_offset, 0)
-        x_compressed = bytearray(f.read(y_offset - x_offset))
-        f.seek(y_offset, 0)
-        y_compressed = bytearray(f.read())
+        buffer = ReadBuffer.from_stream(f)
+        buffer.seek(command_offset, 0)
+        command_compressed = buffer.view(x_offset - command_offset)
+        buffer.seek(x_offset, 0)
+        x_compressed = buffer.view(y_offset - x_offset)
+        buffer.seek(y_offset, 0)
+        y_compressed = buffer.view()
 
         if number_of_stitches is not None:
             command_decompressed = expand(command_compressed, number_of_stitches)
@@ -71,3 +56,37 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
                 else:  # UNMAPPED COMMAND
                     break
     out.end()
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    out.stitch_count, out.color_count, out.extents = read_hus_header(f, out)[:3]
+
+
+def read_hus_header(f: BinaryIO, out: Any) -> Tuple[Any, ...]:
+    """Reads the header and threads. Gives the stitch and color counts, the
+    extents from the origin and the offsets of the command, x and y data."""
+    _ = read_int_32le(f)  # magic_code unused
+    number_of_stitches = read_int_32le(f)
+    number_of_colors = read_int_32le(f)
+
+    extends = [read_int_16le(f) for _ in range(4)]  # +x, +y, -x, -y
+    extents = None
+    if None not in extends:
+        pos_x, pos_y, neg_x, neg_y = [abs(signed16(v)) for v in extends]  # type: ignore
+        extents = (-neg_x, -pos_y, pos_x, neg_y)
+
+    command_offset = read_int_32le(f)
+    x_offset = read_int_32le(f)
+    y_offset = read_int_32le(f)
+
+    _ = read_string_8(f, 8)  # string_value unused
+
+    _ = read_int_16le(f)  # unknown_16_bit unused
+
+    hus_thread_set = get_thread_set()
+    if number_of_colors is not None:
+        for i in range(0, number_of_colors):
+            index = read_int_16le(f)
+            if index is not None:
+                out.add_thread(hus_thread_set[index])
+    return number_of_stitches, number_of_colors, extents, command_offset, x_offset, y_offset
@@ -1,27 +1,36 @@
-from typing import BinaryIO, Optional, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThreadJef import get_thread_set
-from ..utils.ReadHelper import read_int_32le, signed8
+from ..utils.ReadHelper import ReadBuffer, read_int_32le, signed8
 
 
 def read_jef_stitches(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     color_index = 1
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    position = buffer.position
+    length = buffer.length
     while True:
-        b = bytearray(f.read(2))
-        if len(b) != 2:
+        if position + 2 > length:
+            position = max(position, length)
             break
-        if b[0] != 0x80:
-            x = signed8(b[0])
-            y = -signed8(b[1])
+        b0 = data[position]
+        b1 = data[position + 1]
+        position += 2
+        if b0 != 0x80:
+            x = signed8(b0)
+            y = -signed8(b1)
             out.stitch(x, y)
             continue
-        ctrl = b[1]
-        b = bytearray(f.read(2))
-        if len(b) != 2:
+        ctrl = b1
+        if position + 2 > length:
+            position = max(position, length)
             break
-        x = signed8(b[0])
-        y = -signed8(b[1])
+        x = signed8(data[position])
+        y = -signed8(data[position + 1])
+        position += 2
         if ctrl == 0x02:
             if x == 0 and y == 0:
                 # My Janome MC400E only trims if there are three jumps in a
@@ -44,6 +53,8 @@ def read_jef_stitches(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = No
         if ctrl == 0x10:
             break
         break  # Uncaught Control
+    buffer.position = position
+    buffer.sync(f)
     out.end(0, 0)
 
     clipping = True
@@ -63,14 +74,23 @@ def read_jef_stitches(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = No
 
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
+    decode = read_deferred(f, out, settings)
+    if decode is not None:
+        decode()
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Optional[Callable[[], None]]:
+    """Reads the threads, the returned function decodes the stitches. None
+    if the header is cut short, or the stitches were decoded already as the
+    threads depend on them."""
     jef_threads = get_thread_set()
     stitch_offset = read_int_32le(f)
     if stitch_offset is None:
-        return
+        return None
     f.seek(20, 1)
     count_colors = read_int_32le(f)
     if count_colors is None:
-        return
+        return None
     f.seek(88, 1)
 
     for _ in range(0, count_colors):
@@ -85,4 +105,9 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
             out.add_thread(jef_threads[index % len(jef_threads)])
 
     f.seek(stitch_offset, 0)
-    read_jef_stitches(f, out, settings)
+    decode = partial(read_jef_stitches, f, out, settings)
+    if None in out.threadlist[1:]:
+        # Stops are listed as None threads, removed while decoding.
+        decode()
+        return None
+    return decode
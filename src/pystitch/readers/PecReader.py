@@ -1,8 +1,8 @@
-from typing import BinaryIO, Optional, Any
+from typing import BinaryIO, Callable, Optional, Any, List, Tuple
 
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThreadPec import get_thread_set
-from ..utils.ReadHelper import read_int_8, read_int_24le, read_string_8
+from ..utils.ReadHelper import ReadBuffer, read_int_8, read_int_24le, read_string_8
 
 JUMP_CODE = 0x10
 TRIM_CODE = 0x20
@@ -16,7 +16,21 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     out.interpolate_duplicate_color_as_stop()
 
 
-def read_pec(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> None:
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Optional[Callable[[], None]]:
+    """Reads the header, threads and graphics, the returned function decodes
+    the stitches. See defer_pec()."""
+    read_string_8(f, 8)
+    return defer_pec(f, out)
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    read_string_8(f, 8)
+    peek_pec(f, out)
+
+
+def read_pec_header(f: BinaryIO, out: Any, pes_chart: Optional[Any] = None) -> Optional[Tuple[int, List[Any], Any, Any]]:
+    """Reads the label and colors, leaving f at the stitch block. Gives the
+    count of colors, their threads and the graphic stride and height."""
     f.seek(3, 1)  # LA:
     label = read_string_8(f, 16)  # Label
     if label is not None:
@@ -27,21 +41,38 @@ def read_pec(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> N
     f.seek(0xC, 1)
     color_changes = read_int_8(f)
     if color_changes is None:
-        return
+        return None
     count_colors = color_changes + 1  # PEC uses cc - 1, 0xFF means 0. # type: ignore
     color_bytes = bytearray(f.read(count_colors))  # type: ignore
-    threads = []
+    threads: List[Any] = []
     map_pec_colors(color_bytes, out, pes_chart, threads)
     f.seek(0x1D0 - color_changes, 1)  # type: ignore
+    return count_colors, threads, pec_graphic_byte_stride, pec_graphic_icon_height
+
+
+def read_pec(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> None:
+    decode = read_pec_deferred(f, out, pes_chart)
+    if decode is not None:
+        end = f.tell()
+        decode()
+        f.seek(end, 0)
+
+
+def read_pec_deferred(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> Optional[Callable[[], None]]:
+    """Reads the header, threads and graphics of the PEC block, the returned
+    function decodes the stitches. None if the block is cut short."""
+    header = read_pec_header(f, out, pes_chart)
+    if header is None:
+        return None
+    count_colors, threads, pec_graphic_byte_stride, pec_graphic_icon_height = header
     stitch_block_end_val = read_int_24le(f)
     if stitch_block_end_val is None:
-        return
+        return None
     stitch_block_end = stitch_block_end_val - 5 + f.tell()  # type: ignore
     # The end of this value is already 5 into the stitchblock.
 
     # 3 bytes, '\x31\xff\xf0', 6 2-byte shorts. 15 total.
-    f.seek(0x0F, 1)
-    read_pec_stitches(f, out)
+    stitch_start = f.tell() + 0x0F
     f.seek(stitch_block_end, 0)
 
     if pec_graphic_byte_stride is not None and pec_graphic_icon_height is not None:
@@ -50,6 +81,49 @@ def read_pec(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> N
             f, out, byte_size, pec_graphic_byte_stride, count_colors + 1, threads  # type: ignore
         )
 
+    def decode() -> None:
+        f.seek(stitch_start, 0)
+        read_pec_stitches(f, out)
+
+    return decode
+
+
+def defer_pec(f: BinaryIO, out: EmbPattern, pes_chart: Optional[Any] = None) -> Optional[Callable[[], None]]:
+    """Reads the PEC block as read_pec_deferred(), the returned function also
+    turns duplicate colors into stops. That only changes the threads when a
+    thread repeats the one before it, the stitches of such files are decoded
+    now so the threads read are final. None if there is nothing to decode."""
+    decode = read_pec_deferred(f, out, pes_chart)
+    if decode is None:
+        return None
+
+    def decode_stitches() -> None:
+        decode()
+        out.interpolate_duplicate_color_as_stop()
+
+    threads = out.threadlist
+    if any(threads[i] == threads[i + 1] for i in range(len(threads) - 1)):
+        decode_stitches()
+        return None
+    return decode_stitches
+
+
+def peek_pec(f: BinaryIO, out: Any, pes_chart: Optional[Any] = None) -> None:
+    """Fills an EmbInfo from the PEC header and the start of the stitch block."""
+    header = read_pec_header(f, out, pes_chart)
+    if header is None:
+        return
+    out.color_count = header[0]
+    # Block length, '\x31\xff\xf0', width, height, 2 shorts, then a long jump to the start.
+    block = bytearray(f.read(18))
+    if len(block) != 18:
+        return
+    width = block[6] | (block[7] << 8)
+    height = block[8] | (block[9] << 8)
+    min_x = -signed12((block[14] << 8) | block[15])
+    min_y = -signed12((block[16] << 8) | block[17])
+    out.extents = (min_x, min_y, min_x + width, min_y + height)
+
 
 def read_pec_graphics(f: BinaryIO, out: EmbPattern, size: Any, stride: Any, count: Any, values: Any) -> None:
     v = values[:]
@@ -118,47 +192,59 @@ def signed7(b: Any) -> int:
 
 
 def read_pec_stitches(f: BinaryIO, out: EmbPattern) -> None:
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    position = buffer.position
+    length = buffer.length
     while True:
-        val1 = read_int_8(f)
-        val2 = read_int_8(f)
-        if val1 is None or val2 is None or (val1 == 0xFF and val2 == 0x00):
+        if position + 2 > length:
+            position = max(position, length)
+            break
+        val1 = data[position]
+        val2 = data[position + 1]
+        position += 2
+        if val1 == 0xFF and val2 == 0x00:
             break
         if val1 == 0xFE and val2 == 0xB0:
-            f.seek(1, 1)
+            position += 1
             out.color_change(0, 0)
             continue
         jump = False
         trim = False
-        if val1 & FLAG_LONG != 0:  # type: ignore
-            if val1 & TRIM_CODE != 0:  # type: ignore
+        if val1 & FLAG_LONG != 0:
+            if val1 & TRIM_CODE != 0:
                 trim = True
-            if val1 & JUMP_CODE != 0:  # type: ignore
+            if val1 & JUMP_CODE != 0:
                 jump = True
-            code = (val1 << 8) | val2  # type: ignore
-            x = signed12(code)  # type: ignore
-            val2 = read_int_8(f)
-            if val2 is None:
+            code = (val1 << 8) | val2
+            x = signed12(code)
+            if position >= length:
                 break
+            val2 = data[position]
+            position += 1
         else:
-            x = signed7(val1)  # type: ignore
+            x = signed7(val1)
 
-        if val2 & FLAG_LONG != 0:  # type: ignore
-            if val2 & TRIM_CODE != 0:  # type: ignore
+        if val2 & FLAG_LONG != 0:
+            if val2 & TRIM_CODE != 0:
                 trim = True
-            if val2 & JUMP_CODE != 0:  # type: ignore
+            if val2 & JUMP_CODE != 0:
                 jump = True
-            val3 = read_int_8(f)
-            if val3 is None:
+            if position >= length:
                 break
-            code = val2 << 8 | val3  # type: ignore
-            y = signed12(code)  # type: ignore
+            val3 = data[position]
+            position += 1
+            code = val2 << 8 | val3
+            y = signed12(code)
         else:
-            y = signed7(val2)  # type: ignore
+            y = signed7(val2)
         if jump:
-            out.move(x, y)  # type: ignore
+            out.move(x, y)
         elif trim:
             out.trim()
-            out.move(x, y)  # type: ignore
+            out.move(x, y)
         else:
-            out.stitch(x, y)  # type: ignore
+            out.stitch(x, y)
+    buffer.position = position
+    buffer.sync(f)
     out.end()
@@ -1,8 +1,8 @@
-from typing import BinaryIO, Optional, Any
+from typing import BinaryIO, Callable, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThread import EmbThread
-from .PecReader import read_pec
+from .PecReader import defer_pec, peek_pec, read_pec
 from ..utils.ReadHelper import (
     read_int_8,
     read_int_16le,
@@ -14,16 +14,36 @@ from ..utils.ReadHelper import (
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     loaded_thread_values: list[Any] = []
+    if read_pes_header(f, out, loaded_thread_values):
+        read_pec(f, out, loaded_thread_values)
+        out.interpolate_duplicate_color_as_stop()
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Optional[Callable[[], None]]:
+    """Reads the headers, threads and graphics, the returned function decodes
+    the stitches. See PecReader.defer_pec()."""
+    loaded_thread_values: list[Any] = []
+    if read_pes_header(f, out, loaded_thread_values):
+        return defer_pec(f, out, loaded_thread_values)
+    return None
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    loaded_thread_values: list[Any] = []
+    if read_pes_header(f, out, loaded_thread_values):
+        peek_pec(f, out, loaded_thread_values)
+
+
+def read_pes_header(f: BinaryIO, out: Any, loaded_thread_values: list[Any]) -> bool:
+    """Reads the PES header and seeks to the PEC block, False if there is none."""
     pes_string = read_string_8(f, 8)  # type: ignore
 
     if pes_string == "#PEC0001":
-        read_pec(f, out, loaded_thread_values)
-        out.interpolate_duplicate_color_as_stop()
-        return
+        return True
 
     pec_block_position = read_int_32le(f)
     if pec_block_position is None:
-        return
+        return False
 
     # Ignoring several known PES versions, just abort and read PEC block
     # All versions allow, abort and read PEC block.
@@ -69,8 +89,7 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     else:
         pass  # Header is unrecognised.
     f.seek(pec_block_position, 0)
-    read_pec(f, out, loaded_thread_values)
-    out.interpolate_duplicate_color_as_stop()
+    return True
 
 
 def read_pes_string(f: BinaryIO) -> Optional[Any]:
@@ -1,39 +1,31 @@
-from typing import BinaryIO, Optional, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Any, List
 
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThread import EmbThread
-from ..utils.ReadHelper import read_int_8, read_int_24be, signed8, read_string_8
+from .DstReader import dst_header_lines, dst_header_summary, header_int
+from ..utils.ReadHelper import ReadBuffer, read_int_8, read_int_24be, signed8, read_string_8
 
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
-    f.seek(0x83, 0)
-    name_raw = read_string_8(f, 0x10)
-    if name_raw is not None:
-        name = name_raw.strip()
-        out.metadata("name", name)
-    f.seek(0x10A, 0)
-    thread_order = list(f.read(0x100))
-    f.seek(0x20E, 0)
-    while True:
-        if read_int_8(f) == 0x45:
-            thread = EmbThread()
-            color_val = read_int_24be(f)
-            if color_val is not None:
-                thread.color = color_val
-            read_int_8(f)  # Should be 0x20 " "
-            out.add_thread(thread)
-        else:
-            break
+    read_deferred(f, out, settings)()
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Callable[[], None]:
+    """Reads the header and threads, the returned function decodes the stitches."""
+    thread_order = read_tbf_header(f, out)
     f.seek(0x600, 0)
+    return partial(read_tbf_stitches, f, out, thread_order)
+
 
+def read_tbf_stitches(f: BinaryIO, out: EmbPattern, thread_order: List[int]) -> None:
     needle = 0
-    while True:
-        byte = bytearray(f.read(3))
-        if len(byte) != 3:
-            break
-        x = byte[0]
-        y = byte[1]
-        ctrl = byte[2]
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    for position in range(buffer.position, buffer.length - 2, 3):
+        x = data[position]
+        y = data[position + 1]
+        ctrl = data[position + 2]
         if ctrl == 0x80:
             out.stitch(signed8(x), -signed8(y))
             continue
@@ -59,7 +51,44 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
             out.trim()
             continue
         elif ctrl == 0x8F:
+            buffer.position = position + 3
             break
         else:
+            buffer.position = position + 3
             break  # Dunno why it got here.
+    else:
+        buffer.position = max(buffer.position, buffer.length)
+    buffer.sync(f)
     out.end()
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    f.seek(0x80, 0)
+    fields = dict(dst_header_lines(f.read(0x80)))
+    dst_header_summary(out, fields)
+    # CO counts the needle sets, one per color.
+    out.color_count = header_int(fields, "CO")
+    read_tbf_header(f, out)
+
+
+def read_tbf_header(f: BinaryIO, out: Any) -> List[int]:
+    """Reads the name and threads, giving the thread order of the needle sets."""
+    f.seek(0x83, 0)
+    name_raw = read_string_8(f, 0x10)
+    if name_raw is not None:
+        name = name_raw.strip()
+        out.metadata("name", name)
+    f.seek(0x10A, 0)
+    thread_order = list(f.read(0x100))
+    f.seek(0x20E, 0)
+    while True:
+        if read_int_8(f) == 0x45:
+            thread = EmbThread()
+            color_val = read_int_24be(f)
+            if color_val is not None:
+                thread.color = color_val
+            read_int_8(f)  # Should be 0x20 " "
+            out.add_thread(thread)
+        else:
+            break
+    return thread_order
@@ -1,19 +1,18 @@
-from typing import BinaryIO, Optional, Any
+from functools import partial
+from typing import BinaryIO, Callable, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
 from ..core.EmbConstant import *
+from ..utils.ReadHelper import ReadBuffer
 
 
 def read_u01_stitches(f: BinaryIO, out: EmbPattern) -> None:
-    count = 0
-    while True:
-        count += 1
-        byte = bytearray(f.read(3))
-        if len(byte) != 3:
-            break
-        ctrl = byte[0]
-        dy = -byte[1]
-        dx = byte[2]
+    buffer = ReadBuffer.from_stream(f)
+    data = buffer.data
+    for position in range(buffer.position, buffer.length - 2, 3):
+        ctrl = data[position]
+        dy = -data[position + 1]
+        dx = data[position + 2]
         if (ctrl & 0x20) != 0:
             dx = -dx
         if (ctrl & 0x40) != 0:
@@ -79,10 +78,16 @@ def read_u01_stitches(f: BinaryIO, out: EmbPattern) -> None:
                 out.move(dx, dy)
             continue
         if command == 0x18:
+            buffer.position = position + 3
             break
         if ctrl == 0x2B:
+            buffer.position = position + 3
             break  # Rare postfix data from machine. Do not read this.
+        buffer.position = position + 3
         break  # Uncaught Command
+    else:
+        buffer.position = max(buffer.position, buffer.length)
+    buffer.sync(f)
     out.end()
 
 
@@ -90,3 +95,9 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     f.seek(0x80, 1)
     f.seek(0x80, 1)
     read_u01_stitches(f, out)
+
+
+def read_deferred(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> Callable[[], None]:
+    """Skips the header, the returned function decodes the stitches."""
+    f.seek(0x100, 1)
+    return partial(read_u01_stitches, f, out)
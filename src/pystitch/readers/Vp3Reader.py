@@ -1,4 +1,4 @@
-from typing import BinaryIO, Optional, Any
+from typing import BinaryIO, Optional, Any, Tuple
 
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThread import EmbThread
@@ -56,16 +56,53 @@ def signed16(b0: int, b1: int) -> int:
 
 
 def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
+    header = read_vp3_header(f)
+    if header is None:
+        return
+    center_x, center_y, count_colors = header[2:]
+    for i in range(0, count_colors):
+        vp3_read_colorblock(f, out, center_x, center_y)
+        if (i + 1) < count_colors:  # Don't add the color change on the final read.
+            out.color_change()
+    out.end()
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    header = read_vp3_header(f)
+    if header is None:
+        return
+    out.extents, out.stitch_count, _, _, out.color_count = header
+    for _ in range(0, out.color_count):
+        # Each color block gives its length and thread before the stitches.
+        f.seek(3, 1)
+        distance_to_next_block_050 = read_int_32be(f)
+        if distance_to_next_block_050 is None:
+            return
+        block_end_position = distance_to_next_block_050 + f.tell()
+        f.seek(8, 1)
+        out.add_thread(vp3_read_thread(f))
+        f.seek(block_end_position, 0)
+
+
+def read_vp3_header(f: BinaryIO) -> Optional[Tuple[Tuple[float, float, float, float], int, float, float, int]]:
+    """Reads the file and design headers, leaving f at the first color block.
+    Gives the extents, stitch count, design center and count of colors."""
     _b = f.read(6)
     # magic code: %vsm%\0
     skip_vp3_string(f)  # "Produced by     Software Ltd"
     f.seek(7, 1)
     skip_vp3_string(f)  # "" comments and note string.
-    f.seek(32, 1)
+    values = [read_int_32be(f) for _ in range(5)]  # right, -top, left, -bottom, stitches
+    if None in values:
+        return None
+    right, top, left, bottom = [signed32(v) / 100 for v in values[:4]]  # type: ignore
+    extents = (left, 0.0 - top, right, 0.0 - bottom)
+    stitch_count = values[4]
+    f.seek(12, 1)
     center_x_val = read_int_32be(f)
     center_y_val = read_int_32be(f)
     if center_x_val is None or center_y_val is None:
-        return
+        return None
     center_x = signed32(center_x_val) / 100
     center_y = -(signed32(center_y_val) / 100)
     f.seek(27, 1)
@@ -74,12 +111,8 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
     skip_vp3_string(f)  # "Produced by     Software Ltd"
     count_colors = read_int_16be(f)
     if count_colors is None:
-        return
-    for i in range(0, count_colors):
-        vp3_read_colorblock(f, out, center_x, center_y)
-        if (i + 1) < count_colors:  # Don't add the color change on the final read.
-            out.color_change()
-    out.end()
+        return None
+    return extents, stitch_count, center_x, center_y, count_colors  # type: ignore
 
 
 def vp3_read_colorblock(f: BinaryIO, out: EmbPattern, center_x: float, center_y: float) -> None:
@@ -1,3 +1,4 @@
+import struct
 from typing import BinaryIO, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
@@ -61,3 +62,27 @@ def read(f: BinaryIO, out: EmbPattern, settings: Optional[Any] = None) -> None:
             break
         thread.color = color  # type: ignore
         out.add_thread(thread)  # type: ignore
+
+
+def peek(f: BinaryIO, out: Any, settings: Optional[Any] = None) -> None:
+    header = bytearray(f.read(0x100))
+    if len(header) != 0x100:
+        return
+    # The END command is not counted.
+    out.stitch_count = struct.unpack_from("<I", header, 0x17)[0] + 1
+    num_of_colors = struct.unpack_from("<H", header, 0x27)[0]
+    out.color_count = num_of_colors
+    width, height, _, _, left, bottom = struct.unpack_from("<6h", header, 0x2D)
+    out.extents = (-left, bottom - height, width - left, bottom)
+    # The colors follow the 7F 7F 02 14 end and two padding bytes.
+    end_of_stitches = struct.unpack_from("<I", header, 0xFC)[0]
+    if end_of_stitches < 0x100:
+        return
+    f.seek(end_of_stitches + 6, 0)
+    for i in range(0, num_of_colors):
+        thread = EmbThread()
+        color = read_int_32be(f)
+        if color is None:
+            break
+        thread.color = color
+        out.add_thread(thread)
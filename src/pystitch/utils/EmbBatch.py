@@ -0,0 +1,170 @@
+"""Batch conversion of embroidery files.
+
+convert_many() runs a list of (source, target) conversions on a process pool.
+Jobs are handed to the workers in chunks, a failing job is recorded in its
+ConversionResult and the rest of the batch carries on. The BatchReport gives
+the per job results, the failures and the throughput.
+
+expand_jobs() builds the job list from file names or glob patterns and a list
+of target formats, one job per input and format. python -m pystitch convert
+is the command line front end.
+"""
+
+import glob
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Jobs per chunk are aimed at CHUNKS_PER_WORKER chunks for each worker,
+# within these limits.
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE = 64
+
+
+class ConversionResult:
+    """Outcome of one conversion. error is None on success, otherwise the
+    exception type and message."""
+
+    __slots__ = ("source", "target", "error", "seconds")
+
+    def __init__(self, source: str, target: str, error: Optional[str] = None, seconds: float = 0.0) -> None:
+        self.source = source
+        self.target = target
+        self.error = error
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        return "ConversionResult(%r, %r, error=%r)" % (self.source, self.target, self.error)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchReport:
+    def __init__(self, results: List[ConversionResult], seconds: float, workers: int) -> None:
+        self.results = results
+        self.seconds = seconds
+        self.workers = workers
+
+    def __str__(self) -> str:
+        return self.summary()
+
+    @property
+    def succeeded(self) -> List[ConversionResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[ConversionResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def throughput(self) -> float:
+        """Jobs finished per second of wall time."""
+        if self.seconds <= 0:
+            return 0.0
+        return len(self.results) / self.seconds
+
+    def summary(self) -> str:
+        failed = self.failed
+        lines = [
+            "converted %d of %d files in %.2f s, %.1f files/s on %d worker%s, %d failed"
+            % (
+                len(self.results) - len(failed),
+                len(self.results),
+                self.seconds,
+                self.throughput,
+                self.workers,
+                "" if self.workers == 1 else "s",
+                len(failed),
+            )
+        ]
+        for result in failed:
+            lines.append("  %s -> %s: %s" % (result.source, result.target, result.error))
+        return "\n".join(lines)
+
+
+def expand_jobs(inputs: Iterable[str], formats: Sequence[str], output_dir: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Gives a (source, target) job for every input file and target format.
+    Inputs are file names or glob patterns, ** matches subdirectories. Targets
+    take the source name with the format extension, in output_dir if given,
+    otherwise next to the source. A pattern matching nothing is kept as a
+    job, which then fails with the missing file. Raises ValueError if two
+    sources would be converted to the same target, such as a/x.dst and
+    b/x.pes into one output_dir."""
+    jobs = []
+    seen = set()
+    targets: Dict[str, str] = {}
+    for pattern in inputs:
+        sources = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for source in sources:
+            if source in seen or os.path.isdir(source):
+                continue
+            seen.add(source)
+            directory = output_dir if output_dir is not None else os.path.dirname(source)
+            name = os.path.splitext(os.path.basename(source))[0]
+            for extension in formats:
+                target = os.path.join(directory, "%s.%s" % (name, extension.lower().lstrip(".")))
+                key = os.path.normcase(os.path.abspath(target))
+                if key in targets:
+                    raise ValueError("%s and %s would both be converted to %s" % (targets[key], source, target))
+                targets[key] = source
+                jobs.append((source, target))
+    return jobs
+
+
+def convert_job(job: Tuple[Any, ...], settings: Optional[Dict[str, Any]] = None) -> ConversionResult:
+    """Runs a single (source, target[, settings]) job, capturing any error."""
+    from .. import read, write
+
+    source = job[0]
+    target = job[1]
+    if len(job) > 2 and job[2] is not None:
+        settings = dict(settings or {}, **job[2])
+    start = time.perf_counter()
+    try:
+        if os.path.abspath(source) == os.path.abspath(target):
+            raise IOError("Target is the source file")
+        pattern = read(source, settings)
+        if pattern is None:
+            raise IOError("Conversion from file '%s' is not supported" % source)
+        if os.path.dirname(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        write(pattern, target, settings)  # type: ignore[arg-type]
+    except Exception as e:
+        return ConversionResult(source, target, "%s: %s" % (type(e).__name__, e), time.perf_counter() - start)
+    return ConversionResult(source, target, None, time.perf_counter() - start)
+
+
+def _convert_chunk(chunk: List[Tuple[Any, ...]], settings: Optional[Dict[str, Any]]) -> List[ConversionResult]:
+    return [convert_job(job, settings) for job in chunk]
+
+
+def convert_many(
+    jobs: Iterable[Tuple[Any, ...]],
+    workers: Optional[int] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    chunksize: Optional[int] = None,
+) -> BatchReport:
+    """Converts each (source, target) or (source, target, settings) job, the
+    per job settings update the shared settings. workers defaults to the
+    number of CPUs, with 1 or less the jobs run in this process. Results are
+    in job order."""
+    jobs = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    start = time.perf_counter()
+    if workers == 1:
+        results = _convert_chunk(jobs, settings)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        if chunksize is None:
+            chunksize = max(1, min(MAX_CHUNK_SIZE, len(jobs) // (workers * CHUNKS_PER_WORKER)))
+        chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_results in executor.map(_convert_chunk, chunks, [settings] * len(chunks)):
+                results.extend(chunk_results)
+    return BatchReport(results, time.perf_counter() - start, workers)
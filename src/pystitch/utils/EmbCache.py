@@ -0,0 +1,135 @@
+"""Cache of normalized patterns.
+
+Writing the same pattern repeatedly with the same encoder settings gives the
+same normalized stitches every time. A NormalizationCache keeps recent
+results, keyed by the digest of the stitches, the number of threads and the
+settings values the Transcoder reads, see ENCODER_SETTINGS.
+
+The cache is opt-in, set EmbPattern.normalization_cache to use one for every
+get_normalized_pattern() call:
+
+    EmbPattern.normalization_cache = NormalizationCache(max_entries=64)
+
+Entries are evicted least recently used first, once there are more than
+max_entries or their estimated size exceeds max_bytes. Every lookup takes
+the current stitch digest, list storage is hashed again and compact storage
+only hashes the stitches appended since its last edit.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .EmbEncoder import canonical_settings
+
+# Estimated bytes per stitch of compact storage, three 8 byte columns.
+COMPACT_STITCH_BYTES = 24
+
+
+def estimate_bytes(stitches: Any) -> int:
+    """Approximate memory held by the stitches."""
+    if hasattr(stitches, "command_bytes"):
+        return len(stitches) * COMPACT_STITCH_BYTES
+    if len(stitches) == 0:
+        return sys.getsizeof(stitches)
+    row = stitches[0]
+    row_bytes = sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return sys.getsizeof(stitches) + len(stitches) * row_bytes
+
+
+def _copy_stitches(stitches: Any) -> Any:
+    if hasattr(stitches, "command_bytes"):
+        return stitches[:]
+    return [list(stitch) for stitch in stitches]
+
+
+class NormalizationCache:
+    """Bounded LRU cache of normalized stitches, with hit and miss counters.
+
+    Stored entries are private copies and every lookup hands out a fresh
+    copy, writers are free to modify the pattern they are given."""
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries: 'OrderedDict[Tuple[Any, ...], Tuple[Any, List[Any], int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return "NormalizationCache(entries=%d, bytes=%d, hits=%d, misses=%d, evictions=%d)" % (
+            len(self._entries),
+            self.nbytes,
+            self.hits,
+            self.misses,
+            self.evictions,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def key(self, pattern: Any, settings: Optional[Dict[str, Any]] = None) -> Tuple[Any, ...]:
+        return (
+            pattern._stitch_digest(),
+            len(pattern.threadlist),
+            pattern.compact,
+            repr(tuple(canonical_settings(settings).items())),
+        )
+
+    def lookup(self, pattern: Any, settings: Optional[Dict[str, Any]] = None) -> Any:
+        """Gives the normalized pattern if cached, otherwise None."""
+        key = self.key(pattern, settings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        stitches, threads, _ = entry
+        normal_pattern = type(pattern)()
+        normal_pattern.stitches = _copy_stitches(stitches)
+        normal_pattern.threadlist = [
+            pattern.threadlist[thread] if isinstance(thread, int) else thread for thread in threads
+        ]
+        normal_pattern.extras.update(pattern.extras)
+        return normal_pattern
+
+    def store(self, pattern: Any, settings: Optional[Dict[str, Any]], normal_pattern: Any) -> None:
+        """Keeps a copy of the pattern normalized with these settings."""
+        key = self.key(pattern, settings)
+        # Threads taken from the pattern are kept by index, lookups give the
+        # threads of the pattern they are made for. Filler threads are kept.
+        positions = {id(thread): i for i, thread in reversed(list(enumerate(pattern.threadlist)))}
+        threads = [positions.get(id(thread), thread) for thread in normal_pattern.threadlist]
+        stitches = _copy_stitches(normal_pattern.stitches)
+        nbytes = estimate_bytes(stitches)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._entries[key] = (stitches, threads, nbytes)
+            self.nbytes += nbytes
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted[2]
+                self.evictions += 1
+
+    def normalize(self, pattern: Any, settings: Optional[Dict[str, Any]] = None) -> Any:
+        """Gives the pattern normalized with the settings, transcoding only on a miss."""
+        normal_pattern = self.lookup(pattern, settings)
+        if normal_pattern is None:
+            normal_pattern = pattern._normalize(settings)
+            self.store(pattern, settings, normal_pattern)
+        return normal_pattern
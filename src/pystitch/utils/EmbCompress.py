@@ -1,16 +1,85 @@
-from typing import Optional, List, Union
+import heapq
+from typing import Dict, Optional, List, Tuple, Union
 
-def expand(data: Union[bytes, bytearray], uncompressed_size: Optional[int] = None) -> bytearray:
+WINDOW_SIZE = 0x2000
+MIN_MATCH = 3
+MAX_MATCH = 256  # Characters 256 to 509 are match lengths 3 to 256.
+END_CHARACTER = 510
+MAX_CODE_LENGTH = 16  # Codes are looked up from 16 bit peeks.
+MAX_BLOCK_ELEMENTS = 0xFFFF
+
+# Match search per compression level: (max_chain, lazy, nice_length)
+COMPRESSION_LEVELS = (
+    (0, False, 0),  # Huffman coded literals only.
+    (4, False, 8),
+    (8, False, 16),
+    (16, False, 32),
+    (16, True, 32),
+    (32, True, 64),
+    (64, True, 128),
+    (128, True, 256),
+    (256, True, 256),
+    (1024, True, 256),
+)
+
+
+def expand(data: Union[bytes, bytearray, memoryview], uncompressed_size: Optional[int] = None) -> bytearray:
     emb_compress = EmbCompress()
     return emb_compress.decompress(data, uncompressed_size)
 
 
-def compress(data: Union[bytes, bytearray]) -> bytearray:
-    size = len(data)
-    return (
-        bytearray([(size >> 0) & 0xFF, (size >> 8) & 0xFF, 0x02, 0xA0, 0x01, 0xFE])
-        + data
-    )
+def compress(data: Union[bytes, bytearray, memoryview], level: int = 6) -> bytearray:
+    """Compresses data for HUS/VIP, level 0 to 9 trades speed for size."""
+    emb_compressor = EmbCompressor(level)
+    return emb_compressor.compress(data)
+
+
+def huffman_code_lengths(frequencies: List[int], max_length: int = MAX_CODE_LENGTH) -> List[int]:
+    """Huffman code lengths for the frequencies, none longer than max_length.
+    Unused symbols get length 0."""
+    lengths = [0] * len(frequencies)
+    used = [i for i, frequency in enumerate(frequencies) if frequency > 0]
+    if len(used) == 0:
+        return lengths
+    if len(used) == 1:
+        lengths[used[0]] = 1
+        return lengths
+    weights = [frequencies[i] for i in used]
+    while True:
+        heap = [(weight, node) for node, weight in enumerate(weights)]
+        heapq.heapify(heap)
+        parent = [0] * (2 * len(weights) - 1)
+        node = len(weights)
+        while len(heap) > 1:
+            weight1, node1 = heapq.heappop(heap)
+            weight2, node2 = heapq.heappop(heap)
+            parent[node1] = node
+            parent[node2] = node
+            heapq.heappush(heap, (weight1 + weight2, node))
+            node += 1
+        depth = [0] * node
+        for n in range(node - 2, -1, -1):
+            depth[n] = depth[parent[n]] + 1
+        if max(depth[:len(weights)]) <= max_length:
+            break
+        # Flatten the frequencies until the tree is shallow enough.
+        weights = [(weight + 1) >> 1 for weight in weights]
+    for i, symbol in enumerate(used):
+        lengths[symbol] = depth[i]
+    return lengths
+
+
+def huffman_codes(lengths: List[int]) -> List[int]:
+    """Canonical codes for the lengths, in the order Huffman.build_table reads them."""
+    codes = [0] * len(lengths)
+    code = 0
+    for bit_length in range(1, max(lengths, default=0) + 1):
+        for symbol, length in enumerate(lengths):
+            if length == bit_length:
+                codes[symbol] = code
+                code += 1
+        code <<= 1
+    return codes
 
 
 class Huffman:
@@ -19,22 +88,36 @@ class Huffman:
         self.lengths = lengths
         self.table: Optional[List[int]] = None
         self.table_width = 0
+        self.flat_table: Optional[List[Optional[Tuple[int, int]]]] = None
+        if lengths is None:
+            self.flat_table = [(value, 0)]
 
     def build_table(self) -> None:
         """Build an index huffman table based on the lengths. lowest index value wins in a tie."""
         if self.lengths is None:
             return
         self.table_width = max(self.lengths)
-        self.table = []
-        size = 1 << self.table_width
-        for bit_length in range(1, self.table_width + 1):
-            size /= 2.0
-            for len_index in range(0, len(self.lengths)):
-                length = self.lengths[len_index]
-                if length == bit_length:
-                    self.table += [len_index] * int(size)
-
-    def lookup(self, byte_lookup: int) -> tuple[int, int]:
+        by_length: List[List[int]] = [[] for _ in range(self.table_width + 1)]
+        for len_index, length in enumerate(self.lengths):
+            if length > 0:
+                by_length[length].append(len_index)
+        self.table = [
+            len_index
+            for bit_length in range(1, self.table_width + 1)
+            for len_index in by_length[bit_length]
+            for _ in range(1 << (self.table_width - bit_length))
+        ]
+        self.flat_table = None
+        if self.table_width <= 16:
+            # Flat (value, length) entries indexed by the next table_width bits.
+            # Codes missing from an incomplete table are None.
+            size = 1 << self.table_width
+            lengths = self.lengths
+            flat: List[Optional[Tuple[int, int]]] = [(v, lengths[v]) for v in self.table[:size]]
+            flat.extend([None] * (size - len(flat)))
+            self.flat_table = flat
+
+    def lookup(self, byte_lookup: int) -> Tuple[int, int]:
         """lookup into the index, returns value and length
         must be requested with 2 bytes."""
         if self.table is None:
@@ -44,12 +127,41 @@ class Huffman:
 
 
 class EmbCompress:
+    """Decompressor for the LZ77 and Huffman compression used by HUS and VIP.
+
+    Bits are read most significant first through a reservoir which is refilled
+    64 bits at a time, so peeking and popping are shifts and masks rather than
+    rebuilding integers from bytes."""
+
     def __init__(self) -> None:
         self.bit_position = 0
-        self.input_data: Optional[Union[bytes, bytearray]] = None
+        self.input_data: Optional[Union[bytes, bytearray, memoryview]] = None
         self.block_elements: Optional[int] = None
         self.character_huffman: Optional[Huffman] = None
         self.distance_huffman: Optional[Huffman] = None
+        self._data = b""
+        self._reservoir = 0
+        self._reservoir_bits = 0
+        self._next_byte = 0
+
+    def _set_input(self, input_data: Union[bytes, bytearray, memoryview]) -> None:
+        self.input_data = input_data
+        self._data = bytes(input_data)
+        self._reservoir = 0
+        self._reservoir_bits = 0
+        self._next_byte = 0
+        self.bit_position = 0
+
+    def _refill(self) -> None:
+        """Loads the next 64 bits into the reservoir, zeros past the end of the data."""
+        start = self._next_byte
+        chunk = self._data[start:start + 8]
+        if len(chunk) != 8:
+            chunk += bytes(8 - len(chunk))
+        self._next_byte = start + 8
+        bits = self._reservoir_bits
+        self._reservoir = ((self._reservoir & ((1 << bits) - 1)) << 64) | int.from_bytes(chunk, "big")
+        self._reservoir_bits = bits + 64
 
     def get_bits(self, start_pos_in_bits: int, length: int) -> int:
         end_pos_in_bits = start_pos_in_bits + length - 1
@@ -74,11 +186,28 @@ class EmbCompress:
         return value
 
     def peek(self, bit_count: int) -> int:
-        return self.get_bits(self.bit_position, bit_count)
+        while self._reservoir_bits < bit_count:
+            self._refill()
+        return (self._reservoir >> (self._reservoir_bits - bit_count)) & ((1 << bit_count) - 1)
 
     def slide(self, bit_count: int) -> None:
+        while self._reservoir_bits < bit_count:
+            self._refill()
+        self._reservoir_bits -= bit_count
         self.bit_position += bit_count
 
+    def lookup(self, huffman: Huffman) -> int:
+        """Decodes the next huffman code from the input."""
+        flat_table = huffman.flat_table
+        if flat_table is not None:
+            h = flat_table[self.peek(huffman.table_width)]
+            if h is not None:
+                self.slide(h[1])
+                return h[0]
+        h = huffman.lookup(self.peek(16))
+        self.slide(h[1])
+        return h[0]
+
     def read_variable_length(self):
         m = self.pop(3)
         if m != 7:
@@ -119,9 +248,7 @@ class EmbCompress:
             huffman_code_lengths = [0] * count
             index = 0
             while index < count:
-                h = length_huffman.lookup(self.peek(16))  # type: ignore
-                c = h[0]  # type: ignore
-                self.slide(h[1])  # type: ignore
+                c = self.lookup(length_huffman)
                 if c == 0:  # C == 0, skip 1.
                     c = 1
                     index += c
@@ -164,44 +291,351 @@ class EmbCompress:
         if self.block_elements <= 0:  # type: ignore
             self.load_block()
         self.block_elements -= 1  # type: ignore
-        h = self.character_huffman.lookup(self.peek(16))  # type: ignore
-        self.slide(h[1])  # type: ignore
-        return h[0]  # type: ignore
+        return self.lookup(self.character_huffman)  # type: ignore
 
     def get_position(self) -> int:
-        h = self.distance_huffman.lookup(self.peek(16))  # type: ignore
-        self.slide(h[1])  # type: ignore
-        if h[0] == 0:  # type: ignore
+        v = self.lookup(self.distance_huffman)  # type: ignore
+        if v == 0:
             return 0
-        v = h[0] - 1  # type: ignore
-        v = (1 << v) + self.pop(v)  # type: ignore
-        return v  # type: ignore
+        v -= 1
+        v = (1 << v) + self.pop(v)
+        return v
 
-    def decompress(self, input_data: Union[bytes, bytearray], uncompressed_size: Optional[int] = None) -> bytearray:  # type: ignore[misc]
-        self.input_data = input_data
-        output_data: List[int] = []
+    def decompress(self, input_data: Union[bytes, bytearray, memoryview], uncompressed_size: Optional[int] = None) -> bytearray:  # type: ignore[misc]
+        self._set_input(input_data)
+        data = self._data
+        output_data = bytearray()
+        append = output_data.append
         self.block_elements = -1
-        bits_total = len(input_data) * 8
-        while bits_total > self.bit_position and (
+        bits_total = len(data) * 8
+        # The reservoir state is kept in locals and written back around the
+        # method calls that read block headers or decode wide codes.
+        reservoir = bits = bit_position = next_byte = 0
+        character_huffman = distance_huffman = None
+        character_table = distance_table = None
+        character_width = distance_width = 0
+        while bits_total > bit_position and (
             uncompressed_size is None or len(output_data) <= uncompressed_size
         ):
-            character = self.get_token()
+            if self.block_elements <= 0:  # type: ignore
+                self._reservoir, self._reservoir_bits = reservoir, bits
+                self.bit_position, self._next_byte = bit_position, next_byte
+                self.load_block()
+                reservoir, bits = self._reservoir, self._reservoir_bits
+                bit_position, next_byte = self.bit_position, self._next_byte
+                character_huffman = self.character_huffman
+                distance_huffman = self.distance_huffman
+                character_table = character_huffman.flat_table  # type: ignore
+                character_width = character_huffman.table_width  # type: ignore
+                distance_table = distance_huffman.flat_table  # type: ignore
+                distance_width = distance_huffman.table_width  # type: ignore
+            self.block_elements -= 1  # type: ignore
+            if bits < 64:
+                # A token, distance code and distance bits fit within 64 bits.
+                chunk = data[next_byte:next_byte + 8]
+                if len(chunk) != 8:
+                    chunk += bytes(8 - len(chunk))
+                next_byte += 8
+                reservoir = ((reservoir & ((1 << bits) - 1)) << 64) | int.from_bytes(chunk, "big")
+                bits += 64
+
+            h = None
+            if character_table is not None:
+                h = character_table[(reservoir >> (bits - character_width)) & ((1 << character_width) - 1)]
+            if h is None:
+                self._reservoir, self._reservoir_bits = reservoir, bits
+                self.bit_position, self._next_byte = bit_position, next_byte
+                character = self.lookup(character_huffman)  # type: ignore
+                if self._reservoir_bits < 64:
+                    self._refill()
+                reservoir, bits = self._reservoir, self._reservoir_bits
+                bit_position, next_byte = self.bit_position, self._next_byte
+            else:
+                character = h[0]
+                bits -= h[1]
+                bit_position += h[1]
+
             if character <= 255:  # literal.
-                output_data.append(character)  # type: ignore
-            elif character == 510:
+                append(character)
+                continue
+            if character == 510:
                 break  # END
+            length = character - 253  # Min length is 3. 256-253=3.
+
+            h = None
+            if distance_table is not None:
+                h = distance_table[(reservoir >> (bits - distance_width)) & ((1 << distance_width) - 1)]
+            if h is None:
+                self._reservoir, self._reservoir_bits = reservoir, bits
+                self.bit_position, self._next_byte = bit_position, next_byte
+                v = self.lookup(distance_huffman)  # type: ignore
+                reservoir, bits = self._reservoir, self._reservoir_bits
+                bit_position, next_byte = self.bit_position, self._next_byte
             else:
-                length = character - 253  # Min length is 3. 256-253=3.  # type: ignore
-                back = self.get_position() + 1
-                position = len(output_data) - back  # type: ignore
-                if back > length:  # type: ignore
-                    # Entire lookback is already within output data.
-                    output_data += output_data[position : position + length]  # type: ignore
+                v = h[0]
+                bits -= h[1]
+                bit_position += h[1]
+            if v == 0:
+                back = 1
+            else:
+                v -= 1
+                while bits < v:
+                    chunk = data[next_byte:next_byte + 8]
+                    if len(chunk) != 8:
+                        chunk += bytes(8 - len(chunk))
+                    next_byte += 8
+                    reservoir = ((reservoir & ((1 << bits) - 1)) << 64) | int.from_bytes(chunk, "big")
+                    bits += 64
+                bits -= v
+                bit_position += v
+                back = (1 << v) + ((reservoir >> bits) & ((1 << v) - 1)) + 1
+
+            position = len(output_data) - back
+            if back > length:
+                # Entire lookback is already within output data.
+                output_data += output_data[position : position + length]
+            elif position >= 0:
+                # Will read & write the same data, the last back bytes repeat.
+                repeat = output_data[position:]
+                output_data += (repeat * (length // back + 1))[:length]
+            else:
+                for i in range(position, position + length):
+                    append(output_data[i])
+        self._reservoir, self._reservoir_bits = reservoir, bits
+        self.bit_position, self._next_byte = bit_position, next_byte
+        return output_data
+
+
+class EmbCompressor:
+    """Compressor producing streams read by EmbCompress.
+
+    Matches are found with hash chains over 3 byte prefixes within an 8k
+    window, then each block of tokens is written with its own Huffman
+    tables. The stream ends with the end character."""
+
+    def __init__(self, level: int = 6) -> None:
+        level = min(max(level, 0), len(COMPRESSION_LEVELS) - 1)
+        self.max_chain, self.lazy, self.nice_length = COMPRESSION_LEVELS[level]
+        self.output_data = bytearray()
+        self._value = 0
+        self._bits = 0
+
+    def push(self, value: int, bit_count: int) -> None:
+        self._value = (self._value << bit_count) | value
+        self._bits += bit_count
+        if self._bits >= 64:
+            count = self._bits >> 3
+            self._bits &= 7
+            self.output_data += (self._value >> self._bits).to_bytes(count, "big")
+            self._value &= (1 << self._bits) - 1
+
+    def flush(self) -> None:
+        padding = -self._bits % 8
+        self.push(0, padding)
+        self.output_data += self._value.to_bytes(self._bits >> 3, "big")
+        self._value = 0
+        self._bits = 0
+
+    def write_variable_length(self, m: int) -> None:
+        if m < 7:
+            self.push(m, 3)
+            return
+        self.push(7, 3)
+        ones = m - 7
+        if ones < 13:
+            self.push(((1 << ones) - 1) << 1, ones + 1)
+        else:
+            self.push((1 << 13) - 1, 13)
+
+    def write_character_length_huffman(self, frequencies: List[int]) -> List[int]:
+        lengths = huffman_code_lengths(frequencies)
+        count = len(lengths)
+        while count > 0 and lengths[count - 1] == 0:
+            count -= 1
+        if len([length for length in lengths if length != 0]) <= 1:
+            self.push(0, 5)
+            self.push(lengths.index(1) if count else 0, 5)
+            return [0] * len(lengths)
+        self.push(count, 5)
+        index = 0
+        while index < count:
+            if index == 3:  # Special index 3, skip up to 3 elements.
+                skip = 0
+                while skip < 3 and lengths[3 + skip] == 0:
+                    skip += 1
+                self.push(skip, 2)
+                index += skip
+            self.write_variable_length(lengths[index])
+            index += 1
+        return lengths
+
+    def write_character_huffman(self, frequencies: List[int]) -> List[int]:
+        lengths = huffman_code_lengths(frequencies)
+        count = len(lengths)
+        while count > 0 and lengths[count - 1] == 0:
+            count -= 1
+        if len([length for length in lengths if length != 0]) <= 1:
+            self.push(0, 5)  # Empty character length huffman.
+            self.push(0, 5)
+            self.push(0, 9)
+            self.push(lengths.index(1), 9)
+            return [0] * len(lengths)
+        # Code the lengths as character length symbols: 0 skips 1, 1 skips
+        # 3 + read(4), 2 skips 20 + read(9), otherwise length + 2.
+        symbols: List[Tuple[int, int, int]] = []
+        index = 0
+        while index < count:
+            length = lengths[index]
+            if length != 0:
+                symbols.append((length + 2, 0, 0))
+                index += 1
+                continue
+            run = 1
+            while index + run < count and lengths[index + run] == 0:
+                run += 1
+            index += run
+            while run > 0:
+                if run >= 20:
+                    skip = min(run, 20 + 0x1FF)
+                    symbols.append((2, skip - 20, 9))
+                elif run >= 3:
+                    skip = min(run, 3 + 0xF)
+                    symbols.append((1, skip - 3, 4))
                 else:
-                    # Will read & write the same data at some point.
-                    for i in range(position, position + length):  # type: ignore
-                        output_data.append(output_data[i])
-        return bytearray(output_data)
+                    skip = 1
+                    symbols.append((0, 0, 0))
+                run -= skip
+        length_frequencies = [0] * (MAX_CODE_LENGTH + 3)
+        for symbol, _, _ in symbols:
+            length_frequencies[symbol] += 1
+        length_lengths = self.write_character_length_huffman(length_frequencies)
+        length_codes = huffman_codes(length_lengths)
+        self.push(count, 9)
+        for symbol, extra, extra_bits in symbols:
+            self.push(length_codes[symbol], length_lengths[symbol])
+            self.push(extra, extra_bits)
+        return lengths
+
+    def write_distance_huffman(self, frequencies: List[int]) -> List[int]:
+        lengths = huffman_code_lengths(frequencies)
+        count = len(lengths)
+        while count > 0 and lengths[count - 1] == 0:
+            count -= 1
+        if len([length for length in lengths if length != 0]) <= 1:
+            self.push(0, 5)
+            self.push(lengths.index(1) if count else 0, 5)
+            return [0] * len(lengths)
+        self.push(count, 5)
+        for index in range(0, count):
+            self.write_variable_length(lengths[index])
+        return lengths
+
+    def write_block(self, tokens: List[Tuple[int, int]]) -> None:
+        character_frequencies = [0] * (END_CHARACTER + 1)
+        distance_frequencies = [0] * (WINDOW_SIZE - 1).bit_length()
+        distance_frequencies.append(0)
+        for character, position in tokens:
+            character_frequencies[character] += 1
+            if position >= 0:
+                distance_frequencies[position.bit_length()] += 1
+        self.push(len(tokens), 16)
+        character_lengths = self.write_character_huffman(character_frequencies)
+        distance_lengths = self.write_distance_huffman(distance_frequencies)
+        character_codes = huffman_codes(character_lengths)
+        distance_codes = huffman_codes(distance_lengths)
+        push = self.push
+        for character, position in tokens:
+            push(character_codes[character], character_lengths[character])
+            if position < 0:
+                continue
+            v = position.bit_length()
+            push(distance_codes[v], distance_lengths[v])
+            if v > 1:
+                push(position - (1 << (v - 1)), v - 1)
+
+    def find_tokens(self, data: bytes) -> List[Tuple[int, int]]:
+        """LZ77 tokens as (character, position). Position is the match
+        distance - 1 for lengths and -1 for literals."""
+        size = len(data)
+        tokens: List[Tuple[int, int]] = []
+        if self.max_chain == 0:
+            return [(c, -1) for c in data]
+        head: Dict[bytes, int] = {}
+        previous = [-1] * size
+        max_chain = self.max_chain
+        nice_length = self.nice_length
+
+        def insert(i: int) -> None:
+            key = data[i:i + MIN_MATCH]
+            previous[i] = head.get(key, -1)
+            head[key] = i
+
+        def longest_match(i: int) -> Tuple[int, int]:
+            limit = min(MAX_MATCH, size - i)
+            best_length = MIN_MATCH - 1
+            best_position = -1
+            if limit < MIN_MATCH:
+                return 0, -1
+            j = head.get(data[i:i + MIN_MATCH], -1)
+            chain = max_chain
+            while j >= 0 and i - j <= WINDOW_SIZE and chain > 0:
+                chain -= 1
+                if data[j + best_length] == data[i + best_length]:
+                    # Longest common prefix by halving steps over slices.
+                    length = 0
+                    step = 256
+                    while step:
+                        if length + step <= limit and data[i + length:i + length + step] == data[j + length:j + length + step]:
+                            length += step
+                        step >>= 1
+                    if length > best_length:
+                        best_length = length
+                        best_position = i - j - 1
+                        if length >= nice_length or length == limit:
+                            break
+                j = previous[j]
+            if best_position < 0:
+                return 0, -1
+            if best_length == MIN_MATCH and best_position >= WINDOW_SIZE >> 1:
+                return 0, -1  # Too far to pay off over literals.
+            return best_length, best_position
+
+        i = 0
+        pending = None
+        while i < size:
+            if pending is None:
+                match = longest_match(i)
+            else:
+                match = pending
+                pending = None
+            insert(i)
+            length, position = match
+            if length == 0:
+                tokens.append((data[i], -1))
+                i += 1
+                continue
+            if self.lazy and length < nice_length and i + 1 < size:
+                next_match = longest_match(i + 1)
+                if next_match[0] > length:
+                    tokens.append((data[i], -1))
+                    i += 1
+                    pending = next_match
+                    continue
+            tokens.append((length + (256 - MIN_MATCH), position))
+            for k in range(i + 1, min(i + length, size - MIN_MATCH + 1)):
+                insert(k)
+            i += length
+        return tokens
+
+    def compress(self, input_data: Union[bytes, bytearray, memoryview]) -> bytearray:
+        tokens = self.find_tokens(bytes(input_data))
+        tokens.append((END_CHARACTER, -1))
+        for start in range(0, len(tokens), MAX_BLOCK_ELEMENTS):
+            self.write_block(tokens[start:start + MAX_BLOCK_ELEMENTS])
+        self.flush()
+        output_data = self.output_data
+        self.output_data = bytearray()
+        return output_data
 
 
-__all__ = ['expand', 'compress', 'Huffman', 'EmbCompress']
+__all__ = ['expand', 'compress', 'Huffman', 'EmbCompress', 'EmbCompressor']
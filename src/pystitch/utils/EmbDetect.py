@@ -0,0 +1,122 @@
+"""Content based detection of embroidery file formats.
+
+Only the first PROBE_SIZE bytes of a file are read. They are matched against
+the headers the readers expect, giving the candidate formats ranked best first
+by how specific the match is. No stitches are decoded.
+"""
+
+import os
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROBE_SIZE = 512
+
+# Scores, a unique magic string outranks a header layout that fits, which
+# outranks content the reader would merely accept.
+MAGIC = 100
+HEADER = 50
+PLAUSIBLE = 10
+
+# (offset, signature, extension, score)
+SIGNATURES: Tuple[Tuple[int, bytes, str, int], ...] = (
+    (0, b"#PEC0001", "pec", MAGIC),
+    (0, b"#PEC0001", "pes", MAGIC - 1),  # The PES reader also reads bare PEC.
+    (0, b"#PES", "pes", MAGIC),
+    (0, b"%vsm%", "vp3", MAGIC),
+    (0, b"#PMV", "pmv", MAGIC),
+    (0, b"#PHB", "phb", MAGIC),
+    (0, b"StitchV2", "iqp", MAGIC),
+    (0, b"\x5b\xaf\xc8\x00", "hus", MAGIC),
+    (0, b"Embroidery disk created using software licensed from Viking", "shv", MAGIC),
+    (0, b'"#","[VAR_NAME]"', "csv", MAGIC),
+    (0x80, b"LA:", "tbf", MAGIC),
+    (0, b"LA:", "dst", MAGIC),
+    (0, b"LA:", "dsb", HEADER),  # Same header as DST, other stitch encodings.
+    (0, b"LA:", "dsz", HEADER),
+    (0, b"STX", "stx", HEADER),
+)
+
+
+def _check_jef(header: bytes) -> int:
+    # Stitches start after the 0x74 byte header and 8 bytes per color.
+    if len(header) < 28:
+        return 0
+    stitch_offset, colors = struct.unpack_from("<i20xi", header)
+    if 0 <= colors < 0x100 and stitch_offset == 0x74 + 8 * colors:
+        return HEADER
+    return 0
+
+
+def _check_u01(header: bytes) -> int:
+    # Stitches are 3 byte records after a 0x100 header, the control byte has the high bit set.
+    controls = header[0x100:len(header) - (len(header) - 0x100) % 3:3]
+    if len(controls) >= 16 and all(ctrl & 0x80 for ctrl in controls):
+        return HEADER
+    return 0
+
+
+def _check_xxx(header: bytes) -> int:
+    # Zero padding around the stitch count at 0x17 and before the color count at 0x27.
+    if len(header) < 0x2B or any(header[0:0x17]) or any(header[0x1B:0x27]):
+        return 0
+    return HEADER
+
+
+def _check_json(header: bytes) -> int:
+    if not header.lstrip().startswith(b"{"):
+        return 0
+    if b'"threadlist"' in header or b'"stitches"' in header:
+        return HEADER
+    return PLAUSIBLE
+
+
+# (extension, check) where check scores the header, 0 for no match.
+CHECKS: Tuple[Tuple[str, Callable[[bytes], int]], ...] = (
+    ("jef", _check_jef),
+    ("u01", _check_u01),
+    ("xxx", _check_xxx),
+    ("json", _check_json),
+)
+
+
+def rank_formats(header: bytes, extension: Optional[str] = None) -> List[Tuple[str, int]]:
+    """Scores the formats whose headers match, best first. Equal scores are
+    ordered by the given extension, then by SIGNATURES and CHECKS order."""
+    header = bytes(header[:PROBE_SIZE])
+    scores: Dict[str, int] = {}
+    for offset, signature, name, score in SIGNATURES:
+        if header.startswith(signature, offset) and score > scores.get(name, 0):
+            scores[name] = score
+    for name, check in CHECKS:
+        score = check(header)
+        if score > scores.get(name, 0):
+            scores[name] = score
+    order = list(scores)
+    return sorted(
+        scores.items(),
+        key=lambda item: (-item[1], item[0] != extension, order.index(item[0])),
+    )
+
+
+def read_probe(f: Any) -> bytes:
+    """Reads the first PROBE_SIZE bytes of a path, or of a stream from its
+    current position. A seekable stream is returned to that position."""
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, "rb") as stream:
+            return stream.read(PROBE_SIZE)
+    position = f.tell() if f.seekable() else None
+    header = f.read(PROBE_SIZE)
+    if position is not None:
+        f.seek(position)
+    if isinstance(header, str):
+        header = header.encode("utf-8", errors="ignore")
+    return bytes(header)
+
+
+def detect_format(f: Any) -> List[str]:
+    """Gives the extensions of the formats the file content matches, best
+    first, or an empty list. f is a path or a binary stream."""
+    extension = None
+    if isinstance(f, (str, os.PathLike)):
+        extension = os.path.splitext(f)[1][1:].lower()
+    return [name for name, score in rank_formats(read_probe(f), extension)]
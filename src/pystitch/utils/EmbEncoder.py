@@ -1,8 +1,12 @@
 import math
-from typing import Optional, Dict, Any, List, cast
+import re
+from array import array
+from itertools import accumulate, repeat
+from typing import Optional, Dict, Any, Iterator, List, Tuple, cast
 
 from .EmbFunctions import encode_thread_change, decode_embroidery_command
 from .EmbMatrix import EmbMatrix
+from ..core.EmbStitchArray import EmbStitchArray
 from ..core.EmbConstant import (
     COMMAND_MASK, FLAGS_MASK, NO_COMMAND, STITCH, JUMP, TRIM, STOP, END,
     COLOR_CHANGE, NEEDLE_SET, SET_CHANGE_SEQUENCE, SLOW, FAST,
@@ -20,6 +24,114 @@ from ..core.EmbConstant import (
     CONTINGENCY_SEQUIN_JUMP, CONTINGENCY_SEQUIN_STITCH, CONTINGENCY_SEQUIN_REMOVE
 )
 
+# Settings read by the Transcoder and their defaults. Patterns normalized with
+# equal values for these are equal, whatever else the settings hold.
+ENCODER_SETTINGS: Dict[str, Any] = {
+    "max_stitch": float("inf"),
+    "max_jump": float("inf"),
+    "full_jump": False,
+    "round": False,
+    "needle_count": 5,
+    "thread_change_command": COLOR_CHANGE,
+    "strip_sequins": True,
+    "sequin_contingency": None,  # Follows strip_sequins when not set.
+    "writes_speeds": True,
+    "explicit_trim": False,
+    "tie_on": CONTINGENCY_TIE_ON_NONE,
+    "tie_off": CONTINGENCY_TIE_OFF_NONE,
+    "long_stitch_contingency": CONTINGENCY_LONG_STITCH_JUMP_NEEDLE,
+    "translate": None,
+    "scale": None,
+    "rotate": None,
+}
+
+
+def canonical_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Gives the ENCODER_SETTINGS values of the settings, defaults filled in."""
+    if settings is None:
+        settings = {}
+    return {name: settings.get(name, default) for name, default in ENCODER_SETTINGS.items()}
+
+
+# Transcoder method handling each command, called with the needle position the
+# stitch maps to. A handler returning True ends the transcode.
+COMMAND_HANDLERS: Dict[int, str] = {
+    STITCH: "handle_stitch",
+    NEEDLE_AT: "handle_needle_at",
+    SEW_TO: "handle_sew_to",
+    # Middle Level Commands.
+    STITCH_BREAK: "handle_stitch_break",
+    FRAME_EJECT: "handle_frame_eject",
+    SEQUENCE_BREAK: "handle_trim",
+    COLOR_BREAK: "handle_color_break",
+    TIE_OFF: "handle_tie_off",
+    TIE_ON: "handle_tie_on",
+    # Core Commands.
+    TRIM: "handle_trim",
+    JUMP: "handle_jump",
+    SEQUIN_MODE: "handle_sequin_mode",
+    SEQUIN_EJECT: "handle_sequin_eject",
+    COLOR_CHANGE: "handle_thread_change",
+    NEEDLE_SET: "handle_thread_change",
+    STOP: "handle_stop",
+    SLOW: "handle_slow",
+    FAST: "handle_fast",
+    END: "handle_end",
+    # On-the-fly Settings Commands.
+    CONTINGENCY_TIE_ON_THREE_SMALL: "handle_tie_on_contingency",
+    CONTINGENCY_TIE_ON_NONE: "handle_tie_on_contingency",
+    CONTINGENCY_TIE_OFF_THREE_SMALL: "handle_tie_off_contingency",
+    CONTINGENCY_TIE_OFF_NONE: "handle_tie_off_contingency",
+    OPTION_MAX_JUMP_LENGTH: "handle_max_jump",
+    OPTION_MAX_STITCH_LENGTH: "handle_max_stitch",
+    OPTION_EXPLICIT_TRIM: "handle_explicit_trim",
+    OPTION_IMPLICIT_TRIM: "handle_implicit_trim",
+    CONTINGENCY_LONG_STITCH_NONE: "handle_long_stitch_contingency",
+    CONTINGENCY_LONG_STITCH_JUMP_NEEDLE: "handle_long_stitch_contingency",
+    CONTINGENCY_LONG_STITCH_SEW_TO: "handle_long_stitch_contingency",
+    CONTINGENCY_SEQUIN_REMOVE: "handle_sequin_contingency",
+    CONTINGENCY_SEQUIN_STITCH: "handle_sequin_contingency",
+    CONTINGENCY_SEQUIN_JUMP: "handle_sequin_contingency",
+    CONTINGENCY_SEQUIN_UTILIZE: "handle_sequin_utilize",
+    MATRIX_TRANSLATE: "handle_matrix_translate",
+    MATRIX_SCALE_ORIGIN: "handle_matrix_scale_origin",
+    MATRIX_ROTATE_ORIGIN: "handle_matrix_rotate_origin",
+    MATRIX_SCALE: "handle_matrix_scale",
+    MATRIX_ROTATE: "handle_matrix_rotate",
+    MATRIX_RESET: "handle_matrix_reset",
+}
+
+THREAD_CHANGE_COMMANDS = (SET_CHANGE_SEQUENCE, NEEDLE_SET, COLOR_CHANGE, COLOR_BREAK)
+SEWING_COMMANDS = (STITCH, SEW_TO, NEEDLE_AT, SEQUIN_EJECT)
+_THREAD_CHANGE_PATTERN = re.compile(b"[" + re.escape(bytes(THREAD_CHANGE_COMMANDS)) + b"]")
+
+
+def thread_change_index(stitches: Any) -> Tuple[int, List[int]]:
+    """Gives the position of the first sewing command, len(stitches) if there
+    is none, and the positions of the thread change commands."""
+    if hasattr(stitches, "command_bytes"):
+        commands = stitches.command_bytes()
+    else:
+        commands = bytes([stitch[2] & COMMAND_MASK for stitch in stitches])
+    first_sewing = len(commands)
+    for command in SEWING_COMMANDS:
+        position = commands.find(command, 0, first_sewing)
+        if position != -1:
+            first_sewing = position
+    return first_sewing, [match.start() for match in _THREAD_CHANGE_PATTERN.finditer(commands)]
+
+
+def matrix_translation(m: Any) -> Optional[Tuple[float, float]]:
+    """Gives tx, ty if the matrix only translates, otherwise None. Adding them
+    to finite coordinates gives the same values as point_in_matrix_space."""
+    if m[0] == 1 and m[1] == 0 and m[3] == 0 and m[4] == 1:
+        tx = m[6]
+        ty = m[7]
+        # x + -0.0 keeps the sign of x = -0.0, the full product would not.
+        if (tx or math.copysign(1, tx) > 0) and (ty or math.copysign(1, ty) > 0):
+            return tx, ty
+    return None
+
 
 class Transcoder:
     def __init__(self, settings: Optional[Dict[str, Any]] = None) -> None:
@@ -86,6 +198,7 @@ class Transcoder:
             self.matrix.post_rotate(rotate)  # type: ignore[misc]
         self.source_pattern: Any = None
         self.destination_pattern: Any = None
+        self.destination_stitches: Any = None
         self.position = 0
         self.order_index = -1
         self.change_sequence = {}
@@ -96,6 +209,7 @@ class Transcoder:
         self.needle_x = 0
         self.needle_y = 0
         self.high_flags = 0
+        self.translation: Optional[Tuple[float, float]] = None
 
     def transcode(self, source_pattern: Any, destination_pattern: Any) -> Any:
         if source_pattern is destination_pattern:
@@ -104,10 +218,36 @@ class Transcoder:
             destination_pattern.clear()
         self.source_pattern = source_pattern
         self.destination_pattern = destination_pattern
+        self.destination_stitches = destination_pattern.stitches
         self.transcode_metadata()
         self.transcode_main()
         return destination_pattern
 
+    def transcode_stream(self, source_pattern: Any, destination_pattern: Any) -> Iterator[List[Any]]:
+        """Transcodes lazily, returning a generator of normalized [x, y, cmd] records.
+
+        The destination pattern receives the metadata and the threads but not the
+        stitches. Threads are appended as the records are consumed, so the
+        threadlist is only complete once the generator is exhausted."""
+        if source_pattern is destination_pattern:
+            source_pattern = destination_pattern.copy()
+            destination_pattern.clear()
+        self.source_pattern = source_pattern
+        self.destination_pattern = destination_pattern
+        self.destination_stitches = []
+        self.transcode_metadata()
+        return self.stream_main()
+
+    def stream_main(self) -> Iterator[List[Any]]:
+        """Yields the records added for each source stitch as soon as it is processed."""
+        stitches = self.destination_stitches
+        for _ in self.transcode_steps():
+            if stitches:
+                yield from stitches
+                del stitches[:]
+        yield from stitches
+        del stitches[:]
+
     def transcode_metadata(self):
         """Transcodes metadata, (just moves)"""
         source = self.source_pattern.extras
@@ -120,20 +260,15 @@ class Transcoder:
         is indexed as 1. If the first event is a discrete event, occurring before
         the sewing starts it's indexed as zero."""
         source = self.source_pattern.stitches
+        first_sewing, positions = thread_change_index(source)
         current_index: Optional[int] = 0
-        for stitch in source:
-            flags, thread, needle, order = decode_embroidery_command(stitch[2])
-            if current_index == 0:
-                if (
-                    flags == STITCH
-                    or flags == SEW_TO
-                    or flags == NEEDLE_AT
-                    or flags == SEQUIN_EJECT
-                ):
-                    current_index = 1
+        for position in positions:
+            flags, thread, needle, order = decode_embroidery_command(source[position][2])
+            if current_index == 0 and first_sewing < position:
+                current_index = 1
             if flags == SET_CHANGE_SEQUENCE:
                 yield flags, thread, needle, order, None
-            elif flags == NEEDLE_SET or flags == COLOR_CHANGE or flags == COLOR_BREAK:
+            else:
                 yield flags, thread, needle, order, current_index
                 if current_index is not None:  # type: ignore[unreachable]
                     current_index += 1
@@ -208,7 +343,11 @@ class Transcoder:
         """Transcodes stitches.
         Converts middle-level commands and potentially incompatible
         commands into a format friendly low level commands."""
+        for _ in self.transcode_steps():
+            pass
 
+    def transcode_steps(self) -> Iterator[None]:
+        """Performs transcode_main, yielding before each source stitch is processed."""
         source = self.source_pattern.stitches
         self.state_trimmed = True
         self.needle_x = 0
@@ -219,160 +358,186 @@ class Transcoder:
         if self.thread_change_command == NEEDLE_SET:
             self.destination_pattern.threadlist.extend(self.source_pattern.threadlist)
 
+        handlers = self.get_command_handlers()
+        self.update_translation()
+        rounds = self.round
+        if hasattr(source, "records"):
+            source = source.records()  # (x, y, command) tuples, not views.
         flags = NO_COMMAND
         for self.position, self.stitch in enumerate(source):
-            p = self.matrix.point_in_matrix_space(self.stitch)  # type: ignore[misc]
-            x = float(p[0])
-            y = float(p[1])
-            if self.round:
+            yield
+            stitch = self.stitch
+            translation = self.translation
+            if translation is not None:
+                x = float(stitch[0] + translation[0])
+                y = float(stitch[1] + translation[1])
+            else:
+                p = self.matrix.point_in_matrix_space(stitch)  # type: ignore[misc]
+                x = float(p[0])
+                y = float(p[1])
+            if rounds:
                 x = round(x)
                 y = round(y)
-            flags = self.stitch[2] & COMMAND_MASK
-            self.high_flags = self.stitch[2] & FLAGS_MASK
-
-            if flags == NO_COMMAND:
-                continue
-            elif flags == STITCH:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.stitch_with_contingency(x, y)
-            elif flags == NEEDLE_AT:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.needle_to(x, y)
-            elif flags == SEW_TO:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.sew_to(x, y)
-
-            # Middle Level Commands.
-            elif flags == STITCH_BREAK:
-                self.state_jumping = True
-            elif flags == FRAME_EJECT:
-                self.tie_off_and_trim_if_needed()
-                self.jump_to(x, y)
-                self.stop_here()
-            elif flags == SEQUENCE_BREAK:
-                self.tie_off_and_trim_if_needed()
-            elif flags == COLOR_BREAK:
-                self.color_break()
-            elif flags == TIE_OFF:
-                self.tie_off()
-            elif flags == TIE_ON:
-                self.tie_on()
-
-            # Core Commands.
-            elif flags == TRIM:
-                self.tie_off_and_trim_if_needed()
-            elif flags == JUMP:
-                if not self.state_jumping:
-                    self.state_jumping = True
-                self.jump_to(x, y)
-            elif flags == SEQUIN_MODE:
-                self.toggle_sequins()
-            elif flags == SEQUIN_EJECT:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                if not self.state_sequin_mode:
-                    self.toggle_sequins()
-                self.sequin_at(x, y)
-            elif flags == COLOR_CHANGE:
-                self.tie_off_trim_color_change()
-            elif flags == NEEDLE_SET:
-                self.tie_off_trim_color_change()
-            elif flags == STOP:
-                self.stop_here()
-            elif flags == SLOW:
-                self.slow_command_here()
-            elif flags == FAST:
-                self.fast_command_here()
-            elif flags == END:
-                self.end_here()
+            command = stitch[2]
+            flags = command & COMMAND_MASK
+            self.high_flags = command & FLAGS_MASK
+            handler = handlers.get(flags)
+            if handler is not None and handler(x, y):
                 break
-            # On-the-fly Settings Commands.
-            elif flags == CONTINGENCY_TIE_ON_THREE_SMALL:
-                self.tie_on_contingency = CONTINGENCY_TIE_ON_THREE_SMALL
-            elif flags == CONTINGENCY_TIE_OFF_THREE_SMALL:
-                self.tie_off_contingency = CONTINGENCY_TIE_OFF_THREE_SMALL
-            elif flags == CONTINGENCY_TIE_ON_NONE:
-                self.tie_on_contingency = CONTINGENCY_TIE_ON_NONE
-            elif flags == CONTINGENCY_TIE_OFF_NONE:
-                self.tie_off_contingency = CONTINGENCY_TIE_OFF_NONE
-            elif flags == OPTION_MAX_JUMP_LENGTH:
-                x = self.stitch[0]
-                self.max_jump = x
-            elif flags == OPTION_MAX_STITCH_LENGTH:
-                x = self.stitch[0]
-                self.max_stitch = x
-            elif flags == OPTION_EXPLICIT_TRIM:
-                self.explicit_trim = True
-            elif flags == OPTION_IMPLICIT_TRIM:
-                self.explicit_trim = False
-            elif flags == CONTINGENCY_LONG_STITCH_NONE:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_NONE
-            elif flags == CONTINGENCY_LONG_STITCH_JUMP_NEEDLE:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_JUMP_NEEDLE
-            elif flags == CONTINGENCY_LONG_STITCH_SEW_TO:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_SEW_TO
-            elif flags == CONTINGENCY_SEQUIN_REMOVE:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_REMOVE
-            elif flags == CONTINGENCY_SEQUIN_STITCH:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_STITCH
-            elif flags == CONTINGENCY_SEQUIN_JUMP:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_JUMP
-            elif flags == CONTINGENCY_SEQUIN_UTILIZE:
-                self.sequin_contingency = CONTINGENCY_SEQUIN_UTILIZE
-            elif flags == MATRIX_TRANSLATE:
-                self.matrix.post_translate(self.stitch[0], self.stitch[1])  # type: ignore[misc]
-            elif flags == MATRIX_SCALE_ORIGIN:
-                self.matrix.post_scale(self.stitch[0], self.stitch[1])  # type: ignore[misc]
-            elif flags == MATRIX_ROTATE_ORIGIN:
-                self.matrix.post_rotate(self.stitch[0])  # type: ignore[misc]
-            elif flags == MATRIX_SCALE:
-                self.matrix.inverse()
-                q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)  # type: ignore[misc]
-                self.matrix.inverse()
-                self.matrix.post_scale(self.stitch[0], self.stitch[1], q[0], q[1])  # type: ignore[misc]
-            elif flags == MATRIX_ROTATE:
-                self.matrix.inverse()
-                q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)  # type: ignore[misc]
-                self.matrix.inverse()
-                self.matrix.post_rotate(self.stitch[0], q[0], q[1])  # type: ignore[misc]
-            elif flags == MATRIX_RESET:
-                self.matrix.reset()
         if flags != END:
             self.end_here()
 
+    def get_command_handlers(self) -> Dict[int, Any]:
+        """Binds the COMMAND_HANDLERS methods, commands without one are skipped."""
+        return {command: getattr(self, name) for command, name in COMMAND_HANDLERS.items()}
+
+    def update_translation(self) -> None:
+        """Notes whether the matrix only translates, after every matrix change."""
+        self.translation = matrix_translation(self.matrix.m)
+
+    def start_stitching(self, x: float, y: float) -> None:
+        self.declare_not_trimmed()
+        self.jump_to_within_stitchrange(x, y)
+        self.stitch_at(x, y)
+        self.tie_on()
+
+    def handle_stitch(self, x: float, y: float) -> None:
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            self.stitch_with_contingency(x, y)
+
+    def handle_needle_at(self, x: float, y: float) -> None:
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            self.needle_to(x, y)
+
+    def handle_sew_to(self, x: float, y: float) -> None:
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            self.sew_to(x, y)
+
+    def handle_stitch_break(self, x: float, y: float) -> None:
+        self.state_jumping = True
+
+    def handle_frame_eject(self, x: float, y: float) -> None:
+        self.tie_off_and_trim_if_needed()
+        self.jump_to(x, y)
+        self.stop_here()
+
+    def handle_trim(self, x: float, y: float) -> None:
+        self.tie_off_and_trim_if_needed()
+
+    def handle_color_break(self, x: float, y: float) -> None:
+        self.color_break()
+
+    def handle_tie_off(self, x: float, y: float) -> None:
+        self.tie_off()
+
+    def handle_tie_on(self, x: float, y: float) -> None:
+        self.tie_on()
+
+    def handle_jump(self, x: float, y: float) -> None:
+        if not self.state_jumping:
+            self.state_jumping = True
+        self.jump_to(x, y)
+
+    def handle_sequin_mode(self, x: float, y: float) -> None:
+        self.toggle_sequins()
+
+    def handle_sequin_eject(self, x: float, y: float) -> None:
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        if not self.state_sequin_mode:
+            self.toggle_sequins()
+        self.sequin_at(x, y)
+
+    def handle_thread_change(self, x: float, y: float) -> None:
+        self.tie_off_trim_color_change()
+
+    def handle_stop(self, x: float, y: float) -> None:
+        self.stop_here()
+
+    def handle_slow(self, x: float, y: float) -> None:
+        self.slow_command_here()
+
+    def handle_fast(self, x: float, y: float) -> None:
+        self.fast_command_here()
+
+    def handle_end(self, x: float, y: float) -> bool:
+        self.end_here()
+        return True
+
+    def handle_tie_on_contingency(self, x: float, y: float) -> None:
+        self.tie_on_contingency = self.stitch[2] & COMMAND_MASK
+
+    def handle_tie_off_contingency(self, x: float, y: float) -> None:
+        self.tie_off_contingency = self.stitch[2] & COMMAND_MASK
+
+    def handle_max_jump(self, x: float, y: float) -> None:
+        self.max_jump = self.stitch[0]
+
+    def handle_max_stitch(self, x: float, y: float) -> None:
+        self.max_stitch = self.stitch[0]
+
+    def handle_explicit_trim(self, x: float, y: float) -> None:
+        self.explicit_trim = True
+
+    def handle_implicit_trim(self, x: float, y: float) -> None:
+        self.explicit_trim = False
+
+    def handle_long_stitch_contingency(self, x: float, y: float) -> None:
+        self.long_stitch_contingency = self.stitch[2] & COMMAND_MASK
+
+    def handle_sequin_contingency(self, x: float, y: float) -> None:
+        if self.state_sequin_mode:  # if sequin_mode, turn it off.
+            self.toggle_sequins()
+        self.sequin_contingency = self.stitch[2] & COMMAND_MASK
+
+    def handle_sequin_utilize(self, x: float, y: float) -> None:
+        self.sequin_contingency = CONTINGENCY_SEQUIN_UTILIZE
+
+    def handle_matrix_translate(self, x: float, y: float) -> None:
+        self.matrix.post_translate(self.stitch[0], self.stitch[1])  # type: ignore[misc]
+        self.update_translation()
+
+    def handle_matrix_scale_origin(self, x: float, y: float) -> None:
+        self.matrix.post_scale(self.stitch[0], self.stitch[1])  # type: ignore[misc]
+        self.update_translation()
+
+    def handle_matrix_rotate_origin(self, x: float, y: float) -> None:
+        self.matrix.post_rotate(self.stitch[0])  # type: ignore[misc]
+        self.update_translation()
+
+    def handle_matrix_scale(self, x: float, y: float) -> None:
+        self.matrix.inverse()
+        q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)  # type: ignore[misc]
+        self.matrix.inverse()
+        self.matrix.post_scale(self.stitch[0], self.stitch[1], q[0], q[1])  # type: ignore[misc]
+        self.update_translation()
+
+    def handle_matrix_rotate(self, x: float, y: float) -> None:
+        self.matrix.inverse()
+        q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)  # type: ignore[misc]
+        self.matrix.inverse()
+        self.matrix.post_rotate(self.stitch[0], q[0], q[1])  # type: ignore[misc]
+        self.update_translation()
+
+    def handle_matrix_reset(self, x: float, y: float) -> None:
+        self.matrix.reset()
+        self.update_translation()
+
     def update_needle_position(self, x: float, y: float) -> None:
         self.needle_x = x
         self.needle_y = y
@@ -386,7 +551,7 @@ class Transcoder:
         x = self.needle_x
         y = self.needle_y
         cmd = encode_thread_change(command, thread, needle, order)
-        self.destination_pattern.stitches.append([x, y, cmd])
+        self.destination_stitches.append([x, y, cmd])
 
     def add(self, flags: int, x: Optional[float] = None, y: Optional[float] = None) -> None:
         if x is None:
@@ -394,7 +559,7 @@ class Transcoder:
         if y is None:
             y = self.needle_y
         flags |= self.high_flags
-        self.destination_pattern.stitches.append([x, y, flags])
+        self.destination_stitches.append([x, y, flags])
 
     def lookahead_stitch(self):
         """Looks forward from current position and
@@ -640,7 +805,7 @@ class Transcoder:
 
         returns the last stitch interpolated by the code.
         """
-        transcode = self.destination_pattern.stitches
+        transcode = self.destination_stitches
         distance_x = x1 - x0
         distance_y = y1 - y0
         if abs(distance_x) > max_length or abs(distance_y) > max_length:
@@ -656,22 +821,33 @@ class Transcoder:
                 steps = steps_y
             step_size_x = distance_x / steps
             step_size_y = distance_y / steps
-            qx = x0
-            qy = y0
-            for _ in range(1, int(steps)):
-                # we need the gap stitches only, not start or end stitch.
-                qx += step_size_x
-                qy += step_size_y
-                stitch: List[Any] = [qx, qy, data | self.high_flags]
-                transcode.append(stitch)
-                self.update_needle_position(float(stitch[0]), float(stitch[1]))
+            count = int(steps) - 1
+            if count <= 0:
+                return
+            # we need the gap stitches only, not start or end stitch.
+            # accumulate() repeats the qx += step_size_x sums, giving identical points.
+            xs = accumulate(repeat(step_size_x, count), initial=x0)
+            ys = accumulate(repeat(step_size_y, count), initial=y0)
+            next(xs)
+            next(ys)
+            flags = data | self.high_flags
+            if isinstance(transcode, EmbStitchArray):
+                transcode.x.fromlist(list(xs))
+                transcode.y.fromlist(list(ys))
+                transcode.command.extend(array("q", (flags,)) * count)
+                self.update_needle_position(transcode.x[-1], transcode.y[-1])
+                return
+            gap: List[List[Any]] = [[qx, qy, flags] for qx, qy in zip(xs, ys)]
+            transcode.extend(gap)
+            stitch = gap[-1]
+            self.update_needle_position(float(stitch[0]), float(stitch[1]))
 
     def lock_stitch(self, x: float, y: float, anchor_x: float, anchor_y: float, max_length: Optional[float] = None) -> None:
         """Tie-on, Tie-off. Lock stitch from current location towards
         anchor location.Ends again at lock location. May not exceed
         max_length in the process."""
         check_length = max_length if max_length is not None else self.max_stitch
-        transcode = self.destination_pattern.stitches
+        transcode = self.destination_stitches
         length = distance(x, y, anchor_x, anchor_y)
         if length > check_length:
             p = oriented(x, y, anchor_x, anchor_y, check_length)
@@ -0,0 +1,30 @@
+"""Optional NumPy support.
+
+The column kernels use NumPy when it can be imported and fall back to pure
+Python otherwise, both give identical results. numpy() imports it on first
+use, so importing pystitch does not load NumPy.
+
+Setting ENABLED to False makes numpy() return None, which runs the pure
+Python paths.
+"""
+
+from typing import Any
+
+ENABLED = True
+
+_UNSET = object()
+_numpy: Any = _UNSET
+
+
+def numpy() -> Any:
+    """Returns the numpy module, None if it is not installed or disabled."""
+    global _numpy
+    if not ENABLED:
+        return None
+    if _numpy is _UNSET:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        _numpy = np
+    return _numpy
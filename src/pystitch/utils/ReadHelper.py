@@ -1,4 +1,165 @@
-from typing import BinaryIO, Optional, List
+import mmap
+import struct
+from io import UnsupportedOperation
+from typing import Any, BinaryIO, Optional, List
+
+
+class ReadBuffer:
+    """In-memory cursor over the bytes of an embroidery file.
+
+    The file is read once. ReadBuffer implements read, seek and tell, so
+    readers and the read_* helpers below work on it unchanged, without a
+    system call per value. Stitch loops can index ``data`` directly from
+    ``position`` without allocating per record, and ``view`` returns
+    zero-copy memoryview slices."""
+
+    _INT_16LE = struct.Struct("<H")
+    _INT_16BE = struct.Struct(">H")
+    _INT_32LE = struct.Struct("<I")
+    _INT_32BE = struct.Struct(">I")
+
+    def __init__(self, data: Any, position: int = 0) -> None:
+        self.data = data
+        self.position = position
+        self.length = len(data)
+
+    @classmethod
+    def from_stream(cls, stream: Any) -> 'ReadBuffer':
+        """Returns a ReadBuffer at the current position of stream.
+        Seekable streams are read whole so absolute seeks keep working."""
+        if isinstance(stream, ReadBuffer):
+            return stream
+        try:
+            position = stream.tell()
+            stream.seek(0, 0)
+        except (AttributeError, OSError, UnsupportedOperation):
+            position = 0
+        data = stream.read()
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        return cls(data, position)
+
+    @classmethod
+    def from_mmap(cls, stream: Any) -> 'ReadBuffer':
+        """Returns a ReadBuffer over a read-only memory map of the file behind
+        stream. Streams that cannot be mapped, such as pipes, in-memory streams
+        and empty files, are read with from_stream instead."""
+        if isinstance(stream, ReadBuffer):
+            return stream
+        try:
+            data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, UnsupportedOperation):
+            return cls.from_stream(stream)
+        return cls(data, stream.tell())
+
+    def close(self) -> None:
+        """Releases the memory map, if any. Data read from the buffer stays valid."""
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:
+                pass  # A view is still exported, the map closes when it is collected.
+
+    def sync(self, stream: Any) -> None:
+        """Moves stream to the buffer position, if the buffer was created from it."""
+        if stream is not self:
+            try:
+                stream.seek(self.position, 0)
+            except (AttributeError, OSError):
+                pass
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        start = self.position
+        if start >= self.length:
+            return b""
+        if size is None or size < 0:
+            end = self.length
+        else:
+            end = min(start + size, self.length)
+        self.position = end
+        return bytes(self.data[start:end])
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.length
+        self.position = max(offset, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def remaining(self) -> int:
+        return max(self.length - self.position, 0)
+
+    def view(self, size: Optional[int] = None) -> memoryview:
+        """Returns a zero-copy view of the next size bytes and advances past them."""
+        start = min(self.position, self.length)
+        if size is None or size < 0:
+            end = self.length
+        else:
+            end = min(start + size, self.length)
+        self.position = end
+        return memoryview(self.data)[start:end]
+
+    def int_8(self) -> Optional[int]:
+        position = self.position
+        if position < self.length:
+            self.position = position + 1
+            return self.data[position]
+        return None
+
+    def sint_8(self) -> Optional[int]:
+        value = self.int_8()
+        if value is None:
+            return None
+        return signed8(value)
+
+    def _unpack(self, unpacker: struct.Struct) -> Optional[int]:
+        position = self.position
+        end = position + unpacker.size
+        if end <= self.length:
+            self.position = end
+            return unpacker.unpack_from(self.data, position)[0]
+        self.position = max(self.length, position)
+        return None
+
+    def int_16le(self) -> Optional[int]:
+        return self._unpack(self._INT_16LE)
+
+    def int_16be(self) -> Optional[int]:
+        return self._unpack(self._INT_16BE)
+
+    def int_32le(self) -> Optional[int]:
+        return self._unpack(self._INT_32LE)
+
+    def int_32be(self) -> Optional[int]:
+        return self._unpack(self._INT_32BE)
+
+    def int_24le(self) -> Optional[int]:
+        position = self.position
+        if position + 3 <= self.length:
+            self.position = position + 3
+            data = self.data
+            return data[position] + (data[position + 1] << 8) + (data[position + 2] << 16)
+        self.position = max(self.length, position)
+        return None
+
+    def int_24be(self) -> Optional[int]:
+        position = self.position
+        if position + 3 <= self.length:
+            self.position = position + 3
+            data = self.data
+            return data[position + 2] + (data[position + 1] << 8) + (data[position] << 16)
+        self.position = max(self.length, position)
+        return None
 
 
 def signed8(b: int) -> int:
@@ -25,7 +186,10 @@ def signed24(v: int) -> int:
 
 
 def read_signed(stream: BinaryIO, n: int) -> List[int]:
-    byte = bytearray(stream.read(n))
+    if isinstance(stream, ReadBuffer):
+        byte = stream.view(n)
+    else:
+        byte = bytearray(stream.read(n))
     signed_bytes: List[int] = []
     for b in byte:
         signed_bytes.append(signed8(b))
@@ -33,6 +197,8 @@ def read_signed(stream: BinaryIO, n: int) -> List[int]:
 
 
 def read_sint_8(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.sint_8()
     byte = bytearray(stream.read(1))
     if len(byte) == 1:
         return signed8(byte[0])
@@ -40,6 +206,8 @@ def read_sint_8(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_8(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_8()
     byte = bytearray(stream.read(1))
     if len(byte) == 1:
         return byte[0]
@@ -47,6 +215,8 @@ def read_int_8(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_16le(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_16le()
     byte = bytearray(stream.read(2))
     if len(byte) == 2:
         return (byte[0] & 0xFF) + ((byte[1] & 0xFF) << 8)
@@ -54,6 +224,8 @@ def read_int_16le(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_16be(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_16be()
     byte = bytearray(stream.read(2))
     if len(byte) == 2:
         return (byte[1] & 0xFF) + ((byte[0] & 0xFF) << 8)
@@ -61,6 +233,8 @@ def read_int_16be(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_24le(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_24le()
     b = bytearray(stream.read(3))
     if len(b) == 3:
         return (b[0] & 0xFF) + ((b[1] & 0xFF) << 8) + ((b[2] & 0xFF) << 16)
@@ -68,6 +242,8 @@ def read_int_24le(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_24be(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_24be()
     b = bytearray(stream.read(3))
     if len(b) == 3:
         return (b[2] & 0xFF) + ((b[1] & 0xFF) << 8) + ((b[0] & 0xFF) << 16)
@@ -75,6 +251,8 @@ def read_int_24be(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_32le(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_32le()
     b = bytearray(stream.read(4))
     if len(b) == 4:
         return (
@@ -87,6 +265,8 @@ def read_int_32le(stream: BinaryIO) -> Optional[int]:
 
 
 def read_int_32be(stream: BinaryIO) -> Optional[int]:
+    if isinstance(stream, ReadBuffer):
+        return stream.int_32be()
     b = bytearray(stream.read(4))
     if len(b) == 4:
         return (
@@ -115,7 +295,7 @@ def read_string_16(stream: BinaryIO, length: int) -> Optional[str]:
 
 
 __all__ = [
-    'signed8', 'signed16', 'signed24', 'read_signed', 'read_sint_8', 'read_int_8',
+    'ReadBuffer', 'signed8', 'signed16', 'signed24', 'read_signed', 'read_sint_8', 'read_int_8',
     'read_int_16le', 'read_int_16be', 'read_int_24le', 'read_int_24be', 
     'read_int_32le', 'read_int_32be', 'read_string_8', 'read_string_16'
 ]
@@ -1,110 +1,49 @@
 import struct
-from typing import BinaryIO, List, Union
+from typing import Any, BinaryIO, Iterable, Iterator, List, Tuple, Union
+
+from ..core.EmbStats import PatternStats
+
+INT_16LE = struct.Struct("<H")
+INT_16BE = struct.Struct(">H")
+INT_32LE = struct.Struct("<I")
+INT_32BE = struct.Struct(">I")
+FLOAT_32LE = struct.Struct("<f")
 
 
 def write_int_array_8(stream: BinaryIO, int_array: List[int]) -> None:
-    for value in int_array:
-        v = bytes(
-            bytearray(
-                [
-                    value & 0xFF,
-                ]
-            )
-        )
-        stream.write(v)
+    stream.write(bytes([value & 0xFF for value in int_array]))
 
 
 def write_int_8(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                value & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(bytes((value & 0xFF,)))
 
 
 def write_int_16le(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 0) & 0xFF,
-                (value >> 8) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_16LE.pack(value & 0xFFFF))
 
 
 def write_int_16be(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 8) & 0xFF,
-                (value >> 0) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_16BE.pack(value & 0xFFFF))
 
 
 def write_int_24le(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 0) & 0xFF,
-                (value >> 8) & 0xFF,
-                (value >> 16) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_32LE.pack(value & 0xFFFFFF)[:3])
 
 
 def write_int_24be(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 16) & 0xFF,
-                (value >> 8) & 0xFF,
-                (value >> 0) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_32BE.pack(value & 0xFFFFFF)[1:])
 
 
 def write_int_32le(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 0) & 0xFF,
-                (value >> 8) & 0xFF,
-                (value >> 16) & 0xFF,
-                (value >> 24) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_32LE.pack(value & 0xFFFFFFFF))
 
 
 def write_int_32be(stream: BinaryIO, value: int) -> None:
-    v = bytes(
-        bytearray(
-            [
-                (value >> 24) & 0xFF,
-                (value >> 16) & 0xFF,
-                (value >> 8) & 0xFF,
-                (value >> 0) & 0xFF,
-            ]
-        )
-    )
-    stream.write(v)
+    stream.write(INT_32BE.pack(value & 0xFFFFFFFF))
 
 
 def write_float_32le(stream: BinaryIO, value: Union[int, float]) -> None:
-    stream.write(struct.pack("<f", float(value)))
+    stream.write(FLOAT_32LE.pack(float(value)))
 
 
 def write_string(stream: BinaryIO, string: str, encoding: str = "utf8") -> None:
@@ -115,8 +54,159 @@ def write_string_utf8(stream: BinaryIO, string: str) -> None:
     stream.write(bytes(string, "utf8"))
 
 
+def whole_number(value: Union[int, float]) -> Union[int, float]:
+    """Whole floats as ints, other values as they are."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def text_stitches(pattern: Any) -> Iterable[Any]:
+    """The stitches for text writers. Compact stitches hold every coordinate
+    as a float, they are given as [x, y, command] lists with the whole values
+    as ints, the value types list stitches read from a file hold. List
+    stitches are given as they are."""
+    if pattern.compact:
+        return ([whole_number(x), whole_number(y), command] for x, y, command in pattern.stitches.records())
+    return pattern.stitches
+
+
+def text_bounds(pattern: Any, bounds: Tuple[float, float, float, float]) -> Tuple[Any, ...]:
+    """The bounds of the pattern as text_stitches() gives its coordinates."""
+    if pattern.compact:
+        return tuple(whole_number(value) for value in bounds)
+    return bounds
+
+
+def stream_position(stream: Any) -> int:
+    """Position of the stream, forward-only streams such as pipes, sockets
+    and HTTP responses are taken to be at the start of the file."""
+    try:
+        return stream.tell()
+    except (AttributeError, OSError):
+        return 0
+
+
+class BinaryBuffer:
+    """In-memory builder for binary file sections.
+
+    Values are packed into a bytearray with precompiled structs, masked the
+    same way as the write_int functions. Lengths and offsets not known yet
+    are written as placeholders and patched in place once they are. The
+    buffer is a writable stream too, so the write_int functions and writers
+    taking a stream can write into it. start is the position in the output
+    stream the buffer will be written at, tell() reports positions there.
+
+    flush() writes the contents to the output stream with a single write."""
+
+    def __init__(self, start: int = 0) -> None:
+        self.data = bytearray()
+        self.start = start
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def tell(self) -> int:
+        return self.start + len(self.data)
+
+    def write(self, data: Union[bytes, bytearray]) -> int:
+        self.data += data
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.data)
+
+    def flush(self, stream: BinaryIO) -> None:
+        """Writes the contents to the stream and empties the buffer. Raw
+        streams, such as socket files, may take a write in parts."""
+        view = memoryview(self.data)
+        while view:
+            written = stream.write(view)
+            if written is None or written >= len(view):
+                break
+            view = view[written:]
+        view.release()
+        self.start += len(self.data)
+        self.data = bytearray()
+
+    def pad(self, position: int, fill: bytes = b"\x00") -> None:
+        """Fills with the byte up to the stream position, if not there yet."""
+        count = position - self.tell()
+        if count > 0:
+            self.data += fill * count
+
+    def int_8(self, value: int) -> None:
+        self.data.append(value & 0xFF)
+
+    def int_16le(self, value: int) -> None:
+        self.data += INT_16LE.pack(value & 0xFFFF)
+
+    def int_16be(self, value: int) -> None:
+        self.data += INT_16BE.pack(value & 0xFFFF)
+
+    def int_24le(self, value: int) -> None:
+        self.data += INT_32LE.pack(value & 0xFFFFFF)[:3]
+
+    def int_24be(self, value: int) -> None:
+        self.data += INT_32BE.pack(value & 0xFFFFFF)[1:]
+
+    def int_32le(self, value: int) -> None:
+        self.data += INT_32LE.pack(value & 0xFFFFFFFF)
+
+    def int_32be(self, value: int) -> None:
+        self.data += INT_32BE.pack(value & 0xFFFFFFFF)
+
+    def float_32le(self, value: Union[int, float]) -> None:
+        self.data += FLOAT_32LE.pack(float(value))
+
+    def placeholder(self, size: int) -> int:
+        """Reserves size zero bytes, returns their stream position for patching."""
+        position = self.tell()
+        self.data += bytes(size)
+        return position
+
+    def patch_int_16le(self, position: int, value: int) -> None:
+        INT_16LE.pack_into(self.data, position - self.start, value & 0xFFFF)
+
+    def patch_int_24le(self, position: int, value: int) -> None:
+        self.data[position - self.start:position - self.start + 3] = INT_32LE.pack(value & 0xFFFFFF)[:3]
+
+    def patch_int_32le(self, position: int, value: int) -> None:
+        INT_32LE.pack_into(self.data, position - self.start, value & 0xFFFFFFFF)
+
+    def patch_int_32be(self, position: int, value: int) -> None:
+        INT_32BE.pack_into(self.data, position - self.start, value & 0xFFFFFFFF)
+
+
+class StitchTally(PatternStats):
+    """Single pass statistics over stitch records.
+
+    Writers that can consume a stream of records iterate the tally while
+    encoding the stitches, then write their header from the collected values.
+    The values are only complete after finish() is called. Lengths and color
+    block extents are not measured, the change and stop records are kept in
+    changes."""
+
+    MEASURE = False
+
+    def __init__(self, stitches: Iterable[Any]) -> None:
+        self._reset()
+        self.changes = []
+        self._iterator = self._track(stitches)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._iterator
+
+    def finish(self) -> 'StitchTally':
+        """Consumes any records the writer did not iterate, such as those after an END."""
+        for _ in self._iterator:
+            pass
+        return self
+
+
 __all__ = [
     'write_int_array_8', 'write_int_8', 'write_int_16le', 'write_int_16be',
     'write_int_24le', 'write_int_24be', 'write_int_32le', 'write_int_32be',
-    'write_float_32le', 'write_string', 'write_string_utf8'
+    'write_float_32le', 'write_string', 'write_string_utf8', 'stream_position', 'BinaryBuffer',
+    'StitchTally'
 ]
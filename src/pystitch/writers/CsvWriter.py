@@ -5,7 +5,7 @@ from ..utils.EmbFunctions import *
 from ..core.EmbConstant import CONTINGENCY_SEQUIN_UTILIZE
 from ..core.EmbPattern import EmbPattern
 from ..utils.PecGraphics import get_graphic_as_string  # type: ignore
-from ..utils.WriteHelper import write_string_utf8
+from ..utils.WriteHelper import text_bounds, text_stitches, write_string_utf8
 
 ENCODE = False
 WRITES_SPEEDS = True
@@ -37,16 +37,17 @@ def angle(dx: float, dy: float) -> float:
 
 def write_data(pattern: EmbPattern, f: BinaryIO) -> None:
     names = get_common_name_dictionary()
-    extends = pattern.bounds()
+    stats = pattern.get_stats()
+    extends = text_bounds(pattern, stats.bounds())
     width = extends[2] - extends[0]
     height = extends[3] - extends[1]
 
     csv(f, ("#", "[VAR_NAME]", "[VAR_VALUE]"))
-    count_stitches = pattern.count_stitches()
+    count_stitches = stats.count_stitches()
     csv(f, (">", "STITCH_COUNT:", str(count_stitches)))
-    count_threads = pattern.count_color_changes()
+    count_threads = stats.count_color_changes()
     csv(f, (">", "THREAD_COUNT:", str(count_threads)))
-    count_set_needles = pattern.count_needle_sets()
+    count_set_needles = stats.count_needle_sets()
     csv(f, (">", "NEEDLE_COUNT:", str(count_set_needles)))
     csv(f, (">", "EXTENTS_LEFT:", str(extends[0])))
     csv(f, (">", "EXTENTS_TOP:", str(extends[1])))
@@ -55,13 +56,7 @@ def write_data(pattern: EmbPattern, f: BinaryIO) -> None:
     csv(f, (">", "EXTENTS_WIDTH:", str(width)))
     csv(f, (">", "EXTENTS_HEIGHT:", str(height)))
 
-    stitch_counts: Dict[int, int] = {}
-    for s in pattern.stitches:
-        command = s[2] & COMMAND_MASK
-        if command in stitch_counts:
-            stitch_counts[command] += 1
-        else:
-            stitch_counts[command] = 1
+    stitch_counts: Dict[int, int] = stats.histogram()
 
     if len(stitch_counts) != 0:
         for the_key, the_value in stitch_counts.items():
@@ -151,7 +146,7 @@ def write_stitches_displacement(pattern: EmbPattern, f: BinaryIO) -> None:
 
     current_x = 0
     current_y = 0
-    for i, stitch in enumerate(pattern.stitches):
+    for i, stitch in enumerate(text_stitches(pattern)):
         name = decoded_name(names, stitch[2])
         dx = stitch[0] - current_x
         dy = stitch[1] - current_y
@@ -178,7 +173,7 @@ def write_stitches_deltas(pattern: EmbPattern, f: BinaryIO) -> None:
     csv(f, ("#", "[STITCH_INDEX]", "[STITCH_TYPE]", "[X]", "[Y]", "[DX]", "[DY]"))
     current_x = 0
     current_y = 0
-    for i, stitch in enumerate(pattern.stitches):
+    for i, stitch in enumerate(text_stitches(pattern)):
         name = decoded_name(names, stitch[2])
         dx = stitch[0] - current_x
         dy = stitch[1] - current_y
@@ -190,7 +185,7 @@ def write_stitches_deltas(pattern: EmbPattern, f: BinaryIO) -> None:
 def write_stitches(pattern: EmbPattern, f: BinaryIO) -> None:
     names = get_common_name_dictionary()
     csv(f, ("#", "[STITCH_INDEX]", "[STITCH_TYPE]", "[X]", "[Y]"))
-    for i, stitch in enumerate(pattern.stitches):
+    for i, stitch in enumerate(text_stitches(pattern)):
         name = decoded_name(names, stitch[2])
         csv(
             f,
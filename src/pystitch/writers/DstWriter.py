@@ -6,14 +6,14 @@ DST is a popular embroidery format used by Tajima and other embroidery machines.
 The writer handles header generation, thread information, and stitch data encoding.
 """
 
-from typing import BinaryIO, Optional, Dict, Any
+from typing import BinaryIO, Iterable, Optional, Dict, Any
 
 from ..core.EmbConstant import (
     COMMAND_MASK, STITCH, JUMP, TRIM, STOP, END, COLOR_CHANGE,
     SEQUIN_MODE, SEQUIN_EJECT, CONTINGENCY_SEQUIN_UTILIZE
 )
 from ..core.EmbPattern import EmbPattern
-from ..utils.WriteHelper import write_string_utf8  # type: ignore
+from ..utils.WriteHelper import BinaryBuffer, StitchTally, stream_position, write_string_utf8  # type: ignore
 
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_UTILIZE
 FULL_JUMP = False
@@ -115,8 +115,40 @@ def encode_record(x: int, y: int, flags: int) -> bytes:
         b2 = 0b01000011
     return bytes(bytearray([b0, b1, b2]))
 
+
+# Encoded (dx, dy) records for the full +-121 range, built on first use.
+RECORD_RANGE = 121
+RECORD_SPAN = 2 * RECORD_RANGE + 1
+_record_tables: Optional[Dict[int, bytes]] = None
+
+
+def get_record_tables() -> Dict[int, bytes]:
+    """Returns the encoded stitch, jump and sequin eject records for every (dx, dy)
+    in range, 3 bytes per record at ((dx + 121) * 243 + (dy + 121)) * 3.
+
+    The x and y bits of a record never overlap, so each entry is built by
+    combining the encoding of dx alone with the encoding of dy alone."""
+    global _record_tables
+    if _record_tables is None:
+        span = range(-RECORD_RANGE, RECORD_RANGE + 1)
+        x_bits = [int.from_bytes(encode_record(dx, 0, STITCH), "little") for dx in span]
+        y_bits = [int.from_bytes(encode_record(0, dy, STITCH), "little") for dy in span]
+        stitches = b"".join((x | y).to_bytes(3, "little") for x in x_bits for y in y_bits)
+        jump_bits = int.from_bytes(encode_record(0, 0, JUMP), "little")
+        jumps = b"".join((x | y | jump_bits).to_bytes(3, "little") for x in x_bits for y in y_bits)
+        _record_tables = {STITCH: stitches, JUMP: jumps, SEQUIN_EJECT: jumps}
+    return _record_tables
+
+
 def write(pattern: EmbPattern, f: BinaryIO,
           settings: Optional[Dict[str, Any]] = None) -> None:
+    write_stream(pattern, pattern.stitches, f, settings)
+
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream.
+    The stitches are encoded first and the header is written from their tally."""
     extended_header = False
     trim_at = 3
     if settings is not None:
@@ -127,69 +159,78 @@ def write(pattern: EmbPattern, f: BinaryIO,
         if version == "extended":
             extended_header = True
         trim_at = settings.get("trim_at", trim_at)
-    bounds = pattern.bounds()  # type: ignore
+
+    tally = StitchTally(stitches)
+    body = bytearray()
+    tables = get_record_tables()
+    xx = 0
+    yy = 0
+    for stitch in tally:
+        x = float(stitch[0])
+        y = float(stitch[1])
+        data = int(stitch[2]) & COMMAND_MASK
+        dx = int(round(x - xx))
+        dy = int(round(y - yy))
+
+        xx += dx
+        yy += dy
+        if data == TRIM:
+            delta = -4
+            body += encode_record(-delta // 2, -delta // 2, JUMP)
+            for _ in range(1, trim_at - 1):
+                body += encode_record(delta, delta, JUMP)
+                delta = -delta
+            body += encode_record(delta // 2, delta // 2, JUMP)
+        elif data in tables and -RECORD_RANGE <= dx <= RECORD_RANGE and -RECORD_RANGE <= dy <= RECORD_RANGE:
+            index = ((dx + RECORD_RANGE) * RECORD_SPAN + dy + RECORD_RANGE) * 3
+            body += tables[data][index:index + 3]
+        else:
+            body += encode_record(dx, dy, data)
+    tally.finish()
+
+    bounds = tally.bounds()
 
     name = pattern.get_metadata("name", "Untitled")  # type: ignore
 
-    write_string_utf8(f, f"LA:{str(name):<16}\r")  # type: ignore
-    write_string_utf8(f, f"ST:{pattern.count_stitches():7d}\r")  # type: ignore
-    color_count = (pattern.count_color_changes()  # type: ignore
-                   + pattern.count_stitch_commands(STOP))  # type: ignore
-    write_string_utf8(f, f"CO:{color_count:3d}\r")  # type: ignore
-    write_string_utf8(f, f"+X:{abs(float(bounds[2])):5d}\r")  # type: ignore
-    write_string_utf8(f, f"-X:{abs(float(bounds[0])):5d}\r")  # type: ignore
-    write_string_utf8(f, f"+Y:{abs(float(bounds[3])):5d}\r")  # type: ignore
-    write_string_utf8(f, f"-Y:{abs(float(bounds[1])):5d}\r")  # type: ignore
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, f"LA:{str(name):<16}\r")  # type: ignore
+    write_string_utf8(buffer, f"ST:{tally.count_stitches():7d}\r")  # type: ignore
+    color_count = (tally.count_color_changes()
+                   + tally.count_stitch_commands(STOP))
+    write_string_utf8(buffer, f"CO:{color_count:3d}\r")  # type: ignore
+    write_string_utf8(buffer, f"+X:{int(abs(float(bounds[2]))):5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"-X:{int(abs(float(bounds[0]))):5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"+Y:{int(abs(float(bounds[3]))):5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"-Y:{int(abs(float(bounds[1]))):5d}\r")  # type: ignore
     ax = 0
     ay = 0
-    if len(pattern.stitches) > 0:  # type: ignore
-        last = len(pattern.stitches) - 1  # type: ignore
-        ax = int(float(pattern.stitches[last][0]))  # type: ignore
-        ay = -int(float(pattern.stitches[last][1]))  # type: ignore
+    if tally.last is not None:
+        ax = int(float(tally.last[0]))
+        ay = -int(float(tally.last[1]))
     if ax >= 0:
-        write_string_utf8(f, f"AX:+{ax:5d}\r")  # type: ignore
+        write_string_utf8(buffer, f"AX:+{ax:5d}\r")  # type: ignore
     else:
-        write_string_utf8(f, f"AX:-{abs(ax):5d}\r")  # type: ignore
+        write_string_utf8(buffer, f"AX:-{abs(ax):5d}\r")  # type: ignore
     if ay >= 0:
-        write_string_utf8(f, f"AY:+{ay:5d}\r")  # type: ignore
+        write_string_utf8(buffer, f"AY:+{ay:5d}\r")  # type: ignore
     else:
-        write_string_utf8(f, f"AY:-{abs(ay):5d}\r")  # type: ignore
-    write_string_utf8(f, f"MX:+{0:5d}\r")  # type: ignore
-    write_string_utf8(f, f"MY:+{0:5d}\r")  # type: ignore
-    write_string_utf8(f, f"PD:{'******':6s}\r")  # type: ignore
+        write_string_utf8(buffer, f"AY:-{abs(ay):5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"MX:+{0:5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"MY:+{0:5d}\r")  # type: ignore
+    write_string_utf8(buffer, f"PD:{'******':6s}\r")  # type: ignore
     if extended_header:
         author = pattern.get_metadata("author")  # type: ignore
         if author is not None:
-            write_string_utf8(f, f"AU:{str(author)}\r")  # type: ignore
+            write_string_utf8(buffer, f"AU:{str(author)}\r")  # type: ignore
         meta_copyright = pattern.get_metadata("copyright")  # type: ignore
         if meta_copyright is not None:
-            write_string_utf8(f, f"CP:{str(meta_copyright)}\r")  # type: ignore
+            write_string_utf8(buffer, f"CP:{str(meta_copyright)}\r")  # type: ignore
         if len(pattern.threadlist) > 0:  # type: ignore
             for thread in pattern.threadlist:  # type: ignore
                 thread_info = f"TC:{str(thread.hex_color())},{str(thread.description)},{str(thread.catalog_number)}\r"  # type: ignore
-                write_string_utf8(f, thread_info)  # type: ignore
-    f.write(b"\x1a")
-    for _ in range(f.tell(), DSTHEADERSIZE):
-        f.write(b"\x20")  # space
+                write_string_utf8(buffer, thread_info)  # type: ignore
+    buffer.write(b"\x1a")
+    buffer.pad(DSTHEADERSIZE, b"\x20")  # space
 
-    stitches = pattern.stitches  # type: ignore
-    xx = 0
-    yy = 0
-    for stitch in stitches:  # type: ignore
-        x = float(stitch[0])  # type: ignore
-        y = float(stitch[1])  # type: ignore
-        data = int(stitch[2]) & COMMAND_MASK  # type: ignore
-        dx = int(round(x - xx))
-        dy = int(round(y - yy))
-
-        xx += dx
-        yy += dy
-        if data == TRIM:
-            delta = -4
-            f.write(encode_record(-delta // 2, -delta // 2, JUMP))
-            for _ in range(1, trim_at - 1):
-                f.write(encode_record(delta, delta, JUMP))
-                delta = -delta
-            f.write(encode_record(delta // 2, delta // 2, JUMP))
-        else:
-            f.write(encode_record(dx, dy, data))
+    buffer.write(body)
+    buffer.flush(f)
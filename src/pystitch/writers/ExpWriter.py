@@ -1,4 +1,4 @@
-from typing import BinaryIO, Optional, Dict, Any
+from typing import BinaryIO, Iterable, Optional, Dict, Any
 
 from ..core.EmbConstant import *
 from ..core.EmbPattern import EmbPattern
@@ -11,7 +11,12 @@ MAX_STITCH_DISTANCE = 127
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
-    stitches = pattern.stitches
+    write_stream(pattern, pattern.stitches, f, settings)
+
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream."""
     xx = 0
     yy = 0
     for stitch in stitches:
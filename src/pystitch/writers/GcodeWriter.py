@@ -10,11 +10,12 @@ SCALE = (-1, -1)  # This performs a default X,Y flip.
 
 
 def write_data(pattern: EmbPattern, f: BinaryIO) -> None:
-    bounds = [float(e) / 10.0 for e in pattern.bounds()]  # convert to mm.
+    stats = pattern.get_stats()
+    bounds = [float(e) / 10.0 for e in stats.bounds()]  # convert to mm.
     width = bounds[2] - bounds[0]
     height = bounds[3] - bounds[1]
-    count_stitches = pattern.count_stitches()
-    count_threads = pattern.count_color_changes()
+    count_stitches = stats.count_stitches()
+    count_threads = stats.count_color_changes()
 
     write_string_utf8(f, "(STITCH_COUNT: %d)\n" % count_stitches)
     write_string_utf8(f, "(THREAD_COUNT: %d)\n" % count_threads)
@@ -25,13 +26,7 @@ def write_data(pattern: EmbPattern, f: BinaryIO) -> None:
     write_string_utf8(f, "(EXTENTS_WIDTH: %.3f)\n" % width)
     write_string_utf8(f, "(EXTENTS_HEIGHT: %.3f)\n" % height)
 
-    stitch_counts: Dict[int, int] = {}
-    for s in pattern.stitches:
-        command = s[2] & COMMAND_MASK
-        if command in stitch_counts:
-            stitch_counts[command] += 1
-        else:
-            stitch_counts[command] = 1
+    stitch_counts: Dict[int, int] = stats.histogram()
 
     names = get_common_name_dictionary()
     if len(stitch_counts) != 0:
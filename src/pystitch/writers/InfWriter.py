@@ -1,25 +1,36 @@
 from typing import BinaryIO, Optional, Dict, Any
 
 from ..core.EmbPattern import EmbPattern
-from ..utils.WriteHelper import write_int_8, write_int_16be, write_int_32be, write_string_utf8
+from ..utils.WriteHelper import (
+    BinaryBuffer,
+    stream_position,
+    write_int_8,
+    write_int_16be,
+    write_int_32be,
+    write_string_utf8,
+)
 
 ENCODE = False
 
 
 def patch_byte_offset(stream: BinaryIO, offset: int) -> None:
     current_pos = stream.tell()
-    stream.seek(offset, 0)  # Absolute position seek.
     position = current_pos - offset - 4  # 4 bytes int32
+    if isinstance(stream, BinaryBuffer):
+        stream.patch_int_32be(offset, position)
+        return
+    stream.seek(offset, 0)  # Absolute position seek.
     write_int_32be(stream, position)
     stream.seek(current_pos, 0)  # Absolute position seek.
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
-    write_int_32be(f, 1)
-    write_int_32be(f, 8)
-    placeholder = f.tell()
-    write_int_32be(f, 0)  # Placeholder.
-    write_int_32be(f, len(pattern.threadlist))
+    buffer = BinaryBuffer(stream_position(f))
+    write_int_32be(buffer, 1)
+    write_int_32be(buffer, 8)
+    placeholder = buffer.tell()
+    write_int_32be(buffer, 0)  # Placeholder.
+    write_int_32be(buffer, len(pattern.threadlist))
     index = 0
     for thread in pattern.threadlist:
         details = thread.description
@@ -29,16 +40,17 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
         if chart is None:
             chart = "Unknown"
         write_int_16be(
-            f, 11 + len(details) + len(chart)
+            buffer, 11 + len(details) + len(chart)
         )  # 2 + 2 + 1 + 1 + 1 + 2 + d + 1 + c + 1 = 11 + d + c
-        write_int_16be(f, index)  # record index
+        write_int_16be(buffer, index)  # record index
         index += 1
-        write_int_8(f, thread.get_red())
-        write_int_8(f, thread.get_green())
-        write_int_8(f, thread.get_blue())
-        write_int_16be(f, index)  # needle number
-        write_string_utf8(f, details)
-        write_int_8(f, 0)
-        write_string_utf8(f, chart)
-        write_int_8(f, 0)
-    patch_byte_offset(f, placeholder)
+        write_int_8(buffer, thread.get_red())
+        write_int_8(buffer, thread.get_green())
+        write_int_8(buffer, thread.get_blue())
+        write_int_16be(buffer, index)  # needle number
+        write_string_utf8(buffer, details)
+        write_int_8(buffer, 0)
+        write_string_utf8(buffer, chart)
+        write_int_8(buffer, 0)
+    patch_byte_offset(buffer, placeholder)
+    buffer.flush(f)
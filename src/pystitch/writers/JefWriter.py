@@ -1,10 +1,10 @@
 import datetime
-from typing import BinaryIO, Optional, Dict, Any
+from typing import BinaryIO, Iterable, Optional, Dict, Any
 
 from ..core.EmbConstant import *
 from ..core.EmbPattern import EmbPattern
 from ..threads.EmbThreadJef import get_thread_set
-from ..utils.WriteHelper import write_int_8, write_int_32le, write_string_utf8
+from ..utils.WriteHelper import BinaryBuffer, StitchTally, write_int_8, write_int_32le, write_string_utf8
 
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_JUMP
 FULL_JUMP = True
@@ -21,6 +21,13 @@ HOOP_200X200 = 4
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
+    write_stream(pattern, pattern.stitches, f, settings)
+
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream.
+    The stitches are encoded first and the header is written from their tally."""
     trims = False
     command_count_max = 3
 
@@ -30,7 +37,52 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
         command_count_max = settings.get("trim_at", command_count_max)
         date_string = settings.get("date", date_string)
 
-    pattern.fix_color_count()
+    tally = StitchTally(stitches)
+    body = bytearray()
+    point_count = 1  # 1 command for END statement
+    first = None
+    xx = 0
+    yy = 0
+    for stitch in tally:
+        if first is None:
+            first = stitch
+        x = stitch[0]
+        y = stitch[1]
+        data = stitch[2] & COMMAND_MASK
+        dx = int(round(x - xx))
+        dy = int(round(y - yy))
+        xx += dx
+        yy += dy
+        if data == STITCH:
+            point_count += 1
+            body.append(dx & 0xFF)
+            body.append(-dy & 0xFF)
+            continue
+        elif data == COLOR_CHANGE or data == STOP:  # PATCH INCLUDE STOP.
+            point_count += 2
+            body += b"\x80\x01"
+            body.append(dx & 0xFF)
+            body.append(-dy & 0xFF)
+            continue
+        elif data == TRIM:
+            if trims:  # command trim.
+                point_count += 2 * command_count_max
+                body += b"\x80\x02\x00\x00" * command_count_max
+            continue
+        elif data == JUMP:
+            point_count += 2
+            body += b"\x80\x02"
+            body.append(dx & 0xFF)
+            body.append(-dy & 0xFF)
+            continue
+        elif data == END:
+            break
+    body += b"\x80\x10"
+    tally.finish()
+
+    # Same as pattern.fix_color_count()
+    while len(pattern.threadlist) < tally.thread_count:
+        pattern.add_thread(pattern.get_thread_or_filler(len(pattern.threadlist)))
     # REMOVE BUG: color_count = pattern.count_threads(). #
 
     # PATCH
@@ -41,8 +93,12 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
     color_toggled = False
     color_count = 0  # Color and Stop count.
     index_in_threadlist = 0
-    for stitch in pattern.stitches:
-        # Iterate all stitches.
+    changes = tally.changes
+    if first is not None and (not changes or changes[0] is not first):
+        # The first stitch sets the initial color.
+        changes = [first] + changes
+    for stitch in changes:
+        # Iterate color changes and stops.
         flags = stitch[2] & COMMAND_MASK
         if flags == COLOR_CHANGE or index_in_threadlist == 0:
             # If color change *or* initial color unset.
@@ -75,59 +131,46 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
     # END PATCH
 
     offsets = 0x74 + (color_count * 8)
-    write_int_32le(f, offsets)
-    write_int_32le(f, 0x14)
-    write_string_utf8(f, date_string)
-    write_int_8(f, 0)
-    write_int_8(f, 0)
-    write_int_32le(f, color_count)
-    point_count = 1  # 1 command for END statement
-    for stitch in pattern.stitches:
-        data = stitch[2] & COMMAND_MASK
-        if data == STITCH:
-            point_count += 1
-        elif data == JUMP:
-            point_count += 2
-        elif data == TRIM:
-            if trims:
-                point_count += 2 * command_count_max
-        elif data == COLOR_CHANGE or data == STOP:  # PATCH: INCLUDE STOP.
-            point_count += 2
-        elif data == END:
-            break
-    write_int_32le(f, point_count)
-    extends = pattern.bounds()
+    header = BinaryBuffer()
+    write_int_32le(header, offsets)
+    write_int_32le(header, 0x14)
+    write_string_utf8(header, date_string)
+    write_int_8(header, 0)
+    write_int_8(header, 0)
+    write_int_32le(header, color_count)
+    write_int_32le(header, point_count)
+    extends = tally.bounds()
     design_width = int(round(extends[2] - extends[0]))
     design_height = int(round(extends[3] - extends[1]))
-    write_int_32le(f, get_jef_hoop_size(design_width, design_height))
+    write_int_32le(header, get_jef_hoop_size(design_width, design_height))
     half_width = int(round(design_width / 2))
     half_height = int(round(design_height / 2))
 
     # distance from center of hoop.
-    write_int_32le(f, half_width)
-    write_int_32le(f, half_height)
-    write_int_32le(f, half_width)
-    write_int_32le(f, half_height)
+    write_int_32le(header, half_width)
+    write_int_32le(header, half_height)
+    write_int_32le(header, half_width)
+    write_int_32le(header, half_height)
 
     # distance from default 110 x 110 hoop
     x_hoop_edge = 550 - half_width
     y_hoop_edge = 550 - half_height
-    write_hoop_edge_distance(f, x_hoop_edge, y_hoop_edge)
+    write_hoop_edge_distance(header, x_hoop_edge, y_hoop_edge)
 
     # distance from default 50 x 50 hoop
     x_hoop_edge = 250 - half_width
     y_hoop_edge = 250 - half_height
-    write_hoop_edge_distance(f, x_hoop_edge, y_hoop_edge)
+    write_hoop_edge_distance(header, x_hoop_edge, y_hoop_edge)
 
     # distance from default 140 x 200 hoop
     x_hoop_edge = 700 - half_width
     y_hoop_edge = 1000 - half_height
-    write_hoop_edge_distance(f, x_hoop_edge, y_hoop_edge)
+    write_hoop_edge_distance(header, x_hoop_edge, y_hoop_edge)
 
     # distance from custom hoop, but this should be accepted.
     x_hoop_edge = 700 - half_width
     y_hoop_edge = 1000 - half_height
-    write_hoop_edge_distance(f, x_hoop_edge, y_hoop_edge)
+    write_hoop_edge_distance(header, x_hoop_edge, y_hoop_edge)
 
     # REMOVE (We covered this in PATCH).
     #jef_threads = get_thread_set()
@@ -136,42 +179,13 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
     # END REMOVE
 
     for t in palette:
-        write_int_32le(f, t)
+        write_int_32le(header, t)
 
     for _ in range(0, color_count):
-        write_int_32le(f, 0x0D)
+        write_int_32le(header, 0x0D)
 
-    xx = 0
-    yy = 0
-    for stitch in pattern.stitches:
-        x = stitch[0]
-        y = stitch[1]
-        data = stitch[2] & COMMAND_MASK
-        dx = int(round(x - xx))
-        dy = int(round(y - yy))
-        xx += dx
-        yy += dy
-        if data == STITCH:
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
-            continue
-        elif data == COLOR_CHANGE or data == STOP:  # PATCH INCLUDE STOP.
-            f.write(b"\x80\x01")
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
-            continue
-        elif data == TRIM:
-            if trims:  # command trim.
-                f.write(b"\x80\x02\x00\x00" * command_count_max)
-            continue
-        elif data == JUMP:
-            f.write(b"\x80\x02")
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
-            continue
-        elif data == END:
-            break
-    f.write(b"\x80\x10")
+    header.write(body)
+    header.flush(f)
 
 
 def get_jef_hoop_size(width: int, height: int) -> int:
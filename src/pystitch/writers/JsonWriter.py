@@ -2,6 +2,7 @@ from typing import TextIO, Optional, Dict, Any
 
 from ..utils.EmbFunctions import *
 from ..core.EmbPattern import EmbPattern
+from ..utils.WriteHelper import text_stitches
 
 ENCODE = False
 WRITE_FILE_IN_TEXT_MODE = True
@@ -51,7 +52,7 @@ def write(pattern: EmbPattern, f: TextIO, settings: Optional[Dict[str, Any]] = N
             for thread in pattern.threadlist
         ],
         "stitches": [
-            [s[0], s[1], str(decoded_name(names, s[2]))] for s in pattern.stitches
+            [s[0], s[1], str(decoded_name(names, s[2]))] for s in text_stitches(pattern)
         ],
         "extras": metadata,
     }
@@ -8,9 +8,8 @@ from ..threads.EmbThreadPec import get_thread_set
 from ..utils.PecGraphics import draw_scaled, get_blank
 from ..core.exceptions import TooManyColorChangesError
 from ..utils.WriteHelper import (
+    BinaryBuffer,
     write_int_8,
-    write_int_16le,
-    write_int_24le,
     write_string_utf8,
 )
 
@@ -33,8 +32,10 @@ GROUP_LONG = False
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
     pattern.fix_color_count()
     pattern.interpolate_stop_as_duplicate_color()
-    f.write(bytes("#PEC0001".encode("utf8")))
-    write_pec(pattern, f)
+    buffer = BinaryBuffer()
+    buffer.write(bytes("#PEC0001".encode("utf8")))
+    write_pec(pattern, buffer)
+    buffer.flush(f)
 
 
 def write_pec(pattern: EmbPattern, f: BinaryIO, threadlist: Optional[List[Any]] = None) -> Tuple[List[Optional[int]], List[Any]]:
@@ -78,8 +79,7 @@ def write_pec_header(pattern: EmbPattern, f: BinaryIO, threadlist: List[Any]) ->
     else:
         f.write(b"\x20\x20\x20\x20\x64\x20\x00\x20\x00\x20\x20\x20\xFF")
 
-    for _ in range(current_thread_count, 463):
-        f.write(b"\x20")  # 520
+    f.write(b"\x20" * (463 - current_thread_count))  # 520
     return color_index_list, rgb_list
 
 
@@ -87,23 +87,18 @@ def write_pec_block(pattern: EmbPattern, f: BinaryIO, extends: Tuple[float, floa
     width = extends[2] - extends[0]
     height = extends[3] - extends[1]
 
-    stitch_block_start_position = f.tell()
-    f.write(b"\x00\x00")
-    write_int_24le(f, 0)  # Space holder.
-    f.write(b"\x31\xff\xf0")
-    write_int_16le(f, int(round(width)))
-    write_int_16le(f, int(round(height)))
-    write_int_16le(f, 0x1E0)
-    write_int_16le(f, 0x1B0)
-    write_jump(f, -int(round(extends[0])), -int(round(extends[1])))
-    pec_encode(pattern, f)
-
-    stitch_block_length = f.tell() - stitch_block_start_position
-
-    current_position = f.tell()
-    f.seek(stitch_block_start_position + 2, 0)
-    write_int_24le(f, stitch_block_length)
-    f.seek(current_position, 0)
+    block = BinaryBuffer()
+    block.write(b"\x00\x00")
+    placeholder_length = block.placeholder(3)  # Space holder.
+    block.write(b"\x31\xff\xf0")
+    block.int_16le(int(round(width)))
+    block.int_16le(int(round(height)))
+    block.int_16le(0x1E0)
+    block.int_16le(0x1B0)
+    write_jump(block, -int(round(extends[0])), -int(round(extends[1])))
+    pec_encode(pattern, block)
+    block.patch_int_24le(placeholder_length, len(block))
+    block.flush(f)
 
 
 def write_pec_graphics(pattern: EmbPattern, f: BinaryIO, extends: Tuple[float, float, float, float]) -> None:
@@ -111,17 +106,16 @@ def write_pec_graphics(pattern: EmbPattern, f: BinaryIO, extends: Tuple[float, f
     for block in pattern.get_as_stitchblock():
         stitches = block[0]
         draw_scaled(extends, stitches, blank, 6, 4)
-    f.write(bytes(bytearray(blank)))
+    f.write(bytes(blank))
 
     for block in pattern.get_as_colorblocks():
         stitches = [s for s in block[0] if s[2] == STITCH]
         blank = get_blank()  # [ 0 ] * 6 * 38
         draw_scaled(extends, stitches, blank, 6)
-        f.write(bytes(bytearray(blank)))
+        f.write(bytes(blank))
 
 
-def write_value(f: BinaryIO, value: int, long: bool = False, flag: int = 0) -> None:
-    data: List[int] = []
+def append_value(data: bytearray, value: int, long: bool = False, flag: int = 0) -> None:
     if not long and -64 < value < 63:
         data.append(value & MASK_07_BIT)
     else:
@@ -130,7 +124,12 @@ def write_value(f: BinaryIO, value: int, long: bool = False, flag: int = 0) -> N
         value |= flag << 8
         data.append((value >> 8) & 0xFF)
         data.append(value & 0xFF)
-    f.write(bytes(bytearray(data)))
+
+
+def write_value(f: BinaryIO, value: int, long: bool = False, flag: int = 0) -> None:
+    data = bytearray()
+    append_value(data, value, long, flag)
+    f.write(data)
 
 
 def write_trimjump(f: BinaryIO, dx: int, dy: int) -> None:
@@ -150,10 +149,15 @@ def write_stitch(f: BinaryIO, dx: int, dy: int) -> None:
 
 
 def pec_encode(pattern: EmbPattern, f: BinaryIO):
+    """Encodes the stitches into a bytearray, written with one call."""
     color_two = True
     jumping = True
     init = True
     stitches = pattern.stitches
+    if hasattr(stitches, "records"):
+        stitches = stitches.records()
+    out = bytearray()
+    append = out.append
     xx = 0
     yy = 0
     for stitch in stitches:
@@ -167,30 +171,38 @@ def pec_encode(pattern: EmbPattern, f: BinaryIO):
         if data == STITCH:
             if jumping:
                 if dx != 0 and dy != 0:
-                    write_stitch(f, 0, 0)
+                    append_value(out, 0, GROUP_LONG)
+                    append_value(out, 0, GROUP_LONG)
                 jumping = False
-            write_stitch(f, dx, dy)
+            if not GROUP_LONG and -64 < dx < 63 and -64 < dy < 63:
+                append(dx & MASK_07_BIT)
+                append(dy & MASK_07_BIT)
+            else:
+                long = GROUP_LONG and -64 < dx < 63 and -64 < dy < 63
+                append_value(out, dx, long)
+                append_value(out, dy, long)
         elif data == JUMP:
             jumping = True
-            if init:
-                write_jump(f, dx, dy)
-            else:
-                write_trimjump(f, dx, dy)
+            flag = JUMP_CODE if init else TRIM_CODE
+            append_value(out, dx, True, flag)
+            append_value(out, dy, True, flag)
         elif data == COLOR_CHANGE:
             if jumping:
-                write_stitch(f, 0, 0)
+                append_value(out, 0, GROUP_LONG)
+                append_value(out, 0, GROUP_LONG)
                 jumping = False
-            f.write(b"\xfe\xb0")
+            out += b"\xfe\xb0"
             if color_two:
-                f.write(b"\x02")
+                append(2)
             else:
-                f.write(b"\x01")
+                append(1)
             color_two = not color_two
         elif data == STOP:
             pass  # These will already be processed into duplicate colors.
         elif data == TRIM:
             pass
         elif data == END:
-            f.write(b"\xff")
+            append(0xFF)
             break
         init = False
+    f.write(out)
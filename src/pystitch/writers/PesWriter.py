@@ -6,6 +6,8 @@ from ..threads.EmbThread import EmbThread
 from ..threads.EmbThreadPec import get_thread_set
 from .PecWriter import write_pec
 from ..utils.WriteHelper import (
+    BinaryBuffer,
+    stream_position,
     write_float_32le,
     write_int_8,
     write_int_16le,
@@ -57,32 +59,33 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] =
 
 
 def write_truncated_version_1(pattern: EmbPattern, f: BinaryIO):
-    write_string_utf8(f, PES_VERSION_1_SIGNATURE)
-    f.write(b"\x16\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00")
-    write_pec(pattern, f)
+    buffer = BinaryBuffer()
+    write_string_utf8(buffer, PES_VERSION_1_SIGNATURE)
+    buffer.write(b"\x16\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00")
+    write_pec(pattern, buffer)
+    buffer.flush(f)
 
 
 def write_truncated_version_6(pattern: EmbPattern, f: BinaryIO):
     chart = pattern.threadlist
-    write_string_utf8(f, PES_VERSION_6_SIGNATURE)
-    placeholder_pec_block = f.tell()
-    write_int_32le(f, 0)  # Placeholder for PEC BLOCK
-    write_pes_header_v6(pattern, f, chart, 0)
-    f.write(bytes(bytearray([0x00] * 5)))
-    write_int_16le(f, 0x0000)
-    write_int_16le(f, 0x0000)
-    current_position = f.tell()
-    f.seek(placeholder_pec_block, 0)
-    write_int_32le(f, current_position)
-    f.seek(current_position, 0)
-    write_pec(pattern, f)
-    write_pes_addendum(f, ([0xFF], []))
-    write_int_16le(f, 0x0000)  # Found in version 6 not 5,4
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, PES_VERSION_6_SIGNATURE)
+    placeholder_pec_block = buffer.placeholder(4)  # Placeholder for PEC BLOCK
+    write_pes_header_v6(pattern, buffer, chart, 0)
+    buffer.write(bytes(5))
+    buffer.int_16le(0x0000)
+    buffer.int_16le(0x0000)
+    buffer.patch_int_32le(placeholder_pec_block, buffer.tell())
+    write_pec(pattern, buffer)
+    write_pes_addendum(buffer, ([0xFF], []))
+    buffer.int_16le(0x0000)  # Found in version 6 not 5,4
+    buffer.flush(f)
 
 
 def write_version_1(pattern: EmbPattern, f: BinaryIO):
     chart = get_thread_set()
-    write_string_utf8(f, PES_VERSION_1_SIGNATURE)
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, PES_VERSION_1_SIGNATURE)
 
     extends = pattern.bounds()
     cx = (extends[2] + extends[0]) / 2.0
@@ -93,31 +96,28 @@ def write_version_1(pattern: EmbPattern, f: BinaryIO):
     right = extends[2] - cx
     bottom = extends[3] - cy
 
-    placeholder_pec_block = f.tell()
-    write_int_32le(f, 0)  # Placeholder for PEC BLOCK
+    placeholder_pec_block = buffer.placeholder(4)  # Placeholder for PEC BLOCK
 
     if len(pattern.stitches) == 0:
-        write_pes_header_v1(f, 0)
-        write_int_16le(f, 0x0000)
-        write_int_16le(f, 0x0000)
+        write_pes_header_v1(buffer, 0)
+        buffer.int_16le(0x0000)
+        buffer.int_16le(0x0000)
     else:
-        write_pes_header_v1(f, 1)
-        write_int_16le(f, 0xFFFF)
-        write_int_16le(f, 0x0000)
-        write_pes_blocks(f, pattern, cast(List[Optional[EmbThread]], chart), left, top, right, bottom, cx, cy)
+        write_pes_header_v1(buffer, 1)
+        buffer.int_16le(0xFFFF)
+        buffer.int_16le(0x0000)
+        write_pes_blocks(buffer, pattern, cast(List[Optional[EmbThread]], chart), left, top, right, bottom, cx, cy)
 
-    current_position = f.tell()
-    f.seek(placeholder_pec_block, 0)
-    write_int_32le(f, current_position)
-    f.seek(current_position, 0)
-
-    write_pec(pattern, f)
+    buffer.patch_int_32le(placeholder_pec_block, buffer.tell())
+    write_pec(pattern, buffer)
+    buffer.flush(f)
 
 
 def write_version_6(pattern: EmbPattern, f: BinaryIO):
     pattern.fix_color_count()
     chart = pattern.threadlist
-    write_string_utf8(f, PES_VERSION_6_SIGNATURE)
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, PES_VERSION_6_SIGNATURE)
 
     extends = pattern.bounds()
     cx = (extends[2] + extends[0]) / 2.0
@@ -128,33 +128,30 @@ def write_version_6(pattern: EmbPattern, f: BinaryIO):
     right = extends[2] - cx
     bottom = extends[3] - cy
 
-    placeholder_pec_block = f.tell()
-    write_int_32le(f, 0)  # Placeholder for PEC BLOCK
+    placeholder_pec_block = buffer.placeholder(4)  # Placeholder for PEC BLOCK
 
     if len(pattern.stitches) == 0:
-        write_pes_header_v6(pattern, f, chart, 0)
-        write_int_16le(f, 0x0000)
-        write_int_16le(f, 0x0000)
+        write_pes_header_v6(pattern, buffer, chart, 0)
+        buffer.int_16le(0x0000)
+        buffer.int_16le(0x0000)
     else:
-        write_pes_header_v6(pattern, f, chart, 1)
-        write_int_16le(f, 0xFFFF)
-        write_int_16le(f, 0x0000)
-        log = write_pes_blocks(f, pattern, chart, left, top, right, bottom, cx, cy)
+        write_pes_header_v6(pattern, buffer, chart, 1)
+        buffer.int_16le(0xFFFF)
+        buffer.int_16le(0x0000)
+        log = write_pes_blocks(buffer, pattern, chart, left, top, right, bottom, cx, cy)
         # In version 6 there is some node, tree, order thing.
-        write_int_32le(f, 0)
-        write_int_32le(f, 0)
+        buffer.int_32le(0)
+        buffer.int_32le(0)
         if log is not None:
             for i in range(0, len(log)):
-                write_int_32le(f, i)
-                write_int_32le(f, 0)
+                buffer.int_32le(i)
+                buffer.int_32le(0)
 
-    current_position = f.tell()
-    f.seek(placeholder_pec_block, 0)
-    write_int_32le(f, current_position)
-    f.seek(current_position, 0)
-    color_info = write_pec(pattern, f)
-    write_pes_addendum(f, color_info)
-    write_int_16le(f, 0x0000)  # Found in version 6 not 5,4
+    buffer.patch_int_32le(placeholder_pec_block, buffer.tell())
+    color_info = write_pec(pattern, buffer)
+    write_pes_addendum(buffer, color_info)
+    buffer.int_16le(0x0000)  # Found in version 6 not 5,4
+    buffer.flush(f)
 
 
 def write_pes_header_v1(f: BinaryIO, distinct_block_objects: int) -> None:
@@ -253,7 +250,7 @@ def write_pes_thread(f: BinaryIO, thread: EmbThread) -> None:
     write_pes_string_8(f, thread.chart)
 
 
-def write_pes_blocks(f: BinaryIO, pattern: EmbPattern, chart: List[Optional[EmbThread]], left: float, top: float, right: float, bottom: float, cx: float, cy: float) -> Optional[List[List[int]]]:
+def write_pes_blocks(f: BinaryBuffer, pattern: EmbPattern, chart: List[Optional[EmbThread]], left: float, top: float, right: float, bottom: float, cx: float, cy: float) -> Optional[List[List[int]]]:
     if len(pattern.stitches) == 0:
         return
 
@@ -268,10 +265,7 @@ def write_pes_blocks(f: BinaryIO, pattern: EmbPattern, chart: List[Optional[EmbT
     sections = data[0]
     colorlog = data[1]
 
-    current_position = f.tell()
-    f.seek(placeholder, 0)
-    write_int_16le(f, sections)
-    f.seek(current_position, 0)  # patch final section count.
+    f.patch_int_16le(placeholder, sections)  # patch final section count.
 
     # If there were addition embsewsegheaders or segments they would go here.
 
@@ -281,7 +275,7 @@ def write_pes_blocks(f: BinaryIO, pattern: EmbPattern, chart: List[Optional[EmbT
     return colorlog
 
 
-def write_pes_sewsegheader(f: BinaryIO, left: float, top: float, right: float, bottom: float) -> int:
+def write_pes_sewsegheader(f: BinaryBuffer, left: float, top: float, right: float, bottom: float) -> int:
     width = right - left
     height = bottom - top
     hoop_height = 1800
@@ -316,10 +310,8 @@ def write_pes_sewsegheader(f: BinaryIO, left: float, top: float, right: float, b
     write_int_16le(f, int(height))
     f.write(b"\x00\x00\x00\x00\x00\x00\x00\x00")
 
-    placeholder_needs_section_data = f.tell()
     # sections
-    write_int_16le(f, 0)
-    return placeholder_needs_section_data
+    return f.placeholder(2)
 
 
 def get_as_segments_blocks(pattern: EmbPattern, chart: List[Optional[EmbThread]], adjust_x: float, adjust_y: float) -> Generator[Tuple[List[List[float]], Optional[int], int], None, None]:
@@ -1,11 +1,13 @@
 import struct
 import zlib
-from typing import BinaryIO, Any, Optional
+from typing import BinaryIO, Any, Dict, List, Optional, Sequence, Tuple
 from math import sqrt
 
 from ..core.EmbPattern import EmbPattern
 from ..core.EmbConstant import *
 from ..threads.EmbThread import EmbThread
+from ..utils.EmbNumpy import numpy
+
 
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_STITCH
 FULL_JUMP = True
@@ -241,6 +243,7 @@ class PngBuffer:
         self._gradient_color_position1 = 0.40
         self._gradient_color_position2 = 0.50
         self._gradient_color_position3 = 0.70
+        self._line_pixels_cache: Dict[Tuple[bool, int], List[bytes]] = {}
 
     def modify_gradient(
         self,
@@ -257,6 +260,7 @@ class PngBuffer:
         self._gradient_color_position1 = gradient_color_position1
         self._gradient_color_position2 = gradient_color_position2
         self._gradient_color_position3 = gradient_color_position3
+        self._line_pixels_cache = {}
 
     def set_color(self, r: int, g: int, b: int, a: int = 255) -> None:
         self._red = r
@@ -267,6 +271,7 @@ class PngBuffer:
         self._distance_from_black = sqrt(
             (((512 + rmean) * r * r) >> 8) + 4 * g * g + (((767 - rmean) * b * b) >> 8)
         )
+        self._line_pixels_cache = {}
 
     def gradient(self, position_in_line: float) -> float:
         """
@@ -314,11 +319,40 @@ class PngBuffer:
         return max(min(v, 1.0), 0.0)
 
     def background(self, red: int, green: int, blue: int, alpha: int) -> None:
-        for i in range(0, len(self.buf), 4):
-            self.buf[i] = red
-            self.buf[i + 1] = green
-            self.buf[i + 2] = blue
-            self.buf[i + 3] = alpha
+        self.buf[:] = bytes((red, green, blue, alpha)) * (len(self.buf) // 4)
+
+    def opaque_pixel(self, v: float = 1.0) -> bytes:
+        """
+        RGBA bytes plot writes for value v with an opaque color. These do not
+        depend on the background, so lines can be drawn by copying them.
+        """
+        if self._distance_from_black < 15:
+            r: float = 35 * v
+            g: float = 35 * v
+            b: float = 35 * v
+        else:
+            r = self._red * v
+            g = self._green * v
+            b = self._blue * v
+        r = min(max(r, 0), 255)
+        g = min(max(g, 0), 255)
+        b = min(max(b, 0), 255)
+        return bytes((int(r), int(g), int(b), self._alpha - 4))
+
+    def line_pixels(self, max_pos: int) -> List[bytes]:
+        """
+        Pixels for each index along a line of max_pos steps, cached per length
+        until the color or gradient changes.
+        """
+        key = (self.fancy, max_pos)
+        pixels = self._line_pixels_cache.get(key)
+        if pixels is None:
+            if self.fancy and max_pos > 0:
+                pixels = [self.opaque_pixel(self.gradient(i / max_pos)) for i in range(max_pos + 1)]
+            else:
+                pixels = [self.opaque_pixel(1.0)] * (max_pos + 1)
+            self._line_pixels_cache[key] = pixels
+        return pixels
 
     def plot(self, x: int, y: int, v: Optional[float] = None, a: Optional[int] = None) -> None:
         """
@@ -387,6 +421,136 @@ class PngBuffer:
             pass
 
     def draw_line(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        if self._alpha != 255:
+            # Translucent colors blend with the background, plot each pixel.
+            self.plot_line(x0, y0, x1, y1)
+            return
+        dx: int = x1 - x0  # BRESENHAM LINE DRAW ALGORITHM
+        dy: int = y1 - y0
+        step_x: int = -1 if dx < 0 else 1
+        step_y: int = -1 if dy < 0 else 1
+        dx = abs(dx)
+        dy = abs(dy)
+        buf = self.buf
+        size: int = len(buf)
+        width: int = self.width
+        w: int = self.line_width
+        left: int = w >> 1
+        if dx > dy:
+            pixels = self.line_pixels(dx)
+            stride: int = width * 4
+            fraction: int = 2 * dy - dx
+            x: int = x0
+            y: int = y0
+            for i in range(dx + 1):
+                if i:
+                    if fraction >= 0:
+                        y += step_y
+                        fraction -= 2 * dx
+                    x += step_x
+                    fraction += 2 * dy
+                pixel = pixels[i]
+                idx: int = (width * (y + 1 - left) + x + 1) * 4
+                for _ in range(w):
+                    if -size <= idx < size:
+                        start = idx % size
+                        buf[start:start + 4] = pixel
+                    idx += stride
+        else:
+            # Positions past the first use index 1 along y-major lines.
+            pixels = self.line_pixels(dy)
+            spans = [pixel * w for pixel in pixels[:2]]
+            fraction = 2 * dx - dy
+            x = x0
+            y = y0
+            for i in range(dy + 1):
+                if i:
+                    if fraction >= 0:
+                        x += step_x
+                        fraction -= 2 * dy
+                    y += step_y
+                    fraction += 2 * dx
+                idx = (width * (y + 1) + x + 1 - left) * 4
+                if 0 <= idx and idx + 4 * w <= size:
+                    buf[idx:idx + 4 * w] = spans[i and 1]
+                    continue
+                pixel = pixels[i and 1]
+                for _ in range(w):
+                    if -size <= idx < size:
+                        start = idx % size
+                        buf[start:start + 4] = pixel
+                    idx += 4
+
+    def draw_lines(self, lines: Sequence[Tuple[int, int, int, int]]) -> None:
+        """
+        Draws (x0, y0, x1, y1) lines in order. With NumPy the pixels of many
+        lines are computed as arrays, where a later line overwrites an earlier
+        one exactly as draw_line does.
+        """
+        if numpy() is None or self._alpha != 255:
+            for line in lines:
+                self.draw_line(*line)
+            return
+        for start in range(0, len(lines), 4096):
+            self._draw_lines_numpy(lines[start:start + 4096])
+
+    def _draw_lines_numpy(self, lines: Sequence[Tuple[int, int, int, int]]) -> None:
+        np = numpy()
+        if len(lines) == 0:
+            return
+        x0, y0, x1, y1 = np.array(lines, dtype=np.int64).reshape(-1, 4).T
+        dx = x1 - x0
+        dy = y1 - y0
+        step_x = np.where(dx < 0, -1, 1)
+        step_y = np.where(dy < 0, -1, 1)
+        dx = np.abs(dx)
+        dy = np.abs(dy)
+        x_major = dx > dy
+        max_pos = np.where(x_major, dx, dy)
+        minor = np.where(x_major, dy, dx)
+        counts = max_pos + 1
+
+        # Pixels of each distinct line length, laid end to end.
+        lengths = np.unique(max_pos)
+        palette = bytearray()
+        offsets = np.zeros(int(lengths[-1]) + 1, dtype=np.int64)
+        for length in lengths.tolist():
+            offsets[length] = len(palette) >> 2
+            palette += b"".join(self.line_pixels(length))
+        colors = np.frombuffer(bytes(palette), dtype=np.uint8).reshape(-1, 4)
+
+        # Closed form of the Bresenham steps in draw_line.
+        k = np.arange(int(counts.sum()), dtype=np.int64)
+        k -= np.repeat(np.cumsum(counts) - counts, counts)
+        major_point = np.repeat(x_major, counts)
+        major_length = np.repeat(max_pos, counts)
+        m = (2 * np.repeat(minor, counts) * k + major_length) // np.maximum(2 * major_length, 1)
+        along = np.repeat(np.where(x_major, step_x, step_y), counts) * k
+        across = np.repeat(np.where(x_major, step_y, step_x), counts) * m
+        xs = np.repeat(x0, counts) + np.where(major_point, along, across)
+        ys = np.repeat(y0, counts) + np.where(major_point, across, along)
+        color_index = np.repeat(offsets[max_pos], counts) + np.where(major_point, k, np.minimum(k, 1))
+
+        w = self.line_width
+        left = w >> 1
+        spread = np.arange(-left, w - left, dtype=np.int64)
+        base = self.width * (ys + 1) + xs + 1
+        step = np.where(major_point, self.width, 1)
+        pixel = (base[:, None] + step[:, None] * spread[None, :]).ravel()
+        color_index = np.repeat(color_index, w)
+
+        count = len(self.buf) >> 2
+        inside = (pixel >= -count) & (pixel < count)
+        pixel = pixel[inside] % count
+        color_index = color_index[inside]
+        # The last write of each pixel wins.
+        pixel = pixel[::-1]
+        pixel, first = np.unique(pixel, return_index=True)
+        color_index = color_index[::-1][first]
+        view = np.frombuffer(self.buf, dtype=np.uint8).reshape(-1, 4)
+        view[pixel] = colors[color_index]
+
+    def plot_line(self, x0: int, y0: int, x1: int, y1: int) -> None:
         dy: int = y1 - y0  # BRESENHAM LINE DRAW ALGORITHM
         dx: int = x1 - x0
         if dy < 0:
@@ -526,15 +690,17 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> N
         draw_buff.set_color(
             thread.get_red(), thread.get_green(), thread.get_blue(), 255
         )
+        lines: List[Tuple[int, int, int, int]] = []
         last_x: Optional[int] = None
         last_y: Optional[int] = None
         for stitch in block:
             x: int = int(stitch[0])
             y: int = int(stitch[1])
             if last_x is not None and last_y is not None:
-                draw_buff.draw_line(last_x, last_y, x, y)
+                lines.append((last_x, last_y, x, y))
             last_x = x
             last_y = y
+        draw_buff.draw_lines(lines)
 
     if guides:
         draw_guides(draw_buff, extends)
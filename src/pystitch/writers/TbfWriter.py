@@ -1,9 +1,9 @@
-from typing import BinaryIO, Optional, Dict, Any
+from typing import BinaryIO, Iterable, Optional, Dict, Any
 
 from ..utils.EmbFunctions import decode_embroidery_command
 from ..core.EmbPattern import EmbPattern
 from ..core.EmbConstant import *
-from ..utils.WriteHelper import write_string_utf8, write_int_8
+from ..utils.WriteHelper import BinaryBuffer, StitchTally, stream_position, write_string_utf8, write_int_8
 
 FULL_JUMP = False
 ROUND = True
@@ -14,156 +14,163 @@ EXPLICIT_TRIM = True
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
+    write_stream(pattern, pattern.stitches, f, settings)
+
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream.
+    The stitches are encoded first and the header is written from their tally."""
+    tally = StitchTally(stitches)
+    body = bytearray()
+    xx = 0
+    yy = 0
+    for stitch in tally:
+        x = stitch[0]
+        y = stitch[1]
+        data = stitch[2] & COMMAND_MASK
+        dx = int(round(x - xx))
+        dy = int(round(y - yy))
+        xx += dx
+        yy += dy
+
+        if data == STITCH:
+            cmd = 0x80
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+        elif data == JUMP:
+            cmd = 0x90
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+        elif data == STOP:
+            cmd = 0x40
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+        elif data == TRIM:
+            cmd = 0x86
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+        elif data == NEEDLE_SET:
+            cmd = 0x81
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+        elif data == END:
+            cmd = 0x8F
+            body += bytes((dx & 0xFF, -dy & 0xFF, cmd))
+            break
+    tally.finish()
+
     if settings is not None and "ct0" in settings:
         ct0 = settings.get("ct0")
         if ct0 is not None:
-            write_ct0(pattern, str(ct0))
-    bounds = pattern.bounds()
+            write_ct0(pattern, str(ct0), stitches=tally.changes)
+    bounds = tally.bounds()
 
     name = pattern.get_metadata("name", "Untitled")
-    write_string_utf8(f, "3.00")
-    for _ in range(f.tell(), 0x80):
-        f.write(b"\x20")  # space
-    write_string_utf8(f, "LA:%-16s\r" % name)
-    write_string_utf8(f, "ST:%7d\r" % pattern.count_stitches())
-    write_string_utf8(f, "CO:%3d\r" % pattern.count_needle_sets())
-
-    write_string_utf8(f, "+X:%5d\r" % abs(bounds[2]))
-    write_string_utf8(f, "-X:%5d\r" % abs(bounds[0]))
-    write_string_utf8(f, "+Y:%5d\r" % abs(bounds[3]))
-    write_string_utf8(f, "-Y:%5d\r" % abs(bounds[1]))
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, "3.00")
+    buffer.pad(0x80, b"\x20")  # space
+    write_string_utf8(buffer, "LA:%-16s\r" % name)
+    write_string_utf8(buffer, "ST:%7d\r" % tally.count_stitches())
+    write_string_utf8(buffer, "CO:%3d\r" % tally.count_needle_sets())
+
+    write_string_utf8(buffer, "+X:%5d\r" % abs(bounds[2]))
+    write_string_utf8(buffer, "-X:%5d\r" % abs(bounds[0]))
+    write_string_utf8(buffer, "+Y:%5d\r" % abs(bounds[3]))
+    write_string_utf8(buffer, "-Y:%5d\r" % abs(bounds[1]))
     ax = 0
     ay = 0
-    if len(pattern.stitches) > 0:
-        last = len(pattern.stitches) - 1
-        ax = int(pattern.stitches[last][0])
-        ay = -int(pattern.stitches[last][1])
+    if tally.last is not None:
+        ax = int(tally.last[0])
+        ay = -int(tally.last[1])
     if ax >= 0:
-        write_string_utf8(f, "AX:+%5d\r" % ax)
+        write_string_utf8(buffer, "AX:+%5d\r" % ax)
     else:
-        write_string_utf8(f, "AX:-%5d\r" % abs(ax))
+        write_string_utf8(buffer, "AX:-%5d\r" % abs(ax))
     if ay >= 0:
-        write_string_utf8(f, "AY:+%5d\r" % ay)
+        write_string_utf8(buffer, "AY:+%5d\r" % ay)
     else:
-        write_string_utf8(f, "AY:-%5d\r" % abs(ay))
+        write_string_utf8(buffer, "AY:-%5d\r" % abs(ay))
 
     # TP is unknown.
     tp = pattern.get_metadata("tp", "EG/")
-    write_string_utf8(f, "TP:%-32s\r" % tp)
+    write_string_utf8(buffer, "TP:%-32s\r" % tp)
 
     # JC is unknown.
     jc = "3"
-    write_string_utf8(f, "JC:%s\r" % jc)
+    write_string_utf8(buffer, "JC:%s\r" % jc)
 
     # DO is the thread order.
-    write_string_utf8(f, "DO:")
+    write_string_utf8(buffer, "DO:")
     thread_order = [0] * 0x100
     index = 0
-    for stitch in pattern.stitches:
+    for stitch in tally.changes:
         data = stitch[2] & COMMAND_MASK
         if data == NEEDLE_SET:
             _flag, _thread, needle, _order = decode_embroidery_command(stitch[2])
             if needle is not None:
                 thread_order[index] = needle
                 index += 1
-    for n in thread_order:
-        write_int_8(f, n)
-    write_string_utf8(f, "\r")
+    buffer.write(bytes([n & 0xFF for n in thread_order]))
+    write_string_utf8(buffer, "\r")
 
     # DA is the threadlist. This is not *only* the used threads but any threads in the set.
-    write_string_utf8(f, "DA:")
+    write_string_utf8(buffer, "DA:")
     if len(pattern.threadlist) > 0:
         for thread in pattern.threadlist:
-            write_int_8(f, 0x45)
-            write_int_8(f, thread.get_red())
-            write_int_8(f, thread.get_green())
-            write_int_8(f, thread.get_blue())
-            write_int_8(f, 0x20)
+            write_int_8(buffer, 0x45)
+            write_int_8(buffer, thread.get_red())
+            write_int_8(buffer, thread.get_green())
+            write_int_8(buffer, thread.get_blue())
+            write_int_8(buffer, 0x20)
 
     # Padding to 501
-    for _ in range(f.tell(), 0x376):
-        f.write(b"\x20")  # space
+    buffer.pad(0x376, b"\x20")  # space
 
     # Seen in only some files.
-    f.write(b"\x0d\x1A")
+    buffer.write(b"\x0d\x1A")
 
     # Pad to the end of the header.
-    for _ in range(f.tell(), 0x600):
-        f.write(b"\x20")  # space
+    buffer.pad(0x600, b"\x20")  # space
     # END HEADER
 
-    stitches = pattern.stitches
-    xx = 0
-    yy = 0
-    for stitch in stitches:
-        x = stitch[0]
-        y = stitch[1]
-        data = stitch[2] & COMMAND_MASK
-        dx = int(round(x - xx))
-        dy = int(round(y - yy))
-        xx += dx
-        yy += dy
-
-        if data == STITCH:
-            cmd = 0x80
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-        elif data == JUMP:
-            cmd = 0x90
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-        elif data == STOP:
-            cmd = 0x40
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-        elif data == TRIM:
-            cmd = 0x86
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-        elif data == NEEDLE_SET:
-            cmd = 0x81
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-        elif data == END:
-            cmd = 0x8F
-            f.write(bytes(bytearray([dx & 0xFF, -dy & 0xFF, cmd])))
-            break
+    buffer.write(body)
     # Terminal character.
-    f.write(b"\x1a")
+    buffer.write(b"\x1a")
+    buffer.flush(f)
 
 
-def write_ct0(pattern: EmbPattern, filename: str, settings: Optional[Dict[str, Any]] = None) -> None:
+def write_ct0(pattern: EmbPattern, filename: str, settings: Optional[Dict[str, Any]] = None,
+              stitches: Optional[Iterable[Any]] = None) -> None:
     with open(filename, "wb") as f:
-        _write_ct0(pattern, f, settings=settings)
-
-
-def _write_ct0(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None) -> None:
-    write_string_utf8(f, "TAJ-DGML-PULSE  1-1A 2060(550.0")
-    write_int_8(f, 0x81)
-    write_string_utf8(f, "~400.0)S         2.00")
-    for _ in range(f.tell(), 0x60):
-        f.write(b"\x20")
-    write_string_utf8(f, "DC1:100\rDC2:100\rDC3:  0\rDC4:N\rDC5:S\r")
-    for _ in range(f.tell(), 0x108):
-        f.write(b"\x20")
-    write_string_utf8(f, "NS1:11")
+        _write_ct0(pattern, f, settings=settings, stitches=stitches)
+
+
+def _write_ct0(pattern: EmbPattern, f: BinaryIO, settings: Optional[Dict[str, Any]] = None,
+               stitches: Optional[Iterable[Any]] = None) -> None:
+    if stitches is None:
+        stitches = pattern.stitches
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, "TAJ-DGML-PULSE  1-1A 2060(550.0")
+    write_int_8(buffer, 0x81)
+    write_string_utf8(buffer, "~400.0)S         2.00")
+    buffer.pad(0x60, b"\x20")
+    write_string_utf8(buffer, "DC1:100\rDC2:100\rDC3:  0\rDC4:N\rDC5:S\r")
+    buffer.pad(0x108, b"\x20")
+    write_string_utf8(buffer, "NS1:11")
     index = 0
-    for stitch in pattern.stitches:
+    for stitch in stitches:
         data = stitch[2] & COMMAND_MASK
         if data == NEEDLE_SET:
             _flag, _thread, needle, _order = decode_embroidery_command(stitch[2])
             if needle is not None:
-                write_int_8(f, needle + 0x30)
-                write_int_8(f, 0x31)
+                write_int_8(buffer, needle + 0x30)
+                write_int_8(buffer, 0x31)
                 index += 1
-    for _ in range(f.tell(), 0x30D):
-        f.write(b"\x20")
-    write_string_utf8(f, "\rRP0:N\rRP1:  \rRP2:  \rRP3:      \rRP4:      \rRP5: \rRP6: \rRP7: \rST1:")
-    for _ in range(f.tell(), 0x434):
-        f.write(b"\x20")
-    write_string_utf8(f, "ST0:0\rAO1:0\rAO2:0\rAO3:0\rOF1:            \rOF2:            \rOF3:            \rNS2:")
+    buffer.pad(0x30D, b"\x20")
+    write_string_utf8(buffer, "\rRP0:N\rRP1:  \rRP2:  \rRP3:      \rRP4:      \rRP5: \rRP6: \rRP7: \rST1:")
+    buffer.pad(0x434, b"\x20")
+    write_string_utf8(buffer, "ST0:0\rAO1:0\rAO2:0\rAO3:0\rOF1:            \rOF2:            \rOF3:            \rNS2:")
     for _ in range(index):
-        write_int_8(f, 0x30)
-    for _ in range(f.tell(), 0x583):
-        f.write(b"\x20")
-    write_string_utf8(f, "\rNS3:")
-    for _ in range(f.tell(), 0x778):
-        f.write(b"\x20")
-    write_string_utf8(f, "\r\x1A")
-    for _ in range(f.tell(), 0x790):
-        f.write(b"\x20")
+        write_int_8(buffer, 0x30)
+    buffer.pad(0x583, b"\x20")
+    write_string_utf8(buffer, "\rNS3:")
+    buffer.pad(0x778, b"\x20")
+    write_string_utf8(buffer, "\r\x1A")
+    buffer.pad(0x790, b"\x20")
+    buffer.flush(f)
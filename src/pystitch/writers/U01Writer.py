@@ -1,9 +1,9 @@
-from typing import BinaryIO, Optional, Any
+from typing import BinaryIO, Iterable, Optional, Any
 
 from ..core.EmbPattern import EmbPattern
 from ..utils.EmbFunctions import *
 from ..core.EmbConstant import CONTINGENCY_SEQUIN_JUMP
-from ..utils.WriteHelper import write_int_16le, write_int_32le
+from ..utils.WriteHelper import BinaryBuffer, StitchTally, stream_position
 
 THREAD_CHANGE_COMMAND = NEEDLE_SET
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_JUMP
@@ -14,30 +14,20 @@ MAX_STITCH_DISTANCE = 127
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> None:
-    stitches = pattern.stitches
-    stitch_count = len(stitches)
-    for _ in range(0, 0x80):
-        f.write(b"0")
-    if stitch_count == 0:
-        return
-    extends = pattern.bounds()
-    write_int_16le(f, int(extends[0]))
-    write_int_16le(f, -int(extends[3]))
-    write_int_16le(f, int(extends[2]))
-    write_int_16le(f, -int(extends[1]))
-    write_int_32le(f, 0)  # Dunno.
+    write_stream(pattern, pattern.stitches, f, settings)
 
-    write_int_32le(f, stitch_count + 1)
-    last_stitch = stitches[stitch_count - 1]
-    write_int_16le(f, int(last_stitch[0]))
-    write_int_16le(f, -int(last_stitch[1]))
-    for _ in range(f.tell(), 0x100):
-        f.write(b"\x00")
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Any] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream.
+    The stitches are encoded first and the header is written from their tally."""
+    tally = StitchTally(stitches)
+    body = bytearray()
     xx = 0
     yy = 0
     trigger_fast = False
     trigger_slow = False
-    for stitch in stitches:
+    for stitch in tally:
         x = stitch[0]
         y = stitch[1]
         data = stitch[2] & COMMAND_MASK
@@ -65,7 +55,7 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> N
             if trigger_slow:
                 trigger_slow = False
                 cmd |= 0x04
-            f.write(bytes(bytearray([cmd, delta_y, delta_x])))
+            body += bytes((cmd, delta_y, delta_x))
         elif data == JUMP:  # If you did both FAST, SLOW, and JUMP, you'd get a trim.
             if trigger_fast:
                 trigger_fast = False
@@ -74,13 +64,13 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> N
                 trigger_slow = False
                 cmd |= 0x04
             cmd |= 0x01
-            f.write(bytes(bytearray([cmd, delta_y, delta_x])))
+            body += bytes((cmd, delta_y, delta_x))
         elif data == STOP:
             cmd |= 0x08
-            f.write(bytes(bytearray([cmd, delta_y, delta_x])))
+            body += bytes((cmd, delta_y, delta_x))
         elif data == TRIM:
             cmd |= 0x07
-            f.write(bytes(bytearray([cmd, delta_y, delta_x])))
+            body += bytes((cmd, delta_y, delta_x))
         elif data == NEEDLE_SET:
             decoded = decode_embroidery_command(stitch[2])
             needle = decoded[2]
@@ -89,7 +79,29 @@ def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> N
                     needle = (needle % 15) + 1
                 cmd |= 0x08
                 cmd += needle
-            f.write(bytes(bytearray([cmd, delta_y, delta_x])))
+            body += bytes((cmd, delta_y, delta_x))
         elif data == END:
             break
-    f.write(b"\xF8\x00\x00")
+    tally.finish()
+
+    stitch_count = tally.count_stitches()
+    buffer = BinaryBuffer(stream_position(f))
+    buffer.write(b"0" * 0x80)
+    if stitch_count == 0:
+        buffer.flush(f)
+        return
+    extends = tally.bounds()
+    buffer.int_16le(int(extends[0]))
+    buffer.int_16le(-int(extends[3]))
+    buffer.int_16le(int(extends[2]))
+    buffer.int_16le(-int(extends[1]))
+    buffer.int_32le(0)  # Dunno.
+
+    buffer.int_32le(stitch_count + 1)
+    last_stitch: Any = tally.last
+    buffer.int_16le(int(last_stitch[0]))
+    buffer.int_16le(-int(last_stitch[1]))
+    buffer.pad(0x100)
+    buffer.write(body)
+    buffer.write(b"\xF8\x00\x00")
+    buffer.flush(f)
@@ -1,8 +1,12 @@
 from typing import BinaryIO, Optional, Any
 
 from ..core.EmbConstant import *
+from ..core.EmbBlocks import EmbBlock
 from ..core.EmbPattern import EmbPattern
 from ..utils.WriteHelper import (
+    INT_16BE,
+    BinaryBuffer,
+    stream_position,
     write_int_8,
     write_int_16be,
     write_int_24be,
@@ -40,36 +44,38 @@ def vp3_write_length_and_bytes(stream: BinaryIO, bytestring: bytes) -> None:
 
 def vp3_patch_byte_offset(stream: BinaryIO, offset: int) -> None:
     current_pos = stream.tell()
-    stream.seek(offset, 0)  # Absolute position seek.
     position = current_pos - offset - 4  # 4 bytes int32
+    if isinstance(stream, BinaryBuffer):
+        stream.patch_int_32be(offset, position)
+        return
+    stream.seek(offset, 0)  # Absolute position seek.
     write_int_32be(stream, position)
     stream.seek(current_pos, 0)  # Absolute position seek.
 
 
 def get_as_colorblocks(pattern: EmbPattern):
+    # Blocks start at their color change, views from the pattern's block index.
+    stitches = pattern.stitches
     thread_index = 0
     last_pos = 0
-    end = len(pattern.stitches)
-    for pos, stitch in enumerate(pattern.stitches):
-        command = stitch[2] & COMMAND_MASK
-        if command != COLOR_CHANGE:
-            continue
+    for pos in pattern.get_block_index().color_changes:
         thread = pattern.get_thread_or_filler(thread_index)
         thread_index += 1
-        yield (pattern.stitches[last_pos:pos], thread)
+        yield (EmbBlock(stitches, last_pos, pos), thread)
         last_pos = pos
     thread = pattern.get_thread_or_filler(thread_index)
-    thread_index += 1
-    yield (pattern.stitches[last_pos:end], thread)
+    yield (EmbBlock(stitches, last_pos, len(stitches)), thread)
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> None:
     pattern.fix_color_count()
 
-    write_string_utf8(f, "%vsm%")
-    write_int_8(f, 0)
-    vp3_write_string_16(f, "Produced by     Software Ltd")
-    write_file(pattern, f)
+    buffer = BinaryBuffer(stream_position(f))
+    write_string_utf8(buffer, "%vsm%")
+    write_int_8(buffer, 0)
+    vp3_write_string_16(buffer, "Produced by     Software Ltd")
+    write_file(pattern, buffer)
+    buffer.flush(f)
 
 
 def write_file(pattern: EmbPattern, f: BinaryIO):
@@ -230,6 +236,7 @@ def write_stitches_block(f: BinaryIO, stitches: Any, first_pos_x: Any, first_pos
     last_x = first_pos_x
     last_y = first_pos_y
 
+    out = bytearray()
     for stitch in stitches:
         x = stitch[0]
         y = stitch[1]
@@ -238,13 +245,13 @@ def write_stitches_block(f: BinaryIO, stitches: Any, first_pos_x: Any, first_pos
         if flags == END:
             # This is a trim command. The machine does not autotrim.
             # Consequently writers tend to add this explicit trim command.
-            f.write(b"\x80\x03")
+            out += b"\x80\x03"
             break
         elif flags == COLOR_CHANGE:
             # Colorchange commands divided the pattern into colorblocks.
             continue
         elif flags == TRIM:
-            f.write(b"\x80\x03")
+            out += b"\x80\x03"
             continue
         elif flags == SEQUIN_MODE:
             continue
@@ -262,11 +269,12 @@ def write_stitches_block(f: BinaryIO, stitches: Any, first_pos_x: Any, first_pos
         last_y += dy
         if flags == STITCH:
             if -127 <= dx <= 127 and -127 <= dy <= 127 and alt == 0:
-                write_int_8(f, dx)
-                write_int_8(f, dy)
+                out.append(dx & 0xFF)
+                out.append(dy & 0xFF)
             else:
-                f.write(b"\x80\x01")
-                write_int_16be(f, dx)
-                write_int_16be(f, dy)
-                f.write(b"\x80\x02")
+                out += b"\x80\x01"
+                out += INT_16BE.pack(dx & 0xFFFF)
+                out += INT_16BE.pack(dy & 0xFFFF)
+                out += b"\x80\x02"
+    f.write(out)
     vp3_patch_byte_offset(f, placeholder_distance_to_end_of_stitches_block_010)
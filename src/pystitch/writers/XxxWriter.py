@@ -1,8 +1,10 @@
-from typing import BinaryIO, Optional, Any
+from typing import BinaryIO, Iterable, Optional, Any
 
 from ..core.EmbConstant import *
 from ..core.EmbPattern import EmbPattern
-from ..utils.WriteHelper import write_int_8, write_int_16le, write_int_32le
+from ..utils.WriteHelper import (
+    INT_16LE, BinaryBuffer, StitchTally, stream_position, write_int_8, write_int_16le, write_int_32le
+)
 
 FULL_JUMP = False
 ROUND = True
@@ -10,64 +12,61 @@ MAX_JUMP_DISTANCE = 124  # 0xFCFF/2 16 bit signed, FD,FE,FF reserved.
 MAX_STITCH_DISTANCE = 124
 
 
-def write_xxx_header_b(pattern: EmbPattern, f: BinaryIO):
-    stitches = pattern.stitches
-    for _ in range(0, 0x17):
-        write_int_8(f, 0x00)
-    write_int_32le(f, len(stitches) - 1)
+def write_xxx_header_b(pattern: EmbPattern, f: BinaryIO, tally: Optional[Any] = None):
+    if tally is None:
+        tally = pattern.get_stats()
+    last: Any = tally.last
+    f.write(bytes(0x17))
+    write_int_32le(f, tally.count_stitches() - 1)
     # END command not called a command.
-    for _ in range(0, 0x0C):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x0C))
     write_int_32le(f, len(pattern.threadlist))
     write_int_16le(f, 0x0000)
 
-    extends = pattern.bounds()
+    extends = tally.bounds()
     width = int(extends[2] - extends[0])
     height = int(extends[3] - extends[1])
     write_int_16le(f, width)
     write_int_16le(f, height)
-    write_int_16le(f, int(stitches[-1][0]))
-    write_int_16le(f, int(-stitches[-1][1]))
+    write_int_16le(f, int(last[0]))
+    write_int_16le(f, int(-last[1]))
     write_int_16le(f, int(-extends[0]))
     write_int_16le(f, int(extends[3]))
     for _ in range(0, 0x42):
         write_int_8(f, 0x00)
     write_int_16le(f, 0x00)  # unknown
     write_int_16le(f, 0x00)  # unknown
-    for _ in range(0, 0x73):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x73))
     write_int_16le(f, 0x20)
-    for _ in range(0, 0x08):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x08))
 
 
-def write_xxx_header_a(pattern: EmbPattern, f: BinaryIO):
-    stitches = pattern.stitches
-    for _ in range(0, 0x17):
-        write_int_8(f, 0x00)
-    write_int_32le(f, len(stitches) - 1)
+def write_xxx_header_a(pattern: EmbPattern, f: BinaryIO, tally: Optional[Any] = None):
+    if tally is None:
+        tally = pattern.get_stats()
+    last: Any = tally.last
+    f.write(bytes(0x17))
+    write_int_32le(f, tally.count_stitches() - 1)
     # END command not called a command.
-    for _ in range(0, 0x0C):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x0C))
     write_int_32le(f, len(pattern.threadlist))
     write_int_16le(f, 0x0000)
 
-    write_int_16le(f, int(stitches[-1][0]))  # correct
-    write_int_16le(f, int(-stitches[-1][1]))  # correct
-    for _ in range(0, 0x85):
-        write_int_8(f, 0x00)
+    write_int_16le(f, int(last[0]))  # correct
+    write_int_16le(f, int(-last[1]))  # correct
+    f.write(bytes(0x85))
     f.write(b"XXX")
-    for _ in range(0, 0x39):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x39))
     write_int_16le(f, 0x20)
-    for _ in range(0, 0x08):
-        write_int_8(f, 0x00)
+    f.write(bytes(0x08))
 
 
-def write_xxx_stitches(pattern: EmbPattern, f: BinaryIO):
-    stitches = pattern.stitches
+def write_xxx_stitches(pattern: EmbPattern, f: BinaryIO, stitches: Optional[Iterable[Any]] = None):
+    if stitches is None:
+        stitches = pattern.stitches
     xx = 0
     yy = 0
+    out = bytearray()
     for stitch in stitches:
         x = stitch[0]
         y = stitch[1]
@@ -77,35 +76,27 @@ def write_xxx_stitches(pattern: EmbPattern, f: BinaryIO):
         xx += dx
         yy += dy
         if data == COLOR_CHANGE or data == STOP:
-            write_int_8(f, 0x7F)
-            write_int_8(f, 0x08)
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
+            out += bytes((0x7F, 0x08, dx & 0xFF, -dy & 0xFF))
             continue
         if data == END:
             break
         if data == STITCH:
             if -124 < dx < 124 and -124 < dy < 124:
-                write_int_8(f, dx)
-                write_int_8(f, -dy)
+                out.append(dx & 0xFF)
+                out.append(-dy & 0xFF)
                 continue
             else:
-                write_int_8(f, 0x7D)
-                write_int_16le(f, dx)
-                write_int_16le(f, -dy)
+                out.append(0x7D)
+                out += INT_16LE.pack(dx & 0xFFFF)
+                out += INT_16LE.pack(-dy & 0xFFFF)
                 continue
         if data == TRIM:
-            write_int_8(f, 0x7F)
-            write_int_8(f, 0x03)
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
+            out += bytes((0x7F, 0x03, dx & 0xFF, -dy & 0xFF))
             continue
         if data == JUMP:
-            write_int_8(f, 0x7F)
-            write_int_8(f, 0x01)
-            write_int_8(f, dx)
-            write_int_8(f, -dy)
+            out += bytes((0x7F, 0x01, dx & 0xFF, -dy & 0xFF))
             continue
+    f.write(out)
 
 
 def write_xxx_colors(pattern: EmbPattern, f: BinaryIO):
@@ -127,16 +118,22 @@ def write_xxx_colors(pattern: EmbPattern, f: BinaryIO):
 
 
 def write(pattern: EmbPattern, f: BinaryIO, settings: Optional[Any] = None) -> None:
-    write_xxx_header_b(pattern, f)
-    place_holder_for_end_of_stitches = f.tell()
-    write_int_32le(f, 0x00000000)
-    write_xxx_stitches(pattern, f)
-    end_of_stitches = f.tell()
-    f.seek(place_holder_for_end_of_stitches, 0)
-    write_int_32le(f, end_of_stitches)
-    f.seek(end_of_stitches, 0)
-    write_int_8(f, 0x7F)
-    write_int_8(f, 0x7F)
-    write_int_8(f, 0x02)
-    write_int_8(f, 0x14)
-    write_xxx_colors(pattern, f)
+    write_stream(pattern, pattern.stitches, f, settings)
+
+
+def write_stream(pattern: EmbPattern, stitches: Iterable[Any], f: BinaryIO,
+                 settings: Optional[Any] = None) -> None:
+    """Writes the stitch records, which may be a normalized record stream.
+    The stitches are encoded first and the header is written from their tally."""
+    tally = StitchTally(stitches)
+    body = BinaryBuffer()
+    write_xxx_stitches(pattern, body, tally)
+    tally.finish()
+    buffer = BinaryBuffer(stream_position(f))
+    write_xxx_header_b(pattern, buffer, tally)
+    end_of_stitches = buffer.tell() + 4 + len(body)
+    buffer.int_32le(end_of_stitches)
+    buffer.write(body.getvalue())
+    buffer.write(b"\x7F\x7F\x02\x14")
+    write_xxx_colors(pattern, buffer)
+    buffer.flush(f)
@@ -0,0 +1,85 @@
+from __future__ import print_function
+
+import os
+import tempfile
+import unittest
+
+from pystitch.__main__ import main
+from test.pattern_for_tests import *
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.sources = []
+        for i in range(3):
+            source = os.path.join(self.directory.name, "batch%d.pes" % i)
+            write_pes(get_big_pattern(), source)
+            self.sources.append(source)
+
+    def test_expand_jobs(self):
+        out = os.path.join(self.directory.name, "out")
+        jobs = expand_jobs([os.path.join(self.directory.name, "*.pes")], ["dst", "PNG"], out)
+        self.assertEqual(len(jobs), 6)
+        self.assertEqual(jobs[0], (self.sources[0], os.path.join(out, "batch0.dst")))
+        self.assertEqual(jobs[1], (self.sources[0], os.path.join(out, "batch0.png")))
+        jobs = expand_jobs([self.sources[1], self.sources[1]], ["exp"])
+        self.assertEqual(jobs, [(self.sources[1], os.path.join(self.directory.name, "batch1.exp"))])
+
+    def test_expand_jobs_same_target(self):
+        for name in ("a", "b"):
+            os.mkdir(os.path.join(self.directory.name, name))
+        write_dst(get_big_pattern(), os.path.join(self.directory.name, "a", "x.dst"))
+        write_pes(get_big_pattern(), os.path.join(self.directory.name, "b", "x.pes"))
+        inputs = [os.path.join(self.directory.name, name, "*") for name in ("a", "b")]
+        out = os.path.join(self.directory.name, "out")
+        with self.assertRaises(ValueError):
+            expand_jobs(inputs, ["pes", "png"], out)
+        write_exp(get_big_pattern(), self.sources[0][:-3] + "exp")
+        with self.assertRaises(ValueError):
+            expand_jobs([self.sources[0][:-3] + "*"], ["dst"])
+        self.assertEqual(len(expand_jobs(inputs, ["png"])), 2)
+        self.assertEqual(main(["convert"] + inputs + ["-t", "pes", "-t", "png", "-d", out, "-j", "2", "-q"]), 2)
+        self.assertFalse(os.path.exists(out))
+
+    def test_convert_many(self):
+        jobs = expand_jobs(self.sources, ["dst", "exp"], os.path.join(self.directory.name, "out"))
+        for workers in (1, 2):
+            report = convert_many(jobs, workers=workers)
+            self.assertEqual(len(report.results), 6)
+            self.assertEqual(report.failed, [])
+            self.assertEqual([(result.source, result.target) for result in report.results], jobs)
+            for source, target in jobs:
+                self.assertTrue(os.path.exists(target))
+        expected = os.path.join(self.directory.name, "expected.dst")
+        convert(self.sources[0], expected)
+        with open(expected, "rb") as f, open(jobs[0][1], "rb") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_convert_many_failures(self):
+        missing = os.path.join(self.directory.name, "missing.pes")
+        jobs = [
+            (missing, missing + ".dst"),
+            (self.sources[0], self.sources[0] + ".sew"),
+            (self.sources[0], self.sources[0]),
+            (self.sources[1], self.sources[1] + ".dst", {"max_stitch": 50}),
+        ]
+        report = convert_many(jobs, workers=2, chunksize=1)
+        self.assertEqual([result.ok for result in report.results], [False, False, False, True])
+        self.assertIn("FileNotFoundError", report.results[0].error)
+        self.assertIn("3 failed", report.summary())
+        self.assertIn(missing, report.summary())
+
+    def test_cli_convert(self):
+        out = os.path.join(self.directory.name, "cli")
+        pattern = os.path.join(self.directory.name, "*.pes")
+        self.assertEqual(main(["convert", pattern, "-t", "dst,u01", "-d", out, "-j", "1", "-q"]), 0)
+        self.assertEqual(sorted(os.listdir(out)), [
+            "batch0.dst", "batch0.u01", "batch1.dst", "batch1.u01", "batch2.dst", "batch2.u01",
+        ])
+        target = os.path.join(out, "single.exp")
+        self.assertEqual(main(["convert", self.sources[0], target, "-q"]), 0)
+        self.assertTrue(os.path.exists(target))
+        self.assertEqual(main(["convert", self.sources[0] + ".none", target, "-q"]), 1)
@@ -0,0 +1,84 @@
+from __future__ import print_function
+
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestBlocks(unittest.TestCase):
+
+    def test_colorblocks_are_views(self):
+        pattern = get_big_pattern()
+        for block, thread in pattern.get_as_colorblocks():
+            self.assertIsInstance(block, EmbBlock)
+            self.assertIs(block.stitches, pattern.stitches)
+            self.assertEqual(block, pattern.stitches[block.start:block.end])
+        for block in pattern.get_as_command_blocks():
+            self.assertIs(block.stitches, pattern.stitches)
+            commands = set(stitch[2] & COMMAND_MASK for stitch in block)
+            self.assertEqual(len(commands), 1)
+        for block, thread in pattern.get_as_stitchblock():
+            self.assertTrue(all(stitch[2] == STITCH for stitch in block))
+
+    def test_block_index_cached(self):
+        pattern = get_big_pattern()
+        pattern.stitches = EmbStitchArray(pattern.stitches)
+        index = pattern.get_block_index()
+        self.assertIs(pattern.get_block_index(), index)
+        pattern.add_stitch_relative(STITCH, 10, 10)
+        self.assertIsNot(pattern.get_block_index(), index)
+        index = pattern.get_block_index()
+        pattern.interpolate_stop_as_duplicate_color()
+        self.assertIsNot(pattern.get_block_index(), index)
+        index = pattern.get_block_index()
+        pattern[0] = [0, 0, COLOR_CHANGE]
+        self.assertIsNot(pattern.get_block_index(), index)
+        index = pattern.get_block_index()
+        pattern.stitches[1][2] = COLOR_CHANGE
+        self.assertIsNot(pattern.get_block_index(), index)
+        index = pattern.get_block_index()
+        pattern.stitches.command[2] = COLOR_CHANGE
+        pattern.invalidate()
+        self.assertIsNot(pattern.get_block_index(), index)
+
+    def test_blocks_follow_edits(self):
+        for compact in (False, True):
+            pattern = EmbPattern(compact=compact)
+            pattern.add_block([(0, 0), (0, 10), (10, 10), (10, 0), (0, 0), (5, 5)], "red")
+            self.assertEqual(len(list(pattern.get_as_colorblocks())), 1)
+            self.assertEqual(pattern.count_color_changes(), 0)
+            pattern.stitches[4][2] = COLOR_CHANGE
+            self.assertEqual(len(list(pattern.get_as_colorblocks())), 2)
+            self.assertEqual(pattern.get_block_index().color_changes, [4])
+            self.assertEqual(pattern.count_color_changes(), 1)
+            # A replacement of the same length is a different list.
+            stitches = [list(stitch) for stitch in pattern.stitches]
+            stitches[4][2] = STITCH
+            pattern.stitches = EmbStitchArray(stitches) if compact else stitches
+            self.assertEqual(pattern.count_color_changes(), 0)
+            self.assertEqual(len(list(pattern.get_as_colorblocks())), 1)
+
+    def test_block_view_sequence(self):
+        block = EmbBlock([[i, i, STITCH] for i in range(10)], 2, 7)
+        self.assertEqual(len(block), 5)
+        self.assertEqual(block[0], [2, 2, STITCH])
+        self.assertEqual(block[-1], [6, 6, STITCH])
+        self.assertEqual(block[1:3], [[3, 3, STITCH], [4, 4, STITCH]])
+        self.assertIsInstance(block[1:3], EmbBlock)
+        self.assertEqual(block[::2], [[2, 2, STITCH], [4, 4, STITCH], [6, 6, STITCH]])
+        self.assertEqual(len(block[4:1]), 0)
+        self.assertEqual([stitch[0] for stitch in reversed(block)], [6, 5, 4, 3, 2])
+        with self.assertRaises(IndexError):
+            block[5]
+
+    def test_compact_blocks(self):
+        pattern = get_big_pattern()
+        compact = pattern.copy()
+        compact.stitches = EmbStitchArray(compact.stitches)
+        for list_block, compact_block in zip(pattern.get_as_colorblocks(), compact.get_as_colorblocks()):
+            self.assertEqual(compact_block[0], list_block[0])
+            self.assertIs(compact_block[0].stitches, compact.stitches)
+        self.assertEqual(
+            [block.tolist() for block in compact.get_as_command_blocks()],
+            [block.tolist() for block in pattern.get_as_command_blocks()],
+        )
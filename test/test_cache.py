@@ -0,0 +1,91 @@
+from __future__ import print_function
+
+import os
+import tempfile
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestNormalizationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = NormalizationCache()
+        EmbPattern.normalization_cache = self.cache
+        self.addCleanup(setattr, EmbPattern, "normalization_cache", None)
+
+    def test_cache_hits(self):
+        pattern = get_big_pattern()
+        pattern.fix_color_count()
+        settings = {"max_stitch": 50}
+        first = pattern.get_normalized_pattern(settings)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        second = pattern.get_normalized_pattern(dict(settings, date="ignored"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(first, second)
+        self.assertIsNot(first.stitches, second.stitches)
+        self.assertIsNot(first.stitches[0], second.stitches[0])
+        self.assertIs(second.threadlist[0], pattern.threadlist[0])
+        pattern.get_normalized_pattern({"max_stitch": 40})
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_cache_matches_uncached(self):
+        for compact in (False, True):
+            pattern = get_shift_pattern()
+            pattern.fix_color_count()
+            if compact:
+                pattern.stitches = EmbStitchArray(pattern.stitches)
+            expected = pattern._normalize({"full_jump": True})
+            self.cache.clear()
+            self.assertEqual(pattern.get_normalized_pattern({"full_jump": True}), expected)
+            self.assertEqual(pattern.get_normalized_pattern({"full_jump": True}), expected)
+            self.assertEqual(self.cache.hits, 1 + compact)
+
+    def test_cache_writes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pattern = get_big_pattern()
+        pattern.fix_color_count()
+        for i in range(3):
+            write_pes(pattern, os.path.join(directory.name, "%d.pes" % i))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        with open(os.path.join(directory.name, "0.pes"), "rb") as f, open(os.path.join(directory.name, "2.pes"), "rb") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_cache_content_key(self):
+        pattern = get_shift_pattern()
+        pattern.fix_color_count()
+        pattern.get_normalized_pattern()
+        pattern.copy().get_normalized_pattern()
+        self.assertEqual(self.cache.hits, 1)
+        pattern.translate(10, 0)
+        pattern.get_normalized_pattern()
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_cache_in_place_edit(self):
+        for compact in (False, True):
+            pattern = get_big_pattern()
+            pattern.fix_color_count()
+            if compact:
+                pattern.stitches = EmbStitchArray(pattern.stitches)
+            self.cache.clear()
+            self.assertLess(pattern.get_normalized_pattern().bounds()[2], 5000)
+            pattern.stitches[2][0] = 5000
+            self.assertEqual(pattern.get_normalized_pattern().bounds()[2], 5000)
+            self.assertEqual(pattern.get_normalized_pattern().bounds()[2], 5000)
+
+    def test_cache_eviction(self):
+        self.cache.max_entries = 2
+        pattern = get_shift_pattern()
+        for max_stitch in (10, 20, 30):
+            pattern.get_normalized_pattern({"max_stitch": max_stitch})
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        pattern.get_normalized_pattern({"max_stitch": 20})
+        pattern.get_normalized_pattern({"max_stitch": 40})
+        pattern.get_normalized_pattern({"max_stitch": 20})
+        self.assertEqual(self.cache.hits, 2)
+        self.cache.max_bytes = self.cache.nbytes // 2
+        pattern.get_normalized_pattern({"max_stitch": 50})
+        self.assertLessEqual(self.cache.nbytes, self.cache.max_bytes)
+        self.assertLessEqual(len(self.cache), 1)
@@ -0,0 +1,63 @@
+from __future__ import print_function
+
+import random
+import unittest
+
+from pystitch.utils.EmbCompress import EmbCompress, Huffman, compress, expand
+
+# Fixed code streams: 9 bit characters, 16 distance prefixes of 4 bits.
+ABC_STREAM = bytes.fromhex("000502fff092492492492430988c70927f80")
+RUN_STREAM = bytes.fromhex("000602fff09249249249240049010081878ff8")
+
+
+class TestCompress(unittest.TestCase):
+
+    def test_expand_matches(self):
+        self.assertEqual(expand(ABC_STREAM), b"abcabcabcabcabc")
+        self.assertEqual(expand(RUN_STREAM), b"\x00" * 40 + b"\x80\x81" * 10)
+        self.assertEqual(expand(memoryview(RUN_STREAM)), b"\x00" * 40 + b"\x80\x81" * 10)
+
+    def test_expand_uncompressed_size(self):
+        # Decoding stops at the first token past the requested size.
+        self.assertEqual(expand(RUN_STREAM, 5), b"\x00" * 40)
+        self.assertEqual(expand(RUN_STREAM, 41), b"\x00" * 40 + b"\x80\x81")
+
+    def test_huffman_table(self):
+        huffman = Huffman([2, 1, 3, 3])
+        huffman.build_table()
+        self.assertEqual(huffman.table, [1, 1, 1, 1, 0, 0, 2, 3])
+        self.assertEqual(huffman.lookup(0b1010000000000000), (0, 2))
+        self.assertEqual(huffman.lookup(0b1110000000000000), (3, 3))
+        self.assertEqual(huffman.flat_table[0b111], (3, 3))
+
+    def test_bit_reservoir(self):
+        compress = EmbCompress()
+        compress._set_input(bytes(range(1, 20)))
+        for count in (3, 16, 1, 0, 9, 30, 64, 5):
+            position = compress.bit_position
+            self.assertEqual(compress.peek(count), compress.get_bits(position, count))
+            self.assertEqual(compress.pop(count), compress.get_bits(position, count))
+
+    def test_compress_round_trip(self):
+        rng = random.Random(0)
+        samples = [b"", b"a", b"ab", b"\x80" * 1000, bytes(range(256)) * 4]
+        samples.append(bytes(rng.choice(b"\x80\x80\x80\x81\x84\x02\xfe") for _ in range(5000)))
+        samples.append(bytes(rng.getrandbits(8) for _ in range(2000)))
+        for data in samples:
+            for level in range(0, 10):
+                compressed = compress(data, level)
+                self.assertEqual(expand(compressed), data)
+                self.assertEqual(expand(compressed, len(data)), data)
+
+    def test_compress_levels(self):
+        data = (b"\x80" * 50 + b"\x81\x84" * 10 + b"abcdefgh") * 200
+        stored = len(compress(data, 0))
+        fast = len(compress(data, 1))
+        best = len(compress(data, 9))
+        self.assertLess(fast, stored)
+        self.assertLessEqual(best, fast)
+        self.assertLess(best, len(data) // 20)
+
+    def test_compress_many_blocks(self):
+        data = bytes(random.Random(1).getrandbits(8) for _ in range(0x11000))
+        self.assertEqual(expand(compress(data, 1)), data)
@@ -0,0 +1,61 @@
+from __future__ import print_function
+
+import io
+import os
+import unittest
+
+from pystitch.utils.EmbDetect import HEADER, MAGIC, rank_formats
+from test.pattern_for_tests import *
+
+
+class TestDetect(unittest.TestCase):
+
+    def test_detect_written_formats(self):
+        for extension in ("pes", "pec", "vp3", "dst", "jef", "xxx", "u01", "tbf", "csv", "json", "pmv"):
+            file1 = "detect." + extension
+            write(get_big_pattern(), file1)
+            self.addCleanup(os.remove, file1)
+            self.assertEqual(detect_format(file1)[0], extension)
+
+    def test_detect_stream_position(self):
+        stream = io.BytesIO(b"xx#PES0001" + bytes(600))
+        stream.seek(2)
+        self.assertEqual(detect_format(stream), ["pes"])
+        self.assertEqual(stream.tell(), 2)
+
+    def test_rank_formats(self):
+        header = b"LA:" + b" " * 600
+        self.assertEqual(rank_formats(header), [("dst", MAGIC), ("dsb", HEADER), ("dsz", HEADER)])
+        self.assertEqual(rank_formats(header, "dsz")[1], ("dsz", HEADER))
+        self.assertEqual(rank_formats(b"#PEC0001"), [("pec", MAGIC), ("pes", MAGIC - 1)])
+        self.assertEqual(rank_formats(b""), [])
+        self.assertEqual(rank_formats(b"random bytes " * 40), [])
+
+    def test_read_misnamed_file(self):
+        file1 = "detect_pes.dst"
+        write_pes(get_big_pattern(), file1)
+        self.addCleanup(os.remove, file1)
+        file2 = "detect_pes.bin"
+        write_pes(get_big_pattern(), file2)
+        self.addCleanup(os.remove, file2)
+        expected = read_pes(file1)
+        self.assertEqual(read(file1), expected)
+        self.assertEqual(read(file2), expected)
+        self.assertIsNone(read(file2, {"detect": False}))
+
+    def test_read_keeps_matching_extension(self):
+        file1 = "detect_dst.dsb"
+        write_dst(get_big_pattern(), file1)
+        self.addCleanup(os.remove, file1)
+        from pystitch.readers import DsbReader
+        self.assertEqual(read(file1), EmbPattern.read_embroidery(DsbReader, file1))
+
+    def test_read_zero_header_keeps_extension(self):
+        from pystitch.readers import KsmReader
+        file1 = "detect_zeros.ksm"
+        with open(file1, "wb") as f:
+            f.write(bytes(0x200) + b"\x00\x05\x05\x00\x0a\x0a" * 20)
+        self.addCleanup(os.remove, file1)
+        self.assertEqual(rank_formats(bytes(0x200), "ksm"), [("xxx", HEADER)])
+        self.assertEqual(read(file1), EmbPattern.read_embroidery(KsmReader, file1))
+        self.assertEqual(read(file1), read(file1, {"detect": False}))
@@ -0,0 +1,96 @@
+from __future__ import print_function
+
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestDigest(unittest.TestCase):
+
+    def test_digest_stable(self):
+        pattern = get_big_pattern()
+        pattern.fix_color_count()
+        self.assertEqual(pattern.digest(), pattern.digest())
+        self.assertEqual(len(pattern.digest()), 32)
+        copy = pattern.copy()
+        self.assertEqual(copy.digest(), pattern.digest())
+        compact = pattern.copy()
+        compact.stitches = EmbStitchArray(compact.stitches)
+        self.assertEqual(compact.digest(), pattern.digest())
+
+    def test_digest_changes(self):
+        pattern = get_shift_pattern()
+        pattern.fix_color_count()
+        digest = pattern.digest()
+        pattern.translate(1, 0)
+        self.assertNotEqual(pattern.digest(), digest)
+        pattern.translate(-1, 0)
+        self.assertEqual(pattern.digest(), digest)
+        pattern.threadlist[0].color = 0x123456
+        self.assertNotEqual(pattern.digest(), digest)
+        pattern = get_shift_pattern()
+        pattern.fix_color_count()
+        pattern.extras["name"] = "shift"
+        self.assertNotEqual(pattern.digest(), digest)
+        named = pattern.digest()
+        pattern.stitches[0][0] += 5
+        self.assertNotEqual(pattern.digest(), named)
+        compact = pattern.copy()
+        compact.stitches = EmbStitchArray(compact.stitches)
+        named = compact.digest()
+        compact.stitches[0][0] -= 5
+        self.assertNotEqual(compact.digest(), named)
+
+    def test_digest_incremental(self):
+        pattern = EmbPattern(compact=True)
+        pattern.add_thread("red")
+        for i in range(100):
+            pattern.stitch_abs(i, i * 2)
+            if i % 10 == 0:
+                pattern.digest()
+        pattern.end()
+        fresh = EmbPattern()
+        fresh.stitches = [list(stitch) for stitch in pattern.stitches]
+        fresh.threadlist = pattern.threadlist[:]
+        self.assertEqual(pattern.digest(), fresh.digest())
+        pattern.stitches.pop()
+        pattern.stitches.pop()
+        fresh.stitches = fresh.stitches[:-2]
+        self.assertEqual(pattern.digest(), fresh.digest())
+
+    def test_digest_equal_values(self):
+        a = EmbPattern()
+        b = EmbPattern()
+        a.stitch_abs(1, 0)
+        b.stitch_abs(1.0, -0.0)
+        a.extras["values"] = {"a": 1, "b": (2.5, "x"), "c": b"data"}
+        b.extras["values"] = {"c": bytearray(b"data"), "b": (2.5, "x"), "a": 1.0}
+        self.assertEqual(a, b)
+        self.assertEqual(a.digest(), b.digest())
+        b.extras["values"]["b"] = [2.5, "x"]
+        self.assertNotEqual(a, b)
+        self.assertNotEqual(a.digest(), b.digest())
+
+    def test_equality_uses_digest(self):
+        pattern = get_big_pattern()
+        other = pattern.copy()
+        self.assertEqual(pattern, other)
+        other.add_stitch_absolute(STITCH, 0, 0)
+        self.assertNotEqual(pattern, other)
+        other = pattern.copy()
+        other.extras["name"] = "other"
+        self.assertNotEqual(pattern, other)
+        self.assertNotEqual(pattern, "pattern")
+
+    def test_equality_after_edits(self):
+        for compact in (False, True):
+            a = EmbPattern(compact=compact)
+            b = EmbPattern(compact=compact)
+            for pattern in (a, b):
+                pattern.add_block([(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)], "red")
+            self.assertEqual(a, b)
+            a.stitches[3][0] = 999
+            self.assertNotEqual(a, b)
+            b.stitches[3][0] = 999
+            self.assertEqual(a, b)
+            self.assertEqual(a.digest(), b.digest())
@@ -0,0 +1,44 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from pystitch.readers import DstReader
+from pystitch.writers import DstWriter
+from test.pattern_for_tests import *
+
+
+class TestDstCodec(unittest.TestCase):
+
+    def test_dst_decode_tables(self):
+        for b0, b1, b2 in ((0, 0, 3), (0xFF, 0xFF, 0xFF), (0x55, 0xAA, 0x83), (0x12, 0x34, 0x5B)):
+            dx = DstReader.DX_TABLE[0][b0] + DstReader.DX_TABLE[1][b1] + DstReader.DX_TABLE[2][b2]
+            dy = DstReader.DY_TABLE[0][b0] + DstReader.DY_TABLE[1][b1] + DstReader.DY_TABLE[2][b2]
+            self.assertEqual(dx, DstReader.decode_dx(b0, b1, b2))
+            self.assertEqual(dy, DstReader.decode_dy(b0, b1, b2))
+
+    def test_dst_encode_tables(self):
+        tables = DstWriter.get_record_tables()
+        for dx in range(-121, 122, 11):
+            for dy in range(-121, 122, 7):
+                index = ((dx + 121) * 243 + dy + 121) * 3
+                self.assertEqual(tables[STITCH][index:index + 3], DstWriter.encode_record(dx, dy, STITCH))
+                self.assertEqual(tables[JUMP][index:index + 3], DstWriter.encode_record(dx, dy, JUMP))
+
+    def test_dst_block_round_trip(self):
+        pattern = EmbPattern()
+        for i in range(-121, 122):
+            pattern.add_stitch_relative(STITCH, i, -i)
+            pattern.add_stitch_relative(JUMP, -i, i // 2)
+        pattern.color_change()
+        pattern.add_stitch_relative(STITCH, 121, 121)
+        pattern.end()
+        stream = io.BytesIO()
+        DstWriter.write(pattern, stream)
+        read_pattern = EmbPattern()
+        DstReader.read(io.BytesIO(stream.getvalue()), read_pattern)
+        self.assertEqual(read_pattern.count_stitch_commands(STITCH), pattern.count_stitch_commands(STITCH))
+        self.assertEqual(read_pattern.count_color_changes(), 1)
+        original = [s[:2] for s in pattern.stitches if s[2] == STITCH]
+        read = [s[:2] for s in read_pattern.stitches if s[2] == STITCH]
+        self.assertEqual(original, read)
@@ -2,6 +2,7 @@ from __future__ import print_function
 
 import unittest
 
+from pystitch.utils.EmbMatrix import EmbMatrix
 from test.pattern_for_tests import *
 
 
@@ -111,3 +112,81 @@ class TestEmbpattern(unittest.TestCase):
         encoder = Transcoder()
         encoder.transcode(pattern, pattern)
         self.assertNotEqual(len(pattern.stitches), 0)
+
+    def test_encoder_long_move_split(self):
+        pattern = EmbPattern()
+        pattern.stitch_abs(0, 0)
+        pattern.stitch_abs(1000, 250)
+        pattern.add_command(JUMP, -800, 300)
+        pattern.stitch_abs(-800, 300)
+        compact = EmbPattern(compact=True)
+        compact.stitches.extend(pattern.stitches)
+        settings = {"max_stitch": 121, "max_jump": 121}
+        normal = pattern.get_normalized_pattern(settings)
+        normal_compact = compact.get_normalized_pattern(settings)
+        self.assertEqual(normal_compact.stitches, normal.stitches)
+        for i in range(1, len(normal.stitches)):
+            dx = normal.stitches[i][0] - normal.stitches[i - 1][0]
+            dy = normal.stitches[i][1] - normal.stitches[i - 1][1]
+            self.assertLessEqual(abs(dx), 121)
+            self.assertLessEqual(abs(dy), 121)
+        self.assertEqual(normal.stitches[-2][:2], [-800, 300])
+
+    def test_encoder_thread_change_index(self):
+        from pystitch.utils.EmbEncoder import thread_change_index
+        pattern = EmbPattern()
+        pattern.add_command(COLOR_BREAK)
+        pattern.add_command(JUMP, 10, 10)
+        pattern.stitch_abs(0, 0)
+        pattern.add_command(encode_thread_change(COLOR_CHANGE, 2))
+        pattern.stitch_abs(10, 0)
+        pattern.add_command(NEEDLE_SET)
+        pattern.add_command(SET_CHANGE_SEQUENCE)
+        pattern.end()
+        self.assertEqual(thread_change_index(pattern.stitches), (2, [0, 3, 5, 6]))
+        self.assertEqual(thread_change_index(EmbStitchArray(pattern.stitches)), (2, [0, 3, 5, 6]))
+        self.assertEqual(thread_change_index([]), (0, []))
+
+    def test_encoder_matrix_commands(self):
+        from pystitch.utils.EmbEncoder import matrix_translation
+        self.assertEqual(matrix_translation(EmbMatrix().m), (0, 0))
+        matrix = EmbMatrix()
+        matrix.post_translate(5, -3)
+        self.assertEqual(matrix_translation(matrix.m), (5, -3))
+        matrix.post_rotate(90)
+        self.assertIsNone(matrix_translation(matrix.m))
+        pattern = EmbPattern()
+        pattern.stitch_abs(10, 10)
+        pattern.add_command(MATRIX_TRANSLATE, 100, 50)
+        pattern.stitch_abs(20, 10)
+        pattern.add_command(MATRIX_ROTATE_ORIGIN, 90)
+        pattern.stitch_abs(20, 20)
+        pattern.add_command(MATRIX_RESET)
+        pattern.stitch_abs(30, 20)
+        normal = pattern.get_normalized_pattern()
+        stitches = [stitch[:2] for stitch in normal.stitches if stitch[2] == STITCH]
+        self.assertEqual(stitches[0], [10, 10])
+        self.assertEqual(stitches[1], [120, 60])
+        # Translated, then rotated about the origin.
+        self.assertAlmostEqual(stitches[2][0], -(20 + 50))
+        self.assertAlmostEqual(stitches[2][1], 20 + 100)
+        self.assertEqual(stitches[3], [30, 20])
+
+    def test_encoder_translate_matches_matrix(self):
+        pattern = get_big_pattern()
+        translated = pattern.get_normalized_pattern({"translate": (7.5, -3)})
+        scaled = pattern.get_normalized_pattern({"translate": (7.5, -3), "scale": 1})
+        self.assertEqual(translated.stitches, scaled.stitches)
+
+    def test_encoder_handler_table(self):
+        from pystitch.utils.EmbEncoder import Transcoder
+
+        class SkipStops(Transcoder):
+            def handle_stop(self, x, y):
+                pass
+
+        pattern = get_simple_stop()
+        normal = EmbPattern()
+        SkipStops().transcode(pattern, normal)
+        self.assertEqual(normal.count_stitch_commands(STOP), 0)
+        self.assertNotEqual(pattern.get_normalized_pattern().count_stitch_commands(STOP), 0)
@@ -211,3 +211,41 @@ class TestInterpolate(unittest.TestCase):
         pattern.interpolate_frame_eject()
         self.assertEqual(pattern.count_stitch_commands(FRAME_EJECT), 1)
         self.assertEqual(pattern.count_stitch_commands(STOP), 0)
+
+    def test_interpolate_trims_clipping(self):
+        """Trims are added before long jump runs, returning runs are clipped"""
+        pattern = EmbPattern()
+        pattern.stitch_abs(0, 0)
+        pattern.stitch_abs(10, 0)
+        pattern.move_abs(20, 0)
+        pattern.move_abs(10, 0)
+        pattern.stitch_abs(10, 10)
+        pattern.move_abs(100, 10)
+        pattern.move_abs(200, 10)
+        pattern.stitch_abs(200, 20)
+        pattern.interpolate_trims(distance_to_require_trim=50)
+        self.assertEqual(pattern.stitches, [
+            [0, 0, STITCH], [10, 0, STITCH], [10, 10, STITCH], [10, 10, TRIM],
+            [100, 10, JUMP], [200, 10, JUMP], [200, 20, STITCH],
+        ])
+
+    def test_interpolate_compact_matches(self):
+        """Interpolations give the same stitches in compact storage"""
+        pattern = get_fractal_pattern()
+        pattern.fix_color_count()
+        pattern.interpolate_stop_as_duplicate_color()
+        for i in range(0, len(pattern.stitches), 50):
+            pattern.stitches.insert(i, [pattern.stitches[i][0] + 100, pattern.stitches[i][1], JUMP])
+        pattern.stop()
+        for name, args in (
+            ("interpolate_trims", (2, 50)),
+            ("interpolate_frame_eject", ()),
+            ("interpolate_duplicate_color_as_stop", ()),
+        ):
+            p1 = pattern.copy()
+            p2 = pattern.copy()
+            p2.stitches = EmbStitchArray(p2.stitches)
+            getattr(p1, name)(*args)
+            getattr(p2, name)(*args)
+            self.assertEqual(p2.stitches, p1.stitches)
+            self.assertEqual(p2.threadlist, p1.threadlist)
@@ -0,0 +1,87 @@
+from __future__ import print_function
+
+import io
+import os
+import tempfile
+import unittest
+
+from pystitch.readers import PesReader
+from test.pattern_for_tests import *
+
+
+class TestLazy(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, pattern, extension):
+        path = os.path.join(self.directory.name, "lazy." + extension)
+        write(pattern, path)
+        return path
+
+    def test_lazy_read_formats(self):
+        pattern = get_big_pattern()
+        pattern.metadata("name", "lazy")
+        for extension in ("dst", "exp", "jef", "pec", "pes", "tbf", "u01"):
+            path = self.write_file(pattern, extension)
+            eager = read(path)
+            lazy = read(path, lazy=True)
+            self.assertTrue(lazy.deferred, extension)
+            self.assertNotIn("stitches", lazy.__dict__)
+            self.assertEqual(lazy.threadlist, eager.threadlist, extension)
+            self.assertEqual(lazy.extras, eager.extras, extension)
+            self.assertTrue(lazy.deferred, extension)
+            self.assertEqual(lazy.stitches, eager.stitches, extension)
+            self.assertFalse(lazy.deferred, extension)
+            self.assertEqual(lazy, eager)
+
+    def test_lazy_geometry_decodes(self):
+        path = self.write_file(get_big_pattern(), "dst")
+        eager = read(path)
+        lazy = read(path, lazy=True)
+        self.assertEqual(lazy.bounds(), eager.bounds())
+        self.assertFalse(lazy.deferred)
+        lazy = read(path, lazy=True)
+        self.assertEqual(len(lazy), len(eager))
+        self.assertEqual(lazy.count_stitch_commands(STITCH), eager.count_stitch_commands(STITCH))
+
+    def test_lazy_stream_and_mmap(self):
+        path = self.write_file(get_big_pattern(), "pes")
+        eager = read(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        lazy = EmbPattern.read_embroidery(PesReader, io.BytesIO(data), None, None, True)
+        self.assertTrue(lazy.deferred)
+        self.assertEqual(lazy.stitches, eager.stitches)
+        lazy = read(path, {"mmap": True}, lazy=True)
+        self.assertTrue(lazy.deferred)
+        self.assertEqual(lazy.stitches, eager.stitches)
+
+    def test_lazy_threads_final(self):
+        # Repeated colors become stops in PES, JEF lists stops as None threads.
+        pattern = get_big_pattern()
+        pattern.add_block([(0, 0), (0, 100), (100, 100)], "lime")
+        pattern.add_stitch_relative(STOP)
+        pattern.add_block([(0, 0), (0, 100), (100, 100)], "red")
+        for extension in ("pes", "jef"):
+            path = self.write_file(pattern, extension)
+            eager = read(path)
+            lazy = read(path, lazy=True)
+            self.assertFalse(lazy.deferred, extension)
+            self.assertEqual(lazy.threadlist, eager.threadlist, extension)
+            self.assertEqual(lazy.stitches, eager.stitches, extension)
+
+    def test_lazy_unsupported_format(self):
+        path = self.write_file(get_big_pattern(), "vp3")
+        lazy = read(path, lazy=True)
+        self.assertFalse(lazy.deferred)
+        self.assertEqual(lazy.stitches, read(path).stitches)
+
+    def test_lazy_replaced_stitches(self):
+        path = self.write_file(get_big_pattern(), "dst")
+        lazy = read(path, lazy=True)
+        lazy.stitches = []
+        self.assertFalse(lazy.deferred)
+        self.assertEqual(len(lazy), 0)
+        self.assertRaises(AttributeError, lambda: lazy.missing)
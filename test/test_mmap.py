@@ -0,0 +1,39 @@
+from __future__ import print_function
+
+import os
+import unittest
+
+from pystitch.readers import HusReader
+from test.pattern_for_tests import *
+
+
+class TestMmap(unittest.TestCase):
+
+    def test_mmap_read_matches(self):
+        for extension in ("pes", "vp3", "dst", "jef", "pec", "exp", "xxx", "u01", "tbf"):
+            file1 = "mmap." + extension
+            write(get_big_pattern(), file1)
+            self.addCleanup(os.remove, file1)
+            expected = read(file1)
+            mapped = read(file1, {"mmap": True})
+            self.assertEqual(expected, mapped, extension)
+            self.assertEqual(len(expected.threadlist), len(mapped.threadlist))
+            for t1, t2 in zip(expected.threadlist, mapped.threadlist):
+                self.assertEqual(t1.color, t2.color)
+
+    def test_mmap_read_hus(self):
+        file1 = "mmap.hus"
+        with open(file1, "wb") as f:
+            f.write(hus_bytes([0x80, 0x81, 0x80, 0x88, 0x90], [5, 250, 3, 0, 0], [5, 10, 253, 0, 0]))
+        self.addCleanup(os.remove, file1)
+        expected = EmbPattern.read_embroidery(HusReader, file1)
+        mapped = EmbPattern.read_embroidery(HusReader, file1, {"mmap": True})
+        self.assertEqual(expected.count_stitches(), 5)
+        self.assertEqual(expected, mapped)
+
+    def test_mmap_empty_file(self):
+        file1 = "mmap_empty.dst"
+        open(file1, "wb").close()
+        self.addCleanup(os.remove, file1)
+        pattern = read(file1, {"mmap": True})
+        self.assertEqual(pattern.count_stitches(), 1)
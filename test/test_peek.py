@@ -0,0 +1,74 @@
+from __future__ import print_function
+
+import os
+import unittest
+
+from pystitch.readers import HusReader
+from test.pattern_for_tests import *
+
+
+def thread_colors(threadlist):
+    return [thread.color for thread in threadlist]
+
+
+class TestPeek(unittest.TestCase):
+
+    def peek_and_read(self, extension):
+        pattern = get_shift_pattern()
+        pattern.metadata("name", "peek")
+        file1 = "peek." + extension
+        write(pattern, file1)
+        self.addCleanup(os.remove, file1)
+        return peek(file1), EmbInfo.from_pattern(read(file1))
+
+    def test_peek_headers(self):
+        for extension in ("dst", "pes", "pec", "tbf", "xxx"):
+            info, full = self.peek_and_read(extension)
+            self.assertTrue(info.header_only, extension)
+            self.assertFalse(full.header_only, extension)
+            self.assertEqual(info.color_count, full.color_count, extension)
+            self.assertEqual(info.extents, full.extents, extension)
+            self.assertEqual(thread_colors(info.threadlist), thread_colors(full.threadlist), extension)
+            if extension != "xxx":
+                self.assertEqual(info.name, "peek", extension)
+
+    def test_peek_stitch_counts(self):
+        for extension in ("dst", "tbf", "xxx"):
+            info, full = self.peek_and_read(extension)
+            self.assertEqual(info.stitch_count, full.stitch_count, extension)
+        info, full = self.peek_and_read("pes")
+        self.assertIsNone(info.stitch_count)
+
+    def test_peek_vp3(self):
+        info, full = self.peek_and_read("vp3")
+        self.assertTrue(info.header_only)
+        self.assertEqual(info.color_count, full.color_count)
+        self.assertEqual(thread_colors(info.threadlist), thread_colors(full.threadlist))
+        for value, expected in zip(info.extents, full.extents):
+            self.assertAlmostEqual(value, expected, delta=1.5)
+
+    def test_peek_hus(self):
+        file1 = "peek.hus"
+        with open(file1, "wb") as f:
+            f.write(hus_bytes([0x80, 0x81, 0x80, 0x88, 0x90], [5, 250, 3, 0, 0], [5, 10, 253, 0, 0]))
+        self.addCleanup(os.remove, file1)
+        info = EmbPattern.peek_embroidery(HusReader, file1)
+        self.assertEqual(info.stitch_count, 5)
+        self.assertEqual(info.color_count, 1)
+        self.assertEqual(len(info.threadlist), 1)
+        self.assertEqual(info.extents, (0, 0, 0, 0))
+
+    def test_peek_fallback(self):
+        info, full = self.peek_and_read("exp")
+        self.assertFalse(info.header_only)
+        self.assertEqual(info.stitch_count, full.stitch_count)
+        self.assertEqual(info.extents, full.extents)
+
+    def test_read_header_only(self):
+        file1 = "peek_header.dst"
+        write(get_big_pattern(), file1)
+        self.addCleanup(os.remove, file1)
+        info = read(file1, header_only=True)
+        self.assertIsInstance(info, EmbInfo)
+        self.assertEqual(info.extents, (0, 0, 100, 100))
+        self.assertIsNone(peek("peek.nope"))
@@ -0,0 +1,68 @@
+from __future__ import print_function
+
+import random
+import unittest
+
+from pystitch.utils import EmbNumpy
+from pystitch.writers import PngWriter
+from pystitch.writers.PngWriter import PngBuffer
+from test.pattern_for_tests import *
+
+
+def get_buffers(lines, line_width, fancy, color):
+    buffers = []
+    for draw in ("plot_line", "draw_line", "draw_lines"):
+        buffer = PngBuffer(30, 20)
+        buffer.background(10, 20, 30, 255)
+        buffer.line_width = line_width
+        buffer.fancy = fancy
+        buffer.set_color(*color)
+        if draw == "draw_lines":
+            buffer.draw_lines(lines)
+        else:
+            for line in lines:
+                getattr(buffer, draw)(*line)
+        buffers.append(bytes(buffer.buf))
+    return buffers
+
+
+class TestPng(unittest.TestCase):
+
+    def check_lines_match_plot(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            lines = [tuple(rng.randint(-10, 45) for _ in range(4)) for _ in range(rng.randint(1, 12))]
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+            if rng.random() < 0.2:
+                color = (0, 0, 1, 255)
+            line_width = rng.randint(0, 6)
+            fancy = rng.random() < 0.5
+            plotted, drawn, batched = get_buffers(lines, line_width, fancy, color)
+            self.assertEqual(plotted, drawn)
+            self.assertEqual(plotted, batched)
+
+    def test_draw_line_matches_plot(self):
+        self.check_lines_match_plot()
+
+    def test_draw_line_matches_plot_without_numpy(self):
+        EmbNumpy.ENABLED = False
+        try:
+            self.check_lines_match_plot()
+        finally:
+            EmbNumpy.ENABLED = True
+
+    def test_translucent_line(self):
+        plotted, drawn, batched = get_buffers([(0, 0, 20, 7), (3, 15, 3, 0)], 3, True, (200, 100, 50, 128))
+        self.assertEqual(plotted, drawn)
+        self.assertEqual(plotted, batched)
+
+    def test_line_pixels_cache(self):
+        buffer = PngBuffer(10, 10)
+        buffer.fancy = True
+        buffer.set_color(255, 0, 0)
+        pixels = buffer.line_pixels(4)
+        self.assertIs(pixels, buffer.line_pixels(4))
+        self.assertEqual(pixels[2], buffer.opaque_pixel(buffer.gradient(0.5)))
+        buffer.set_color(0, 255, 0)
+        self.assertEqual(buffer.line_pixels(4)[0][:3], buffer.opaque_pixel(buffer.gradient(0))[:3])
+        self.assertNotEqual(pixels, buffer.line_pixels(4))
@@ -0,0 +1,72 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from pystitch.readers import DstReader, JefReader
+from pystitch.utils.ReadHelper import (
+    ReadBuffer,
+    read_int_8,
+    read_int_16be,
+    read_int_16le,
+    read_int_24be,
+    read_int_24le,
+    read_int_32be,
+    read_int_32le,
+    read_sint_8,
+)
+from pystitch.writers import DstWriter, JefWriter
+from test.pattern_for_tests import *
+
+
+class TestReadBuffer(unittest.TestCase):
+
+    def test_read_buffer_helpers_match_stream(self):
+        data = bytes(range(256)) * 2
+        readers = (read_int_8, read_sint_8, read_int_16le, read_int_16be,
+                   read_int_24le, read_int_24be, read_int_32le, read_int_32be)
+        stream = io.BytesIO(data)
+        buffer = ReadBuffer(data)
+        while True:
+            for helper in readers:
+                self.assertEqual(helper(stream), helper(buffer))
+                self.assertEqual(stream.tell(), buffer.tell())
+            if buffer.remaining() == 0:
+                break
+        self.assertIsNone(read_int_8(buffer))
+        self.assertIsNone(read_int_32le(buffer))
+
+    def test_read_buffer_file_methods(self):
+        buffer = ReadBuffer.from_stream(io.BytesIO(b"0123456789"))
+        self.assertIs(ReadBuffer.from_stream(buffer), buffer)
+        self.assertEqual(buffer.read(3), b"012")
+        buffer.seek(2, 1)
+        self.assertEqual(buffer.read(2), b"56")
+        buffer.seek(-2, 2)
+        self.assertEqual(buffer.tell(), 8)
+        self.assertEqual(bytes(buffer.view(5)), b"89")
+        self.assertEqual(buffer.read(), b"")
+        buffer.seek(20)
+        self.assertEqual(buffer.read(1), b"")
+        self.assertEqual(buffer.remaining(), 0)
+
+    def test_read_buffer_keeps_stream_position(self):
+        stream = io.BytesIO(b"abcdef")
+        stream.seek(2)
+        buffer = ReadBuffer.from_stream(stream)
+        self.assertEqual(buffer.read(2), b"cd")
+        buffer.sync(stream)
+        self.assertEqual(stream.tell(), 4)
+
+    def test_read_stream_position(self):
+        for reader, writer in ((DstReader, DstWriter), (JefReader, JefWriter)):
+            stream = io.BytesIO()
+            EmbPattern.write_embroidery(writer, get_big_pattern(), stream)
+            size = stream.tell()
+            stream.write(b"\x00" * 16)
+            stream.seek(0)
+            pattern = EmbPattern.read_embroidery(reader, stream)
+            self.assertGreater(pattern.count_stitches(), 0)
+            self.assertLessEqual(stream.tell(), size + 16)
+            stream.seek(0)
+            self.assertEqual(pattern, EmbPattern.read_embroidery(reader, io.BytesIO(stream.read())))
@@ -0,0 +1,91 @@
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import unittest
+
+import pystitch
+from test.pattern_for_tests import *
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_supported_formats_modules(self):
+        for file_type in pystitch.supported_formats():
+            for key, package in (("reader", "pystitch.readers."), ("writer", "pystitch.writers.")):
+                if key in file_type:
+                    self.assertTrue(file_type[key].__name__.startswith(package))
+
+    def test_supported_formats_copies(self):
+        first = next(pystitch.supported_formats())
+        first["extension"] = "changed"
+        self.assertNotEqual(next(pystitch.supported_formats())["extension"], "changed")
+
+    def test_get_format(self):
+        from pystitch.readers import DstReader
+        from pystitch.writers import DstWriter
+        file_type = pystitch.get_format("DST")
+        self.assertEqual(file_type["extension"], "dst")
+        self.assertIs(file_type["reader"], DstReader)
+        self.assertIs(file_type["writer"], DstWriter)
+        self.assertEqual(pystitch.get_format(mimetype="image/png")["extension"], "png")
+        self.assertEqual(pystitch.get_format(mimetype="text/plain")["extension"], "txt")
+        self.assertIsNone(pystitch.get_format("nope"))
+        self.assertIsNone(pystitch.get_format())
+
+    def test_module_attributes(self):
+        from pystitch.readers import PesReader
+        self.assertIs(pystitch.PesReader, PesReader)
+        self.assertIn("SvgWriter", dir(pystitch))
+        with self.assertRaises(AttributeError):
+            pystitch.NoSuchReader
+
+    def test_batch_import_is_lazy(self):
+        path = os.path.dirname(os.path.dirname(pystitch.__file__))
+        code = (
+            "import sys; sys.path.insert(0, %r); import pystitch\n"
+            "loaded = lambda: sorted(m for m in ('concurrent.futures', 'multiprocessing') if m in sys.modules)\n"
+            "print(loaded())\n"
+            "pystitch.convert_many\n"
+            "print(loaded())\n" % path
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+        self.assertEqual(output.split("\n")[:2], ["[]", "[]"])
+        self.assertIs(pystitch.convert_many, pystitch.utils.EmbBatch.convert_many)
+
+    def test_star_import(self):
+        namespace = {}
+        exec("from pystitch import *", namespace)
+        from pystitch.readers import PesReader
+        from pystitch.writers import DstWriter
+        self.assertIs(namespace["PesReader"], PesReader)
+        self.assertIs(namespace["DstWriter"], DstWriter)
+        self.assertEqual(namespace["readers"].__name__, "pystitch.readers")
+        self.assertEqual(namespace["writers"].__name__, "pystitch.writers")
+        self.assertIn("read_dst", namespace)
+        self.assertIn("EmbPattern", namespace)
+        self.assertNotIn("importlib", namespace)
+        self.assertNotIn("List", namespace)
+
+    def test_import_is_lazy(self):
+        path = os.path.dirname(os.path.dirname(pystitch.__file__))
+        code = (
+            "import sys; sys.path.insert(0, %r); import pystitch\n"
+            "loaded = lambda: sorted(m for m in sys.modules if m.startswith(('pystitch.readers.', 'pystitch.writers.')))\n"
+            "print(loaded())\n"
+            "pystitch.read_dst\n"
+            "pystitch.get_format('dst')\n"
+            "print(loaded())\n" % path
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+        self.assertEqual(output.split("\n")[:2], [
+            "[]", "['pystitch.readers.DstReader', 'pystitch.writers.DstWriter']"
+        ])
+
+    def test_unsupported_write(self):
+        with self.assertRaises(IOError):
+            write(get_simple_pattern(), "file.nope")
+        with self.assertRaises(IOError):
+            write(get_simple_pattern(), "file.sew")
+        self.assertIsNone(read("file.nope"))
@@ -0,0 +1,149 @@
+from __future__ import print_function
+
+import io
+import pickle
+import unittest
+
+from test.pattern_for_tests import *
+from pystitch.core import EmbSerialize
+from pystitch.threads.EmbThread import EmbThread
+from pystitch.readers import DstReader
+
+
+def stitch_types(pattern):
+    return [tuple(type(value) for value in stitch) for stitch in pattern.stitches]
+
+
+class Spool(EmbThread):
+    pass
+
+
+class TestSerialize(unittest.TestCase):
+
+    def assert_round_trip(self, pattern):
+        restored = EmbPattern.from_bytes(pattern.to_bytes())
+        self.assertEqual(restored, pattern)
+        self.assertEqual(restored.compact, pattern.compact)
+        self.assertEqual(restored.stitches, pattern.stitches)
+        self.assertEqual([repr(thread) for thread in restored.threadlist],
+                         [repr(thread) for thread in pattern.threadlist])
+        self.assertEqual(restored.extras, pattern.extras)
+        self.assertEqual(restored._previousX, pattern._previousX)
+        self.assertEqual(restored._previousY, pattern._previousY)
+        if not pattern.compact:
+            self.assertEqual(stitch_types(restored), stitch_types(pattern))
+        return restored
+
+    def test_round_trip_int_coordinates(self):
+        pattern = get_big_pattern()
+        pattern.metadata("name", "ints")
+        self.assertEqual(pattern.to_bytes()[6], EmbSerialize.KIND_INT)
+        self.assert_round_trip(pattern)
+
+    def test_round_trip_float_coordinates(self):
+        pattern = EmbPattern()
+        pattern.add_thread("red")
+        pattern.add_stitch_absolute(JUMP, 0.5, -0.0)
+        pattern.add_stitch_absolute(STITCH, 10.0, 20.0)
+        pattern.add_stitch_absolute(STITCH, 1e12, -1.25)
+        pattern.add_stitch_relative(COLOR_CHANGE, 0.0, 0.0)
+        pattern.add_stitch_relative(END, 0.0, 0.0)
+        self.assertEqual(pattern.to_bytes()[6], EmbSerialize.KIND_FLOAT)
+        restored = self.assert_round_trip(pattern)
+        self.assertEqual(str(restored.stitches[0][1]), "-0.0")
+
+    def test_round_trip_integral_floats(self):
+        source = get_big_pattern()
+        pattern = EmbPattern()
+        for x, y, command in source.stitches:
+            pattern.stitches.append([float(x), float(y), command])
+        self.assertEqual(pattern.to_bytes()[6], EmbSerialize.KIND_INTEGRAL)
+        self.assert_round_trip(pattern)
+
+    def test_round_trip_mixed_types(self):
+        pattern = get_shift_pattern()
+        self.assertTrue(pattern.to_bytes()[6] & EmbSerialize.KIND_MIXED)
+        self.assert_round_trip(pattern)
+        pattern.stitches[0][0] = 1 << 60
+        pattern.invalidate()
+        self.assertEqual(pattern.to_bytes()[6], EmbSerialize.KIND_PICKLED)
+        self.assert_round_trip(pattern)
+
+    def test_round_trip_compact(self):
+        pattern = get_big_pattern()
+        compact = EmbPattern(compact=True)
+        compact.stitches.extend(pattern.stitches)
+        compact.threadlist.extend(pattern.threadlist)
+        compact.add_stitch_absolute(STITCH, 0.25, 0.75)
+        self.assert_round_trip(compact)
+        compact.stitches[0][2] = NO_COMMAND
+        compact.invalidate()
+        restored = self.assert_round_trip(compact)
+        self.assertEqual(restored.stitches[0][2], NO_COMMAND)
+
+    def test_thread_changes(self):
+        pattern = EmbPattern()
+        pattern.add_block([(0, 0), (10, 10)], "red")
+        pattern.add_command(encode_thread_change(NEEDLE_SET, 3, 2, 1))
+        pattern.add_block([(0, 0), (10, 10)], "blue")
+        data = pattern.to_bytes()
+        self.assertEqual(data[8], EmbSerialize.COMMAND_UINT32)
+        self.assert_round_trip(pattern)
+
+    def test_threads_and_extras(self):
+        pattern = get_big_pattern()
+        pattern.threadlist[0].description = "Red é"
+        pattern.threadlist[0].brand = ""
+        pattern.threadlist[1].catalog_number = "1001"
+        pattern.threadlist.append(None)
+        pattern.extras["pec_graphic_0"] = (bytearray(b"\x01\x02"), 6, EmbThread("blue"))
+        pattern.extras["hoop"] = [100, 100.5, None]
+        restored = self.assert_round_trip(pattern)
+        self.assertEqual(restored.threadlist[0].description, "Red é")
+        self.assertEqual(restored.threadlist[0].brand, "")
+        self.assertIsNone(restored.threadlist[-1])
+        self.assertFalse(pattern.to_bytes()[5] & EmbSerialize.FLAG_THREADS_PICKLED)
+
+    def test_thread_subclass(self):
+        pattern = get_simple_pattern()
+        pattern.add_thread(Spool("green"))
+        self.assertTrue(pattern.to_bytes()[5] & EmbSerialize.FLAG_THREADS_PICKLED)
+        restored = self.assert_round_trip(pattern)
+        self.assertIsInstance(restored.threadlist[-1], Spool)
+        pattern.threadlist[-1] = EmbThread("green")
+        pattern.threadlist[-1].spool = 5
+        self.assertTrue(pattern.to_bytes()[5] & EmbSerialize.FLAG_THREADS_PICKLED)
+        restored = self.assert_round_trip(pattern)
+        self.assertEqual(restored.threadlist[-1].spool, 5)
+
+    def test_pickle(self):
+        pattern = get_big_pattern()
+        self.assertEqual(pattern, get_big_pattern())  # Fills the digest cache.
+        data = pickle.dumps(pattern, pickle.HIGHEST_PROTOCOL)
+        restored = pickle.loads(data)
+        self.assertEqual(restored, pattern)
+        self.assertEqual(restored.bounds(), pattern.bounds())
+        self.assertEqual(pickle.loads(pickle.dumps([pattern, pattern]))[1], pattern)
+
+    def test_pickle_smaller(self):
+        pattern = get_random_pattern_large(5000)
+        for stitch in pattern.stitches:
+            stitch[0] = float(round(stitch[0]))
+            stitch[1] = float(round(stitch[1]))
+        state = dict(pattern.__dict__, _cache={})
+        self.assertLess(len(pickle.dumps(pattern, -1)) * 2, len(pickle.dumps(state, -1)))
+
+    def test_pickle_lazy(self):
+        data = io.BytesIO()
+        write_dst(get_big_pattern(), data)
+        eager = read_dst(io.BytesIO(data.getvalue()))
+        lazy = EmbPattern.read_embroidery(DstReader, io.BytesIO(data.getvalue()), None, None, True)
+        self.assertTrue(lazy.deferred)
+        self.assertEqual(pickle.loads(pickle.dumps(lazy)), eager)
+
+    def test_bad_payload(self):
+        data = get_big_pattern().to_bytes()
+        self.assertRaises(ValueError, lambda: EmbPattern.from_bytes(b"PICKLE" + data))
+        self.assertRaises(ValueError, lambda: EmbPattern.from_bytes(data[:-10]))
+        self.assertRaises(ValueError, lambda: EmbPattern.from_bytes(data[:8]))
+        self.assertEqual(EmbPattern.from_bytes(memoryview(data)), get_big_pattern())
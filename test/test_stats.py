@@ -0,0 +1,116 @@
+from __future__ import print_function
+
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestStats(unittest.TestCase):
+
+    def test_stats_values(self):
+        pattern = EmbPattern()
+        pattern.add_thread("red")
+        pattern.stitch_abs(0, 0)
+        pattern.stitch_abs(30, 40)
+        pattern.move_abs(30, 100)
+        pattern.color_change()
+        pattern.stitch_abs(60, 100)
+        pattern.end()
+        stats = pattern.get_stats()
+        self.assertEqual(stats.bounds(), (0, 0, 60, 100))
+        self.assertEqual(stats.count_stitches(), 6)
+        self.assertEqual(stats.count_stitch_commands(STITCH), 3)
+        self.assertEqual(stats.count_color_changes(), 1)
+        self.assertEqual(stats.histogram(), {STITCH: 3, JUMP: 1, COLOR_CHANGE: 1, END: 1})
+        self.assertEqual(stats.thread_count, 2)
+        self.assertEqual(stats.stitch_length, 80.0)
+        self.assertEqual(stats.jump_length, 60.0)
+        self.assertEqual(stats.longest_stitch, 50.0)
+        self.assertEqual([block.count for block in stats.colorblocks], [2, 1])
+        self.assertEqual(stats.colorblocks[0].bounds(), (0, 0, 30, 40))
+        self.assertEqual(stats.colorblocks[1].start, 4)
+        self.assertEqual(stats.colorblocks[1].length, 30.0)
+
+    def test_stats_match_pattern_queries(self):
+        pattern = get_big_pattern()
+        stats = PatternStats(pattern.stitches)
+        self.assertEqual(pattern.bounds(), stats.bounds())
+        for command in (STITCH, JUMP, TRIM, COLOR_CHANGE, NEEDLE_SET, END):
+            self.assertEqual(
+                pattern.count_stitch_commands(command),
+                sum(1 for stitch in pattern.stitches if stitch[2] & COMMAND_MASK == command),
+            )
+
+    def test_stats_compact(self):
+        pattern = get_shift_pattern()
+        compact = pattern.copy()
+        compact.stitches = EmbStitchArray(compact.stitches)
+        expected = pattern.get_stats()
+        stats = compact.get_stats()
+        self.assertEqual(stats.bounds(), expected.bounds())
+        self.assertEqual(stats.histogram(), expected.histogram())
+        self.assertEqual(stats.thread_count, expected.thread_count)
+        self.assertEqual(stats.stitch_length, expected.stitch_length)
+        self.assertEqual(stats.jump_length, expected.jump_length)
+        self.assertEqual(
+            [(block.start, block.count, block.bounds(), block.length) for block in stats.colorblocks],
+            [(block.start, block.count, block.bounds(), block.length) for block in expected.colorblocks],
+        )
+
+    def test_stats_cached_until_modified(self):
+        pattern = get_big_pattern()
+        pattern.stitches = EmbStitchArray(pattern.stitches)
+        stats = pattern.get_stats()
+        self.assertIs(pattern.get_stats(), stats)
+        pattern.translate(100, 0)
+        self.assertIsNot(pattern.get_stats(), stats)
+        self.assertEqual(pattern.bounds()[0], stats.bounds()[0] + 100)
+        stats = pattern.get_stats()
+        pattern.add_stitch_absolute(STITCH, 10000, 0)
+        self.assertEqual(pattern.bounds()[2], 10000)
+        pattern.fix_color_count()
+        stats = pattern.get_stats()
+        pattern.add_thread("blue")
+        self.assertIs(pattern.get_stats(), stats)
+
+    def test_stats_follow_edits(self):
+        for compact in (False, True):
+            pattern = EmbPattern(compact=compact)
+            for i in range(4):
+                stitches = [[x + 200 * i, 0, STITCH] for x in range(10)]
+                pattern.stitches = EmbStitchArray(stitches) if compact else stitches
+                if i % 2 == 0:
+                    self.assertEqual(pattern.bounds()[2], 9 + 200 * i)
+            self.assertEqual(pattern.bounds()[2], 609)
+            pattern.stitches[9][0] = 5000
+            self.assertEqual(pattern.bounds()[2], 5000)
+            self.assertEqual(pattern.get_stats().bounds()[2], 5000)
+            pattern.stitches[5][2] = COLOR_CHANGE
+            pattern.fix_color_count()
+            self.assertEqual(len(pattern.threadlist), 2)
+
+    def test_stats_empty(self):
+        stats = EmbPattern().get_stats()
+        self.assertEqual(stats.count_stitches(), 0)
+        self.assertEqual(stats.thread_count, 0)
+        self.assertEqual(stats.bounds(), (float("inf"), float("inf"), -float("inf"), -float("inf")))
+
+    def test_tally_matches_stats(self):
+        from pystitch.utils.WriteHelper import StitchTally
+        pattern = get_shift_pattern()
+        pattern.add_command(STOP)
+        pattern.end()
+        stats = PatternStats(pattern.stitches)
+        tally = StitchTally(pattern.stitches)
+        self.assertEqual(list(tally), pattern.stitches)
+        self.assertEqual(tally.bounds(), stats.bounds())
+        self.assertEqual(tally.histogram(), stats.histogram())
+        self.assertEqual(tally.count_stitches(), stats.count_stitches())
+        self.assertEqual(tally.thread_count, stats.thread_count)
+        self.assertIs(tally.last, pattern.stitches[-1])
+        self.assertEqual(
+            tally.changes,
+            [stitch for stitch in pattern.stitches
+             if stitch[2] & COMMAND_MASK in (COLOR_CHANGE, COLOR_BREAK, NEEDLE_SET, STOP)],
+        )
+        self.assertIsNone(stats.changes)
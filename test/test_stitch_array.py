@@ -0,0 +1,166 @@
+from __future__ import print_function
+
+import os
+import unittest
+
+from pystitch.core.EmbStitchArray import EmbStitchArray
+from pystitch.utils import EmbMatrix, EmbNumpy
+from test.pattern_for_tests import *
+
+
+def get_compact(pattern):
+    compact = EmbPattern(compact=True)
+    compact.stitches.extend(pattern.stitches)
+    compact.threadlist.extend(pattern.threadlist)
+    compact.extras.update(pattern.extras)
+    return compact
+
+
+class TestStitchArray(unittest.TestCase):
+
+    def test_compact_indexing(self):
+        pattern = EmbPattern(compact=True)
+        pattern.add_stitch_absolute(STITCH, 10, 20)
+        pattern.add_stitch_absolute(JUMP, 30, 40)
+        self.assertTrue(pattern.compact)
+        self.assertEqual(pattern.stitches[0][0], 10)
+        self.assertEqual(pattern.stitches[1][1], 40)
+        self.assertEqual(pattern.stitches[-1][2], JUMP)
+        pattern.stitches[1][2] = STOP
+        self.assertEqual(pattern.stitches[1], [30, 40, STOP])
+        self.assertEqual(pattern.stitches, [[10, 20, STITCH], [30, 40, STOP]])
+        self.assertEqual(pattern.stitches[0][:2], [10, 20])
+        self.assertRaises(IndexError, lambda: pattern.stitches[2])
+
+    def test_compact_insert_delete(self):
+        pattern = EmbPattern(compact=True)
+        pattern += [(0, 0), (10, 0), (10, 10)]
+        pattern.trim(position=1)
+        self.assertEqual(pattern.stitches[1], [0, 0, TRIM])
+        del pattern.stitches[0:2]
+        self.assertEqual(len(pattern), 2)
+        self.assertEqual(pattern.stitches[0], [10, 0, STITCH])
+
+    def test_compact_version(self):
+        stitches = EmbStitchArray([[0, 0, STITCH], [10, 0, STITCH]])
+        self.assertNotEqual(EmbStitchArray().version, EmbStitchArray().version)
+        version = stitches.version
+        stitches.append([20, 0, STITCH])
+        stitches.extend([[30, 0, STITCH]])
+        self.assertEqual(stitches.version, version)
+        for edit in (
+            lambda: stitches[0].__setitem__(0, 5),
+            lambda: stitches.__setitem__(1, [1, 1, JUMP]),
+            lambda: stitches.insert(0, [0, 0, STITCH]),
+            lambda: stitches.pop(),
+            lambda: stitches.__delitem__(0),
+            lambda: stitches.translate(1, 1),
+            lambda: stitches.transform(EmbMatrix()),
+            lambda: stitches.clear(),
+        ):
+            edit()
+            self.assertNotEqual(stitches.version, version)
+            version = stitches.version
+
+    def test_compact_matches_list(self):
+        pattern = get_big_pattern()
+        compact = get_compact(pattern)
+        self.assertEqual(compact, pattern)
+        self.assertEqual(compact.bounds(), pattern.bounds())
+        self.assertEqual(compact.count_color_changes(), pattern.count_color_changes())
+        self.assertEqual(compact.count_stitch_commands(STITCH), pattern.count_stitch_commands(STITCH))
+        compact.translate(5, -5)
+        pattern.translate(5, -5)
+        self.assertEqual(compact, pattern)
+        compact.fix_color_count()
+        pattern.fix_color_count()
+        self.assertEqual(len(compact.threadlist), len(pattern.threadlist))
+
+    def test_compact_normalized(self):
+        pattern = get_shift_pattern()
+        compact = get_compact(pattern)
+        normal = pattern.get_normalized_pattern({"max_stitch": 50, "max_jump": 50})
+        normal_compact = compact.get_normalized_pattern({"max_stitch": 50, "max_jump": 50})
+        self.assertTrue(normal_compact.compact)
+        self.assertEqual(normal_compact.stitches, normal.stitches)
+
+    def test_compact_write_read(self):
+        file1 = "compact.exp"
+        compact = get_compact(get_shift_pattern())
+        write_exp(compact, file1)
+        self.addCleanup(os.remove, file1)
+        read_pattern = read_exp(file1, pattern=EmbPattern(compact=True))
+        self.assertTrue(read_pattern.compact)
+        self.assertEqual(read_pattern, read_exp(file1))
+
+    def test_compact_text_output(self):
+        pattern = get_big_pattern()
+        pattern.add_thread("red")
+        pattern.add_stitch_absolute(STITCH, 12.5, -0.25)
+        pattern.end()
+        compact = get_compact(pattern)
+        for filename, settings in (
+            ("compact.csv", None),
+            ("compact_deltas.csv", {"deltas": True}),
+            ("compact_full.csv", {"displacement": True}),
+            ("compact.json", None),
+            ("compact.svg", None),
+        ):
+            written = []
+            for value in (pattern, compact):
+                write(value, filename, settings)
+                with open(filename, "rb") as f:
+                    written.append(f.read())
+                os.remove(filename)
+            self.assertEqual(written[0], written[1], filename)
+
+    def test_list_text_output_keeps_floats(self):
+        pattern = EmbPattern()
+        pattern.add_stitch_absolute(STITCH, 100.0, 0.5)
+        pattern.end()
+        write_csv(pattern, "floats.csv")
+        self.addCleanup(os.remove, "floats.csv")
+        with open("floats.csv", "rb") as f:
+            self.assertIn(b'"STITCH","100.0","0.5"', f.read())
+        write_json(pattern, "floats.json")
+        self.addCleanup(os.remove, "floats.json")
+        self.assertIsInstance(read_json("floats.json").stitches[0][0], float)
+
+    def test_compact_copy_clear(self):
+        compact = get_compact(get_simple_pattern())
+        copy = compact.copy()
+        self.assertTrue(copy.compact)
+        copy.stitches[0][0] = 1000
+        self.assertNotEqual(copy.stitches[0][0], compact.stitches[0][0])
+        copy.clear()
+        self.assertTrue(copy.compact)
+        self.assertEqual(len(copy.stitches), 0)
+
+    def test_numpy_matches_python(self):
+        if EmbNumpy.numpy() is None:
+            self.skipTest("numpy is not installed")
+        pattern = get_compact(get_random_pattern_large())
+        pattern.stitches[0][2] = NO_COMMAND
+        matrix = EmbMatrix()
+        matrix.post_rotate(33, 10, 10)
+        matrix.post_scale(1.5, 0.75)
+
+        def run(pattern):
+            results = [pattern.bounds(), pattern.count_stitch_commands(STITCH),
+                       pattern.count_stitch_commands(NO_COMMAND)]
+            pattern.translate(3.25, -7)
+            pattern.transform(matrix)
+            pattern.move_center_to_origin()
+            results.append(pattern.bounds())
+            return results
+
+        python = pattern.copy()
+        vectorized = pattern.copy()
+        vectorized_results = run(vectorized)
+        EmbNumpy.ENABLED = False
+        try:
+            python_results = run(python)
+        finally:
+            EmbNumpy.ENABLED = True
+        self.assertEqual(vectorized_results, python_results)
+        self.assertEqual(vectorized.stitches, python.stitches)
@@ -0,0 +1,48 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from pystitch.writers import DstWriter, ExpWriter, JefWriter, TbfWriter, U01Writer, XxxWriter
+from test.pattern_for_tests import *
+
+
+def write_bytes(writer, pattern, settings):
+    stream = io.BytesIO()
+    EmbPattern.write_embroidery(writer, pattern, stream, settings)
+    return stream.getvalue()
+
+
+class TestStream(unittest.TestCase):
+
+    def test_transcode_stream_matches_transcode(self):
+        pattern = get_shift_pattern_needles()
+        settings = {"max_stitch": 30, "max_jump": 30, "tie_on": True, "tie_off": True}
+        normal = pattern.get_normalized_pattern(settings)
+        stream_pattern, stitches = pattern.get_normalized_stream(settings)
+        self.assertEqual(len(stream_pattern.stitches), 0)
+        records = list(stitches)
+        self.assertEqual(records, normal.stitches)
+        self.assertEqual(len(stream_pattern.stitches), 0)
+        self.assertEqual(len(stream_pattern.threadlist), len(normal.threadlist))
+        self.assertEqual(stream_pattern.extras, normal.extras)
+
+    def test_stream_writers_identical(self):
+        writers = {
+            "dst": DstWriter, "exp": ExpWriter, "jef": JefWriter,
+            "tbf": TbfWriter, "u01": U01Writer, "xxx": XxxWriter,
+        }
+        patterns = [get_big_pattern(), get_shift_pattern(), get_shift_stop_pattern()]
+        for extension, writer in writers.items():
+            for pattern in patterns:
+                settings = {"date": "20200101000000", "trims": True}
+                streamed = write_bytes(writer, pattern, settings)
+                settings["stream"] = False
+                materialized = write_bytes(writer, pattern, settings)
+                self.assertEqual(streamed, materialized, extension)
+
+    def test_stream_writer_needles(self):
+        pattern = get_shift_pattern_needles()
+        settings = {"stream": False}
+        self.assertEqual(write_bytes(TbfWriter, pattern, {}), write_bytes(TbfWriter, pattern, settings))
+        self.assertEqual(write_bytes(U01Writer, pattern, {}), write_bytes(U01Writer, pattern, settings))
@@ -0,0 +1,66 @@
+from __future__ import print_function
+
+import os
+import tempfile
+import unittest
+
+from test.pattern_for_tests import *
+
+FORMATS = ["dst", "exp", "pes", "pec", "jef", "u01", "vp3", "xxx", "csv", "json"]
+
+
+class TestWriteAll(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = {"date": "20200101000000"}
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertSameFiles(self, prefix_a, prefix_b):
+        for extension in FORMATS:
+            with open(self.path(prefix_a + extension), "rb") as f, open(self.path(prefix_b + extension), "rb") as g:
+                self.assertEqual(f.read(), g.read(), extension)
+
+    def test_write_all_matches_write(self):
+        pattern = get_big_pattern()
+        pattern.fix_color_count()
+        for extension in FORMATS:
+            write(pattern, self.path("single." + extension), self.settings)
+        write_all(pattern, [self.path("all." + extension) for extension in FORMATS], self.settings)
+        self.assertSameFiles("single.", "all.")
+        write_all(pattern, [self.path("parallel." + extension) for extension in FORMATS], self.settings, workers=2)
+        self.assertSameFiles("single.", "parallel.")
+
+    def test_write_all_shares_normalization(self):
+        pattern = get_shift_pattern()
+        calls = []
+        normalize = EmbPattern.get_normalized_pattern
+
+        def counting(self, settings=None):
+            calls.append(settings)
+            return normalize(self, settings)
+
+        EmbPattern.get_normalized_pattern = counting
+        try:
+            write_all(pattern, [self.path("a.pes"), self.path("a.pec"), self.path("a.json")])
+            self.assertEqual(len(calls), 1)
+            del calls[:]
+            write_all(pattern, [self.path("b.pes"), (self.path("b.pec"), {"max_stitch": 30})])
+            self.assertEqual(len(calls), 2)
+        finally:
+            EmbPattern.get_normalized_pattern = normalize
+
+    def test_write_all_target_settings(self):
+        pattern = get_shift_pattern()
+        write(pattern, self.path("single.dst"), {"translate": (10, 10)})
+        write_all(pattern, [(self.path("all.dst"), {"translate": (10, 10)}), self.path("plain.dst")])
+        with open(self.path("single.dst"), "rb") as f, open(self.path("all.dst"), "rb") as g:
+            self.assertEqual(f.read(), g.read())
+        self.assertTrue(os.path.exists(self.path("plain.dst")))
+
+    def test_write_all_unsupported(self):
+        with self.assertRaises(IOError):
+            write_all(get_shift_pattern(), [self.path("a.dst"), self.path("a.unknown")])
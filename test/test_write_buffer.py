@@ -0,0 +1,88 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from test.pattern_for_tests import *
+from pystitch.utils.WriteHelper import BinaryBuffer, write_int_16le, write_int_32be
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self):
+        io.BytesIO.__init__(self)
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return io.BytesIO.write(self, data)
+
+
+class TestWriteBuffer(unittest.TestCase):
+
+    def test_buffer_values(self):
+        buffer = BinaryBuffer()
+        buffer.int_8(-1)
+        buffer.int_16le(0x1234)
+        buffer.int_16be(0x1234)
+        buffer.int_24le(-2)
+        buffer.int_24be(0x010203)
+        buffer.int_32le(0x01020304)
+        buffer.int_32be(-1)
+        buffer.float_32le(1)
+        write_int_16le(buffer, 0xABCD)
+        self.assertEqual(
+            buffer.getvalue(),
+            b"\xff\x34\x12\x12\x34\xfe\xff\xff\x01\x02\x03\x04\x03\x02\x01\xff\xff\xff\xff"
+            b"\x00\x00\x80\x3f\xcd\xab",
+        )
+        self.assertEqual(len(buffer), 25)
+
+    def test_buffer_patch(self):
+        buffer = BinaryBuffer(100)
+        buffer.write(b"AB")
+        position = buffer.placeholder(4)
+        self.assertEqual(position, 102)
+        short = buffer.placeholder(2)
+        middle = buffer.placeholder(3)
+        buffer.write(b"CD")
+        self.assertEqual(buffer.tell(), 113)
+        buffer.patch_int_32be(position, buffer.tell())
+        buffer.patch_int_16le(short, -1)
+        buffer.patch_int_24le(middle, 0x0A0B0C)
+        self.assertEqual(buffer.getvalue(), b"AB\x00\x00\x00\x71\xff\xff\x0c\x0b\x0aCD")
+        buffer.patch_int_32le(position, 1)
+        self.assertEqual(buffer.getvalue()[2:6], b"\x01\x00\x00\x00")
+
+    def test_buffer_pad_flush(self):
+        stream = CountingStream()
+        stream.write(b"12")
+        buffer = BinaryBuffer(stream.tell())
+        buffer.write(b"3")
+        buffer.pad(6, b" ")
+        buffer.pad(4)
+        write_int_32be(buffer, 7)
+        buffer.flush(stream)
+        self.assertEqual(stream.getvalue(), b"123   \x00\x00\x00\x07")
+        self.assertEqual(stream.writes, 2)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.tell(), stream.tell())
+
+    def test_writers_single_write(self):
+        pattern = get_big_pattern()
+        for writer, reader, settings in (
+            (write_pes, read_pes, {}),
+            (write_pes, read_pes, {"version": 6}),
+            (write_pec, read_pec, {}),
+            (write_vp3, read_vp3, {}),
+            (write_jef, read_jef, {"date": "20240101000000"}),
+            (write_xxx, read_xxx, {}),
+            (write_u01, read_u01, {}),
+        ):
+            stream = CountingStream()
+            writer(pattern, stream, settings)
+            self.assertEqual(stream.writes, 1, writer.__name__)
+            loaded = reader(io.BytesIO(stream.getvalue()))
+            self.assertIsNotNone(loaded, writer.__name__)
+            self.assertEqual(
+                loaded.count_stitch_commands(STITCH), pattern.count_stitch_commands(STITCH), writer.__name__
+            )
@@ -0,0 +1,121 @@
+from __future__ import print_function
+
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from test.pattern_for_tests import *
+from pystitch.utils.WriteHelper import BinaryBuffer, stream_position
+
+
+class ForwardStream(io.RawIOBase):
+    """Write-only stream that cannot seek or tell, like a pipe or socket.
+    With a chunk size, writes take at most that many bytes."""
+
+    def __init__(self, chunk=None):
+        io.RawIOBase.__init__(self)
+        self.data = bytearray()
+        self.chunk = chunk
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        b = bytes(b)
+        if self.chunk is not None:
+            b = b[:self.chunk]
+        self.data += b
+        return len(b)
+
+
+class TestWriteStream(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def file_bytes(self, pattern, extension, settings=None):
+        path = os.path.join(self.directory.name, "file." + extension)
+        write(pattern, path, settings)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_stream_position(self):
+        self.assertEqual(stream_position(ForwardStream()), 0)
+        self.assertEqual(stream_position(object()), 0)
+        stream = io.BytesIO(b"abc")
+        stream.seek(2)
+        self.assertEqual(stream_position(stream), 2)
+
+    def test_flush_short_writes(self):
+        stream = ForwardStream(chunk=7)
+        buffer = BinaryBuffer()
+        buffer.write(bytes(range(100)))
+        buffer.flush(stream)
+        self.assertEqual(bytes(stream.data), bytes(range(100)))
+        self.assertEqual(buffer.tell(), 100)
+
+    def test_write_forward_stream_identical(self):
+        pattern = get_big_pattern()
+        pattern.metadata("name", "forward")
+        settings = {"date": "20240101000000"}
+        extensions = [
+            file_type["extension"] for file_type in supported_formats()
+            if file_type.get("writer") is not None
+        ]
+        self.assertIn("pes", extensions)
+        for extension in extensions:
+            expected = self.file_bytes(pattern, extension, settings)
+            stream = ForwardStream()
+            write(pattern, stream, dict(settings, extension=extension))
+            self.assertEqual(bytes(stream.data), expected, extension)
+            buffered = ForwardStream()
+            writer = io.BufferedWriter(buffered)
+            write(pattern, writer, dict(settings, extension=extension))
+            writer.flush()
+            self.assertEqual(bytes(buffered.data), expected, extension)
+
+    def test_write_pes_versions_forward(self):
+        pattern = get_big_pattern()
+        for version in (1, 6, "1t", "6t"):
+            expected = self.file_bytes(pattern, "pes", {"version": version})
+            stream = ForwardStream()
+            write_pes(pattern, stream, {"version": version})
+            self.assertEqual(bytes(stream.data), expected, version)
+
+    def test_write_stream_extension_from_name(self):
+        pattern = get_simple_pattern()
+        path = os.path.join(self.directory.name, "named.dst")
+        with open(path, "wb") as f:
+            write(pattern, f)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), self.file_bytes(pattern, "dst"))
+        self.assertRaises(IOError, lambda: write(pattern, ForwardStream()))
+        self.assertRaises(IOError, lambda: write(pattern, ForwardStream(), {"extension": "pdf"}))
+
+    def test_write_pipe(self):
+        pattern = get_big_pattern()
+        expected = self.file_bytes(pattern, "vp3")
+        read_end, write_end = os.pipe()
+        received = []
+
+        def receive():
+            with os.fdopen(read_end, "rb") as f:
+                received.append(f.read())
+
+        reader = threading.Thread(target=receive)
+        reader.start()
+        with os.fdopen(write_end, "wb") as f:
+            write(pattern, f, {"extension": "vp3"})
+        reader.join()
+        self.assertEqual(received[0], expected)
+
+    def test_write_all_streams(self):
+        pattern = get_big_pattern()
+        dst = io.BytesIO()
+        exp = ForwardStream()
+        write_all(pattern, [(dst, {"extension": "dst"}), (exp, {"extension": "exp"})])
+        self.assertEqual(dst.getvalue(), self.file_bytes(pattern, "dst"))
+        self.assertEqual(bytes(exp.data), self.file_bytes(pattern, "exp"))